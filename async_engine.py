@@ -0,0 +1,191 @@
+"""
+asyncio 爬取引擎
+与同步引擎共用分页、解析、重试判断和断点逻辑，只替换网络层：
+限速从请求开始时计时，解析当前页的同时预取下一页。
+"""
+import asyncio
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import httpx
+except ImportError:  # 异步引擎为可选功能
+    httpx = None
+
+from config import MAX_RETRIES, REQUEST_TIMEOUT
+from rate_limit import BudgetedSession
+
+
+class AsyncResponse:
+    """与 requests.Response 对齐的最小响应对象，供 classify_response 和解析器使用。"""
+
+    def __init__(self, url, status_code, text, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = dict(headers or {})
+
+
+class AsyncRateLimiter:
+    """相邻两次请求的开始时间至少间隔 delay 秒，等待期间不阻塞事件循环。"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._next_slot = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def is_async_engine_available():
+    return httpx is not None
+
+
+def create_client(session):
+    """沿用同步会话的请求头、Cookie 和协议（--http2）创建异步客户端。"""
+    return httpx.AsyncClient(
+        headers=dict(session.headers),
+        cookies=session.cookies.get_dict(),
+        follow_redirects=True,
+        timeout=REQUEST_TIMEOUT,
+        http2=getattr(session, "http2", False) is True,
+    )
+
+
+def predict_next_url(url, page_size):
+    """豆瓣收藏列表按 start 偏移分页，据此推测下一页链接用于预取。"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    try:
+        start = int(query.get("start", 0))
+    except ValueError:
+        return None
+    query["start"] = str(start + page_size)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def is_same_page(first_url, second_url):
+    if not first_url or not second_url:
+        return False
+    first, second = urlsplit(first_url), urlsplit(second_url)
+    return (
+        first.netloc == second.netloc
+        and first.path == second.path
+        and sorted(parse_qsl(first.query, keep_blank_values=True))
+        == sorted(parse_qsl(second.query, keep_blank_values=True))
+    )
+
+
+class AsyncCrawlEngine:
+    def __init__(self, crawler, client_factory=None):
+        self.crawler = crawler
+        self.client_factory = client_factory or create_client
+        self.limiter = AsyncRateLimiter(crawler.request_delay)
+        # 异步客户端绕过同步会话，批量备份的全局请求预算需要在这里单独扣除
+        session = crawler.session
+        self.budget = session.bucket if isinstance(session, BudgetedSession) else None
+
+    async def _wait_before_request(self, url):
+        loop = asyncio.get_running_loop()
+        if self.budget is not None:
+            await loop.run_in_executor(None, self.budget.acquire)
+        if self.crawler.throttle is not None:
+            # 与其他分类共享的按主机节流器是阻塞实现，放到线程里等待。
+            await loop.run_in_executor(None, self.crawler.throttle.wait, url)
+        else:
+            await self.limiter.wait()
+
+    async def fetch(self, client, url, retries=MAX_RETRIES):
+        """与 BaseCrawler._make_request 相同的重试策略。"""
+        for i in range(retries):
+            try:
+                await self._wait_before_request(url)
+                started = time.perf_counter()
+                try:
+                    raw = await client.get(url)
+                except Exception:
+                    self.crawler.metrics.record_error(url)
+                    raise
+                response = AsyncResponse(
+                    str(raw.url),
+                    raw.status_code,
+                    raw.text,
+                    getattr(raw, "headers", None),
+                )
+                # 异步客户端不经过同步会话的包装，直接记录请求指标
+                self.crawler.metrics.record_response(
+                    url, response, time.perf_counter() - started
+                )
+                if self.crawler.throttle is not None:
+                    self.crawler.throttle.record(url, response)
+                should_retry, message = self.crawler._should_retry(response)
+                if not should_retry:
+                    return response
+                if i == retries - 1:
+                    return response
+                print(f"[WARN] {message} 即将重试（{i + 1}/{retries}）")
+            except Exception as e:
+                if i == retries - 1:
+                    print(f"[ERROR] 请求失败: {url}, 错误: {e}")
+                    return None
+            if i < retries - 1:
+                throttle = self.crawler.throttle
+                retry_delay = 2 if throttle is None else throttle.retry_delay
+                if retry_delay:
+                    await asyncio.sleep(retry_delay)
+        return None
+
+    async def crawl(self, url, collection_type=None, initial_data=None):
+        crawler = self.crawler
+        crawler.data = list(initial_data or [])
+        loop = asyncio.get_running_loop()
+        current_url = url
+        visited_urls = set()
+        prefetch_url, prefetch = None, None
+        # 第一页的链接格式与分页链接不同，从第二页开始才预取。
+        followed_link = False
+
+        async with self.client_factory(crawler.session) as client:
+            while current_url:
+                if not crawler._start_page(current_url, collection_type, visited_urls):
+                    break
+
+                if prefetch is not None and is_same_page(prefetch_url, current_url):
+                    response = await prefetch
+                else:
+                    if prefetch is not None:
+                        prefetch.cancel()
+                    response = await self.fetch(client, current_url)
+                prefetch_url, prefetch = None, None
+
+                if followed_link and response is not None:
+                    prefetch_url = predict_next_url(current_url, crawler.PAGE_SIZE)
+                    if prefetch_url and prefetch_url not in visited_urls:
+                        prefetch = asyncio.ensure_future(self.fetch(client, prefetch_url))
+
+                # 解析放到线程中执行，期间事件循环继续完成预取请求。
+                current_url = await loop.run_in_executor(
+                    None,
+                    crawler._finish_page,
+                    current_url,
+                    response,
+                    collection_type,
+                    visited_urls,
+                )
+                followed_link = True
+
+            if prefetch is not None:
+                prefetch.cancel()
+
+        return crawler.data
+
+
+def crawl_async(crawler, url, collection_type=None, initial_data=None, client_factory=None):
+    if client_factory is None and not is_async_engine_available():
+        raise RuntimeError("异步引擎需要安装 httpx: pip install httpx")
+    engine = AsyncCrawlEngine(crawler, client_factory=client_factory)
+    return asyncio.run(engine.crawl(url, collection_type, initial_data=initial_data))
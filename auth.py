@@ -5,18 +5,43 @@
 import getpass
 import json
 import os
+import re
 import time
-import requests
-from config import DOUBAN_BASE_URL, HEADERS, DATA_DIR
+from urllib.parse import urlsplit
+from config import DOUBAN_BASE_URL, DATA_DIR
 from file_security import restrict_file_permissions
+from transport import create_session
+
+
+def is_login_page(url):
+    url = url or ''
+    return 'accounts/login' in url or urlsplit(url).netloc == 'accounts.douban.com'
+
+
+def parse_user_info(response):
+    """从 /mine/ 跳转后的个人主页识别用户 ID 和昵称；识别不到 ID 时返回 None。"""
+    # /mine/ 通常跳转到 /people/<id>/
+    match = re.search(r'people/([^/]+)/', response.url or '')
+    if not match:
+        return None
+    user_info = {'id': match.group(1)}
+
+    text = response.text or ''
+    name_match = re.search(r'<div class="info">.*?<h1>(.*?)</h1>', text, re.DOTALL)  # Profile page h1
+    if not name_match:
+        name_match = re.search(r'<span class="pl">(.*?)</span>', text)  # Nav or side
+    if name_match:
+        user_info['name'] = name_match.group(1).strip()
+    return user_info
 
 
 class DoubanAuth:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-        self.cookies_file = os.path.join(DATA_DIR, 'cookies.json')
-        self.user_info_file = os.path.join(DATA_DIR, 'user_info.json')
+    def __init__(self, session=None, cookies_file=None, user_info_file=None):
+        # 由调用方按并发数和协议创建共享会话；未传入时使用默认连接池
+        self.session = session or create_session()
+        # 批量备份时每个账号使用自己的 Cookie 和用户信息文件
+        self.cookies_file = cookies_file or os.path.join(DATA_DIR, 'cookies.json')
+        self.user_info_file = user_info_file or os.path.join(DATA_DIR, 'user_info.json')
 
     def login_with_cookies(self):
         """使用保存的cookies登录"""
@@ -25,9 +50,11 @@ class DoubanAuth:
                 cookies = json.load(f)
             self.session.cookies.update(cookies)
 
-            if self._verify_login():
+            # 一次 /mine/ 请求同时完成登录校验和用户信息识别
+            logged_in, user_info = self._check_account()
+            if logged_in:
                 print("[OK] 使用保存的 cookies 登录成功")
-                self._save_user_info()
+                self._store_user_info(user_info)
                 return True
 
         return False
@@ -78,13 +105,19 @@ class DoubanAuth:
         print("登录失败，请检查账号密码或验证码")
         return False
 
-    def _verify_login(self):
-        """验证登录状态"""
+    def _check_account(self):
+        """请求 /mine/：未登录时会跳转到登录页，已登录时跳转到个人主页。
+
+        返回 (是否已登录, 用户信息)；无法识别用户时用户信息为 None。
+        """
         try:
-            response = self.session.get(f"{DOUBAN_BASE_URL}/people/", timeout=30)
-            return response.url != f"{DOUBAN_BASE_URL}/accounts/login"
-        except Exception:
-            return False
+            response = self.session.get(f"{DOUBAN_BASE_URL}/mine/", timeout=30, allow_redirects=True)
+        except Exception as e:
+            print(f"获取用户信息失败: {e}")
+            return False, None
+        if is_login_page(response.url):
+            return False, None
+        return True, parse_user_info(response)
 
     def _save_cookies(self):
         """保存cookies到文件"""
@@ -96,42 +129,16 @@ class DoubanAuth:
 
     def _save_user_info(self):
         """保存用户信息"""
-        try:
-            # 访问个人主页自动跳转
-            # /mine/ usually redirects to /people/<id>/
-            response = self.session.get(f"{DOUBAN_BASE_URL}/mine/", timeout=30, allow_redirects=True)
-            
-            import re
-            # Check url first
-            user_id = None
-            match = re.search(r'people/([^/]+)/', response.url)
-            if match:
-                user_id = match.group(1)
-            
-            # If standard URL match failed, look for id in page content or other indicators
-            # But usually /mine/ -> /people/id/
-            
-            user_name = None
-            name_match = re.search(r'<div class="info">.*?<h1>(.*?)</h1>', response.text, re.DOTALL) # Profile page h1
-            if not name_match:
-                 name_match = re.search(r'<span class="pl">(.*?)</span>', response.text) # Nav or side
-            
-            if name_match:
-                user_name = name_match.group(1).strip()
-
-            if user_id:
-                user_info = {'id': user_id}
-                if user_name:
-                    user_info['name'] = user_name
-                
-                with open(self.user_info_file, 'w', encoding='utf-8') as f:
-                    json.dump(user_info, f, ensure_ascii=False)
-                print(f"[OK] 获取用户信息成功: {user_id} ({user_name})")
-            else:
-                print("[WARN] 无法获取用户 ID，请手动检查 cookies 是否包含有效登录信息。")
-
-        except Exception as e:
-            print(f"获取用户信息失败: {e}")
+        _, user_info = self._check_account()
+        self._store_user_info(user_info)
+
+    def _store_user_info(self, user_info):
+        if not user_info:
+            print("[WARN] 无法获取用户 ID，请手动检查 cookies 是否包含有效登录信息。")
+            return
+        with open(self.user_info_file, 'w', encoding='utf-8') as f:
+            json.dump(user_info, f, ensure_ascii=False)
+        print(f"[OK] 获取用户信息成功: {user_info['id']} ({user_info.get('name')})")
 
     def get_session(self):
         """获取已登录的session"""
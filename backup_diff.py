@@ -0,0 +1,201 @@
+"""
+备份对比
+比较两份备份 JSON（DataStorage.save_json 或 crawl_public.save_json 写出），列出新增、删除、
+换了收藏状态（如想看 → 看过）、改了评分和改了评语的条目，输出 JSON 和 Excel 变化报告。
+
+旧备份只保留每个条目的 (标题, 评分, 评语) 建成以 (分类, 收藏状态, 豆瓣ID) 为键的哈希表，
+新备份逐条流式读取并探测，两份文件各读一遍，耗时与条目数成正比，内存只与旧备份的条目数有关。
+"""
+import os
+from datetime import datetime
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from excel_safety import sanitize_excel_value
+from backup_formats import open_backup_reader
+from json_stream import save_backup_json
+
+# 条目 type 字段对应的备份分类
+ITEM_CATEGORIES = {'movie': 'movies', 'book': 'books', 'music': 'music', 'game': 'games'}
+CHANGE_TYPES = ('added', 'removed', 'moved', 'rerated', 'comment_edited')
+CHANGE_LABELS = {
+    'added': '新增',
+    'removed': '删除',
+    'moved': '收藏状态变化',
+    'rerated': '评分变化',
+    'comment_edited': '评语变化',
+}
+REPORT_COLUMNS = (
+    ('change', '变化', 14),
+    ('category', '分类', 10),
+    ('collection', '收藏状态', 10),
+    ('title', '标题', 30),
+    ('douban_id', '豆瓣ID', 14),
+    ('old_value', '原值', 30),
+    ('new_value', '新值', 30),
+)
+
+
+def iter_backup_entries(path):
+    """逐条读取备份，产生 (分类, 收藏状态, 条目)；单分类备份的分类取自条目类型或元数据。"""
+    with open_backup_reader(path) as reader:
+        selected = reader.metadata.get('selected_categories') or []
+        default_category = selected[0] if len(selected) == 1 else None
+        for keys, item in reader.iter_items():
+            if len(keys) == 2:
+                category, collection = keys
+            elif len(keys) == 1:
+                category = ITEM_CATEGORIES.get(item.get('type'), default_category)
+                collection = keys[0]
+            else:
+                continue
+            if category and item.get('douban_id'):
+                yield category, collection, item
+
+
+def _item_fields(item):
+    return (
+        item.get('title') or '',
+        str(item.get('rating') or ''),
+        item.get('comment') or '',
+    )
+
+
+def _change(change, category, collection, douban_id, title, old_value='', new_value=''):
+    return {
+        'change': change,
+        'category': category,
+        'collection': collection,
+        'douban_id': douban_id,
+        'title': title,
+        'old_value': old_value,
+        'new_value': new_value,
+    }
+
+
+def _compare_fields(changes, category, collection, douban_id, old_fields, new_fields):
+    title, old_rating, old_comment = old_fields
+    _, new_rating, new_comment = new_fields
+    if old_rating != new_rating:
+        changes.append(_change('rerated', category, collection, douban_id, title, old_rating, new_rating))
+    if old_comment != new_comment:
+        changes.append(
+            _change('comment_edited', category, collection, douban_id, title, old_comment, new_comment)
+        )
+
+
+def diff_backups(old_path, new_path):
+    """比较两份备份，返回 {'old', 'new', 'summary', 'changes'}。
+
+    同一 (分类, 收藏状态, 豆瓣ID) 比较评分和评语；只在收藏状态上对不上的条目，
+    再按 (分类, 豆瓣ID) 配对为收藏状态变化，其余为新增或删除。
+    """
+    old_items = {}
+    for category, collection, item in iter_backup_entries(old_path):
+        old_items.setdefault((category, collection, item['douban_id']), _item_fields(item))
+
+    changes = []
+    unmatched = []
+    new_keys = set()
+    for category, collection, item in iter_backup_entries(new_path):
+        key = (category, collection, item['douban_id'])
+        if key in new_keys:
+            continue
+        new_keys.add(key)
+        new_fields = _item_fields(item)
+        old_fields = old_items.pop(key, None)
+        if old_fields is None:
+            unmatched.append((key, new_fields))
+        else:
+            _compare_fields(changes, category, collection, key[2], old_fields, new_fields)
+
+    # 剩下的旧条目按 (分类, 豆瓣ID) 建索引，与新备份中没配上的条目配对
+    leftovers = {}
+    for key in old_items:
+        leftovers.setdefault((key[0], key[2]), key)
+    for (category, collection, douban_id), new_fields in unmatched:
+        old_key = leftovers.pop((category, douban_id), None)
+        if old_key is None:
+            changes.append(_change('added', category, collection, douban_id, new_fields[0]))
+            continue
+        old_fields = old_items.pop(old_key)
+        changes.append(
+            _change('moved', category, collection, douban_id, new_fields[0], old_key[1], collection)
+        )
+        _compare_fields(changes, category, collection, douban_id, old_fields, new_fields)
+    for (category, collection, douban_id), old_fields in old_items.items():
+        changes.append(_change('removed', category, collection, douban_id, old_fields[0]))
+
+    summary = {change: 0 for change in CHANGE_TYPES}
+    for change in changes:
+        summary[change['change']] += 1
+    return {
+        'old': os.path.abspath(old_path),
+        'new': os.path.abspath(new_path),
+        'summary': summary,
+        'changes': changes,
+    }
+
+
+def save_diff_json(diff, filepath):
+    metadata = {
+        'generated_at': datetime.now().astimezone().isoformat(),
+        'old_backup': diff['old'],
+        'new_backup': diff['new'],
+    }
+    return save_backup_json(
+        filepath,
+        {'summary': diff['summary'], 'changes': diff['changes']},
+        metadata,
+    )
+
+
+def save_diff_excel(diff, filepath):
+    """写出变化报告工作簿：汇总 sheet 加一张逐条变化明细。"""
+    wb = Workbook(write_only=True)
+    header_font = Font(name='Microsoft YaHei', bold=True)
+
+    def header_row(ws, values):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = header_font
+            cells.append(cell)
+        return cells
+
+    summary_ws = wb.create_sheet('汇总')
+    summary_ws.column_dimensions['A'].width = 16
+    summary_ws.column_dimensions['B'].width = 80
+    summary_ws.append(header_row(summary_ws, ['项目', '内容']))
+    summary_ws.append(['原备份', sanitize_excel_value(diff['old'])])
+    summary_ws.append(['新备份', sanitize_excel_value(diff['new'])])
+    for change in CHANGE_TYPES:
+        summary_ws.append([CHANGE_LABELS[change], diff['summary'][change]])
+
+    changes_ws = wb.create_sheet('变化明细')
+    for index, (_, _, width) in enumerate(REPORT_COLUMNS, 1):
+        changes_ws.column_dimensions[get_column_letter(index)].width = width
+    changes_ws.freeze_panes = 'A2'
+    changes_ws.append(header_row(changes_ws, [header for _, header, _ in REPORT_COLUMNS]))
+    for change in diff['changes']:
+        row = []
+        for key, _, _ in REPORT_COLUMNS:
+            value = change[key]
+            if key == 'change':
+                value = CHANGE_LABELS[value]
+            row.append(sanitize_excel_value(value))
+        changes_ws.append(row)
+
+    wb.save(filepath)
+    return filepath
+
+
+def save_diff_report(diff, output_dir, timestamp=None):
+    """在 output_dir 写出 douban_diff_<时间>.json 和 .xlsx，返回两个文件路径。"""
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    os.makedirs(output_dir, exist_ok=True)
+    base_path = os.path.join(output_dir, f"douban_diff_{timestamp}")
+    return save_diff_json(diff, f"{base_path}.json"), save_diff_excel(diff, f"{base_path}.xlsx")
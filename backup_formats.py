@@ -0,0 +1,261 @@
+"""
+备份文件格式
+备份文件除默认的缩进 JSON 外，还可以写成紧凑 JSON、gzip / zstd 压缩的 JSON、NDJSON 或 MessagePack，
+由 --format 选择；读取时按扩展名识别，备份列表、增量基准、diff 等读取方对所有格式一视同仁。
+
+    json     .json        缩进 JSON（默认，与 json.dump(indent=2) 逐字节一致）
+    compact  .json        紧凑 JSON，去掉缩进和换行
+    gzip     .json.gz     gzip 压缩的紧凑 JSON
+    zstd     .json.zst    zstd 压缩的紧凑 JSON（需 pip install zstandard）
+    ndjson   .ndjson      首行为元数据和数据骨架，之后每行一个条目，可逐行追加和流式读取
+    msgpack  .msgpack     MessagePack 二进制（需 pip install msgpack）
+"""
+import gzip
+import io
+import json
+import os
+
+from file_security import write_atomic
+from item_records import to_json_default
+from json_stream import BackupJsonReader, save_backup_json
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选格式
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack 为可选格式
+    msgpack = None
+
+BACKUP_FORMATS = ('json', 'compact', 'gzip', 'zstd', 'ndjson', 'msgpack')
+FORMAT_EXTENSIONS = {
+    'json': '.json',
+    'compact': '.json',
+    'gzip': '.json.gz',
+    'zstd': '.json.zst',
+    'ndjson': '.ndjson',
+    'msgpack': '.msgpack',
+}
+# 识别文件时先匹配较长的扩展名
+BACKUP_EXTENSIONS = ('.json.gz', '.json.zst', '.ndjson', '.msgpack', '.json')
+OPTIONAL_FORMATS = {
+    'zstd': ('zstandard', 'pip install zstandard'),
+    'msgpack': ('msgpack', 'pip install msgpack'),
+}
+
+
+def is_format_available(fmt):
+    if fmt == 'zstd':
+        return zstandard is not None
+    if fmt == 'msgpack':
+        return msgpack is not None
+    return fmt in BACKUP_FORMATS
+
+
+def _require_format(fmt):
+    if fmt not in BACKUP_FORMATS:
+        raise ValueError(f"不支持的备份格式: {fmt}")
+    if not is_format_available(fmt):
+        module, hint = OPTIONAL_FORMATS[fmt]
+        raise RuntimeError(f"{fmt} 格式需要安装 {module}: {hint}")
+
+
+def format_error(fmt):
+    """返回该格式不可用的原因，可用时返回 None；CLI 启动时用来提前报错。"""
+    try:
+        _require_format(fmt)
+    except (ValueError, RuntimeError) as e:
+        return str(e)
+    return None
+
+
+def split_backup_name(filename):
+    """把文件名拆成 (不含扩展名的备份名, 扩展名)；不是备份文件时扩展名为 None。"""
+    for extension in BACKUP_EXTENSIONS:
+        if filename.endswith(extension):
+            return filename[:-len(extension)], extension
+    return filename, None
+
+
+def _compact_json(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=to_json_default)
+
+
+def _write_text(binary_file, write):
+    """以 UTF-8 文本写入二进制文件对象，不关闭底层文件。"""
+    text = io.TextIOWrapper(binary_file, encoding='utf-8')
+    write(text)
+    text.flush()
+    text.detach()
+
+
+def _dump_compact(binary_file, payload):
+    # json.dump 分块编码写出，不生成整份 JSON 字符串
+    _write_text(
+        binary_file,
+        lambda text: json.dump(
+            payload, text, ensure_ascii=False, separators=(',', ':'), default=to_json_default
+        ),
+    )
+
+
+def _skeleton(value):
+    """数据骨架：列表替换为空列表，NDJSON 靠它保留空收藏列表和键的顺序。"""
+    if isinstance(value, dict):
+        return {key: _skeleton(child) for key, child in value.items()}
+    if isinstance(value, list):
+        return []
+    return value
+
+
+def _iter_list_entries(value, keys=()):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from _iter_list_entries(child, keys + (key,))
+    elif isinstance(value, list):
+        for item in value:
+            yield keys, item
+
+
+def save_backup(base_path, data, metadata, fmt='json'):
+    """按格式写出 {"metadata": ..., "data": ...}，base_path 不含扩展名，返回实际文件路径。"""
+    _require_format(fmt)
+    path = base_path + FORMAT_EXTENSIONS[fmt]
+    if fmt == 'json':
+        return save_backup_json(path, data, metadata)
+
+    payload = {'metadata': metadata, 'data': data}
+    if fmt == 'compact':
+        write_atomic(path, lambda f: _dump_compact(f, payload), 'wb', fsync=True)
+    elif fmt == 'gzip':
+        def write_gzip(file_obj):
+            # mtime=0 让相同内容得到相同的压缩文件
+            with gzip.GzipFile(fileobj=file_obj, mode='wb', mtime=0) as compressed:
+                _dump_compact(compressed, payload)
+
+        write_atomic(path, write_gzip, 'wb', fsync=True)
+    elif fmt == 'zstd':
+        def write_zstd(file_obj):
+            compressor = zstandard.ZstdCompressor()
+            with compressor.stream_writer(file_obj, closefd=False) as compressed:
+                _dump_compact(compressed, payload)
+
+        write_atomic(path, write_zstd, 'wb', fsync=True)
+    elif fmt == 'ndjson':
+        def write_lines(text):
+            text.write(_compact_json({'metadata': metadata, 'data': _skeleton(data)}) + '\n')
+            for keys, item in _iter_list_entries(data):
+                text.write(_compact_json({'path': list(keys), 'item': item}) + '\n')
+
+        write_atomic(path, lambda f: _write_text(f, write_lines), 'wb', fsync=True)
+    elif fmt == 'msgpack':
+        write_atomic(
+            path,
+            msgpack.packb(payload, default=to_json_default, use_bin_type=True),
+            'wb',
+            fsync=True,
+        )
+    return path
+
+
+def load_backup(path):
+    """读取任意格式的备份文件，返回 {'metadata': ..., 'data': ...}。"""
+    _, extension = split_backup_name(os.path.basename(path))
+    if extension == '.json.gz':
+        with gzip.open(path, 'rt', encoding='utf-8') as file_obj:
+            payload = json.load(file_obj)
+    elif extension == '.json.zst':
+        _require_format('zstd')
+        with open(path, 'rb') as file_obj:
+            reader = zstandard.ZstdDecompressor().stream_reader(file_obj)
+            payload = json.load(io.TextIOWrapper(reader, encoding='utf-8'))
+    elif extension == '.msgpack':
+        _require_format('msgpack')
+        with open(path, 'rb') as file_obj:
+            payload = msgpack.unpack(file_obj, raw=False)
+    elif extension == '.ndjson':
+        with open(path, 'r', encoding='utf-8') as file_obj:
+            header = json.loads(file_obj.readline())
+            data = header.get('data')
+            for line in file_obj:
+                if line.strip():
+                    entry = json.loads(line)
+                    _place(data, entry['path'], entry['item'])
+            payload = {'metadata': header.get('metadata'), 'data': data}
+    else:
+        with open(path, 'r', encoding='utf-8') as file_obj:
+            payload = json.load(file_obj)
+
+    if not isinstance(payload, dict) or 'data' not in payload:
+        # 没有 metadata 包装的旧备份，整个文件就是 data
+        payload = {'metadata': {}, 'data': payload}
+    return payload
+
+
+def _place(data, keys, item):
+    target = data
+    for key in keys:
+        target = target[key]
+    target.append(item)
+
+
+class _LoadedBackupReader:
+    """整体读入后按条目遍历，用于无法逐行流式读取的格式（压缩 JSON、MessagePack）。"""
+
+    def __init__(self, path):
+        self.path = path
+        self.metadata = {}
+        self._data = None
+
+    def __enter__(self):
+        payload = load_backup(self.path)
+        self.metadata = payload['metadata'] or {}
+        self._data = payload['data']
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._data = None
+        return False
+
+    def iter_items(self):
+        for keys, item in _iter_list_entries(self._data):
+            if isinstance(item, dict):
+                yield keys, item
+
+
+class _NdjsonBackupReader:
+    """逐行读取 NDJSON 备份，一次只解析一个条目。"""
+
+    def __init__(self, path):
+        self.path = path
+        self.metadata = {}
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'r', encoding='utf-8')
+        header = json.loads(self._file.readline())
+        self.metadata = header.get('metadata') or {}
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        return False
+
+    def iter_items(self):
+        for line in self._file:
+            if line.strip():
+                entry = json.loads(line)
+                if isinstance(entry['item'], dict):
+                    yield tuple(entry['path']), entry['item']
+
+
+def open_backup_reader(path):
+    """按扩展名返回逐条读取备份的上下文管理器，接口与 BackupJsonReader 相同。"""
+    _, extension = split_backup_name(os.path.basename(path))
+    if extension == '.ndjson':
+        return _NdjsonBackupReader(path)
+    if extension in ('.json.gz', '.json.zst', '.msgpack'):
+        return _LoadedBackupReader(path)
+    return BackupJsonReader(path)
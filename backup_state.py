@@ -1,20 +1,32 @@
 import json
 import os
 import hashlib
+import threading
 from datetime import datetime
 
 from config import APP_VERSION
+from file_security import write_atomic
+from item_records import records_from_dicts, to_json_default
+from metrics import NULL_METRICS
 
 
 class BackupState:
-    def __init__(self, output_dir, user_id, filename=None):
+    # 日志累计到这么多条记录后合并回快照文件
+    COMPACT_EVERY = 200
+
+    def __init__(self, output_dir, user_id, filename=None, metrics=None):
         self.output_dir = output_dir
+        self.metrics = metrics or NULL_METRICS
         self.user_id = user_id
         os.makedirs(self.output_dir, exist_ok=True)
         if filename is None:
             user_key = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:12]
             filename = f"backup_state_{user_key}.json"
         self.path = os.path.join(self.output_dir, filename)
+        self.journal_path = f"{self.path}.journal"
+        self.journal_records = 0
+        # 多个分类并发爬取时共用同一个断点文件，所有读写都需串行化。
+        self._lock = threading.RLock()
         self.state = self._load()
 
     def _default_state(self):
@@ -24,11 +36,13 @@ class BackupState:
                 "app_version": APP_VERSION,
             },
             "updated_at": None,
+            "journal_seq": 0,
             "collections": {},
         }
 
     def _load(self):
         if not os.path.exists(self.path):
+            self._remove_journal()
             return self._default_state()
 
         try:
@@ -36,21 +50,120 @@ class BackupState:
                 state = json.load(file_obj)
         except (OSError, json.JSONDecodeError):
             print(f"[WARN] 断点文件无法读取，将从头开始: {self.path}")
+            self._remove_journal()
             return self._default_state()
 
         if state.get("context") != self._default_state()["context"]:
             print("[WARN] 断点所属账号或版本不匹配，将从头开始。")
+            self._remove_journal()
             return self._default_state()
-        return state
+
+        # 条目以紧凑的记录形式常驻内存，写回时再序列化为原来的字典结构
+        for category_state in state.get("collections", {}).values():
+            for entry in category_state.values():
+                entry["items"] = records_from_dicts(entry.get("items"))
+        self.state = state
+        self._replay_journal()
+        return self.state
+
+    def _replay_journal(self):
+        """按顺序重放快照之后追加的日志记录。"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        torn = False
+        with open(self.journal_path, "r", encoding="utf-8") as file_obj:
+            for line in file_obj:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 最后一行可能在写入时被中断，之前的记录仍然有效。
+                    torn = True
+                    break
+                # 快照写完但日志尚未删除时，日志中的记录已经包含在快照里。
+                if record.get("seq", 0) <= self.state.get("journal_seq", 0):
+                    continue
+                self._apply(record)
+                self.journal_records += 1
+
+        if torn:
+            # 立即合并回快照并删除日志，否则后续记录会接在半行之后，下次加载时全部丢失。
+            self._save()
+
+    def _apply(self, record):
+        entry = self._entry(record["category"], record["collection"])
+        items = records_from_dicts(record.get("items"))
+        if record.get("reset"):
+            entry["items"] = items
+        else:
+            entry["items"].extend(items)
+        entry["current_url"] = record.get("current_url")
+        entry["next_url"] = record.get("next_url")
+        entry["completed"] = bool(record.get("completed"))
+        self.state["journal_seq"] = record["seq"]
+        self.state["updated_at"] = record.get("updated_at")
 
     def _save(self):
+        """把完整状态写成快照并清空日志。"""
         self.state["updated_at"] = datetime.now().astimezone().isoformat()
-        temp_path = f"{self.path}.tmp"
-        with open(temp_path, "w", encoding="utf-8") as file_obj:
-            json.dump(self.state, file_obj, ensure_ascii=False, indent=2)
-            file_obj.flush()
-            os.fsync(file_obj.fileno())
-        os.replace(temp_path, self.path)
+        with self.metrics.timer("checkpoint_write_seconds", kind="snapshot"):
+            write_atomic(
+                self.path,
+                lambda file_obj: json.dump(
+                    self.state,
+                    file_obj,
+                    ensure_ascii=False,
+                    indent=2,
+                    default=to_json_default,
+                ),
+                fsync=True,
+            )
+        self._remove_journal()
+
+    def _append(self, category, collection, current_url, next_url, completed, items):
+        """只把本页新增的条目和游标追加到日志，写入成本与单页数据量成正比。"""
+        with self._lock:
+            entry = self._entry(category, collection)
+            saved_count = len(entry["items"])
+            # 爬虫只会在已保存条目之后追加；条目变少说明发生了回退，需要整体覆盖。
+            reset = len(items) < saved_count
+            new_items = list(items) if reset else list(items[saved_count:])
+            record = {
+                "seq": self.state.get("journal_seq", 0) + 1,
+                "category": category,
+                "collection": collection,
+                "current_url": current_url,
+                "next_url": next_url,
+                "completed": completed,
+                "items": new_items,
+                "updated_at": datetime.now().astimezone().isoformat(),
+            }
+            if reset:
+                record["reset"] = True
+            self._apply(record)
+
+            if not os.path.exists(self.path) or self.journal_records >= self.COMPACT_EVERY:
+                self._save()
+                return
+
+            with self.metrics.timer("checkpoint_write_seconds", kind="journal"):
+                with open(self.journal_path, "a", encoding="utf-8") as file_obj:
+                    file_obj.write(
+                        json.dumps(record, ensure_ascii=False, default=to_json_default) + "\n"
+                    )
+                    file_obj.flush()
+                    os.fsync(file_obj.fileno())
+            self.journal_records += 1
+
+    def compact(self):
+        """立即把日志合并回快照文件。"""
+        with self._lock:
+            self._save()
+
+    def _remove_journal(self):
+        self.journal_records = 0
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
 
     def _entry(self, category, collection):
         category_state = self.state["collections"].setdefault(category, {})
@@ -65,41 +178,51 @@ class BackupState:
         )
 
     def update_progress(self, category, collection, current_url, next_url, items):
-        entry = self._entry(category, collection)
-        entry["current_url"] = current_url
-        entry["next_url"] = next_url
-        entry["completed"] = False
-        entry["items"] = list(items)
-        self._save()
+        self._append(
+            category,
+            collection,
+            current_url=current_url,
+            next_url=next_url,
+            completed=False,
+            items=items,
+        )
 
     def mark_complete(self, category, collection, items):
-        entry = self._entry(category, collection)
-        entry["current_url"] = None
-        entry["next_url"] = None
-        entry["completed"] = True
-        entry["items"] = list(items)
-        self._save()
+        self._append(
+            category,
+            collection,
+            current_url=None,
+            next_url=None,
+            completed=True,
+            items=items,
+        )
 
     def get_resume_url(self, category, collection):
-        entry = self._entry(category, collection)
-        return entry.get("next_url")
+        with self._lock:
+            entry = self._entry(category, collection)
+            return entry.get("next_url")
 
     def get_partial_items(self, category, collection):
-        entry = self._entry(category, collection)
-        return list(entry.get("items", []))
+        with self._lock:
+            entry = self._entry(category, collection)
+            return list(entry.get("items", []))
 
     def is_collection_complete(self, category, collection):
-        entry = self._entry(category, collection)
-        return bool(entry.get("completed"))
+        with self._lock:
+            entry = self._entry(category, collection)
+            return bool(entry.get("completed"))
 
     def has_incomplete_collections(self):
-        for category_state in self.state["collections"].values():
-            for entry in category_state.values():
-                if not entry.get("completed"):
-                    return True
-        return False
+        with self._lock:
+            for category_state in self.state["collections"].values():
+                for entry in category_state.values():
+                    if not entry.get("completed"):
+                        return True
+            return False
 
     def clear(self):
-        self.state = self._default_state()
-        if os.path.exists(self.path):
-            os.remove(self.path)
+        with self._lock:
+            self.state = self._default_state()
+            self._remove_journal()
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -3,17 +3,27 @@
 提供通用的爬取功能
 """
 import time
-import re
-import json
-from config import REQUEST_TIMEOUT, MAX_RETRIES, DELAY_BETWEEN_REQUESTS, HEADERS
-from bs4 import BeautifulSoup
+from config import (
+    CRAWL_ENGINE,
+    CRAWL_ENGINES,
+    DELAY_BETWEEN_REQUESTS,
+    HEADERS,
+    MAX_RETRIES,
+    REQUEST_TIMEOUT,
+)
 
-from diagnostics import classify_response, describe_empty_parse, is_known_empty_page
+from diagnostics import (
+    RETRYABLE_RESPONSE_CODES,
+    classify_response,
+    describe_empty_parse,
+    is_known_empty_page,
+)
+from html_parsing import extract_json_ld, make_soup, resolve_parser_backend
+from metrics import NULL_METRICS
 
 
 class BaseCrawler:
     PAGE_SIZE = 15
-    RETRYABLE_RESPONSE_CODES = {"rate_limited", "server_error"}
 
     def __init__(
         self,
@@ -21,6 +31,13 @@ class BaseCrawler:
         category_key=None,
         state_store=None,
         request_delay=DELAY_BETWEEN_REQUESTS,
+        parser_backend=None,
+        throttle=None,
+        engine=None,
+        known_items=None,
+        metrics=None,
+        parse_workers=None,
+        item_sink=None,
     ):
         self.session = session
         self.data = []
@@ -29,16 +46,37 @@ class BaseCrawler:
         self.request_delay = (
             DELAY_BETWEEN_REQUESTS if request_delay is None else request_delay
         )
+        self.parser_backend = resolve_parser_backend(parser_backend)
+        # 由调用方传入共享的按主机节流器（固定或自适应间隔），替代每个爬虫各自的固定间隔。
+        self.throttle = throttle
+        self.engine = engine or CRAWL_ENGINE
+        if self.engine not in CRAWL_ENGINES:
+            raise ValueError(f"不支持的爬取引擎: {self.engine}")
+        # pipeline 引擎的解析进程数，None 时使用 PARSE_WORKERS
+        self.parse_workers = parse_workers
+        # 增量模式下为上次备份的 KnownItems，翻到整页已知条目时停止
+        self.known_items = known_items
+        # 请求耗时和重试由会话包装（MeteredSession）记录，这里只记录解析和分页
+        self.metrics = metrics or NULL_METRICS
+        # 逐页写入条目的输出后端（如 SqliteStore），每页一个事务
+        self.item_sink = item_sink
         self.incomplete = False
 
+    def _should_retry(self, response):
+        """按 classify_response 的结果判断是否重试，同步和异步引擎共用。"""
+        status, code, message = classify_response(response)
+        return status != "ok" and code in RETRYABLE_RESPONSE_CODES, message
+
     def _make_request(self, url, retries=MAX_RETRIES):
         """发起HTTP请求，带重试机制"""
         for i in range(retries):
             try:
-                time.sleep(self.request_delay)
+                self._wait_before_request(url)
                 response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                status, code, message = classify_response(response)
-                if status == "ok" or code not in self.RETRYABLE_RESPONSE_CODES:
+                if self.throttle is not None:
+                    self.throttle.record(url, response)
+                should_retry, message = self._should_retry(response)
+                if not should_retry:
                     return response
                 if i == retries - 1:
                     return response
@@ -48,14 +86,26 @@ class BaseCrawler:
                     print(f"[ERROR] 请求失败: {url}, 错误: {e}")
                     return None
             if i < retries - 1:
-                time.sleep(2)
+                retry_delay = 2 if self.throttle is None else self.throttle.retry_delay
+                if retry_delay:
+                    time.sleep(retry_delay)
         return None
 
-    def _parse_items(self, response, collection_type=None):
+    def _wait_before_request(self, url):
+        if self.throttle is not None:
+            self.throttle.wait(url)
+        else:
+            time.sleep(self.request_delay)
+
+    def _parse_document(self, html):
+        """将页面解析为文档树，同一页面的条目、分页和末页判断共用这一次解析。"""
+        return make_soup(html, self.parser_backend)
+
+    def _parse_items(self, soup, collection_type=None):
         """解析页面中的条目列表，子类需重写"""
         raise NotImplementedError
 
-    def _get_pagination(self, response):
+    def _get_pagination(self, soup):
         """获取分页信息，子类需重写"""
         raise NotImplementedError
 
@@ -77,87 +127,145 @@ class BaseCrawler:
 
     def crawl(self, url, collection_type=None, initial_data=None):
         """爬取数据"""
+        with self.metrics.timer(
+            'collection_seconds', category=self.category_key, collection=collection_type
+        ):
+            if self.engine == "async":
+                from async_engine import crawl_async
+
+                return crawl_async(self, url, collection_type, initial_data=initial_data)
+            if self.engine == "pipeline":
+                from parse_pipeline import crawl_pipeline
+
+                return crawl_pipeline(self, url, collection_type, initial_data=initial_data)
+
+            return self._crawl_pages(url, collection_type, initial_data)
+
+    def _crawl_pages(self, url, collection_type, initial_data):
         self.data = list(initial_data or [])
         current_url = url
         visited_urls = set()
 
         while current_url:
-            if current_url in visited_urls:
-                print("[WARN] 分页链接发生循环，已停止并保留断点。")
-                self.incomplete = True
+            if not self._start_page(current_url, collection_type, visited_urls):
                 break
-            visited_urls.add(current_url)
-
-            print(f"正在爬取: {current_url}")
-            if self.state_store and self.category_key:
-                self.state_store.update_progress(
-                    self.category_key,
-                    collection_type,
-                    current_url=current_url,
-                    next_url=current_url,
-                    items=self.data,
-                )
             response = self._make_request(current_url)
+            current_url = self._finish_page(
+                current_url, response, collection_type, visited_urls
+            )
 
-            if response is None:
-                self.incomplete = True
-                break
+        return self.data
 
-            status, _, message = classify_response(response)
-            if status != 'ok':
-                print(f"[WARN] {message}")
-                self.incomplete = True
-                break
+    def _start_page(self, current_url, collection_type, visited_urls):
+        """登记即将抓取的页面并保存断点；分页出现循环时返回 False。"""
+        if current_url in visited_urls:
+            print("[WARN] 分页链接发生循环，已停止并保留断点。")
+            self.incomplete = True
+            return False
+        visited_urls.add(current_url)
 
-            data_before_page = list(self.data)
-            items = self._parse_items(response, collection_type)
-            self.data.extend(items)
-            print(f"  已获取 {len(items)} 条数据")
+        print(f"正在爬取: {current_url}")
+        if self.state_store and self.category_key:
+            self.state_store.update_progress(
+                self.category_key,
+                collection_type,
+                current_url=current_url,
+                next_url=current_url,
+                items=self.data,
+            )
+        return True
 
-            next_url = self._get_pagination(response)
-            page_complete = self._is_last_page(response, items)
+    def _finish_page(self, current_url, response, collection_type, visited_urls):
+        """解析一页响应并保存断点，返回下一页链接；需要停止时返回 None。"""
+        if not self._is_usable_response(response):
+            return None
 
-            if not items and next_url is None:
-                empty_message = describe_empty_parse(response)
-                print(f"[WARN] {empty_message}")
-                page_complete = is_known_empty_page(response)
+        with self.metrics.timer('parse_seconds', category=self.category_key):
+            parsed_page = self._parse_page(response.text, collection_type)
+        return self._apply_page(
+            current_url, response, parsed_page, collection_type, visited_urls
+        )
 
-            if next_url and next_url in visited_urls:
-                print("[WARN] 下一页链接指向已抓取页面，已停止并保留断点。")
-                self.data = data_before_page
-                self.incomplete = True
-                break
+    def _is_usable_response(self, response):
+        """请求失败或页面异常时标记未完成并返回 False。"""
+        if response is None:
+            self.incomplete = True
+            return False
 
-            if self.state_store and self.category_key:
-                if next_url:
-                    self.state_store.update_progress(
-                        self.category_key,
-                        collection_type,
-                        current_url=current_url,
-                        next_url=next_url,
-                        items=self.data,
-                    )
-                elif page_complete:
-                    self.state_store.mark_complete(
-                        self.category_key,
-                        collection_type,
-                        self.data,
-                    )
-
-            if next_url is None and not page_complete:
-                print("[WARN] 无法确认已经到达最后一页，已停止并保留当前页断点。")
-                if self.state_store and self.category_key:
-                    self.data = data_before_page
-                self.incomplete = True
-                break
+        status, _, message = classify_response(response)
+        if status != 'ok':
+            print(f"[WARN] {message}")
+            self.incomplete = True
+            return False
+        return True
 
-            current_url = next_url
+    def _parse_page(self, html, collection_type=None):
+        """解析一页 HTML，返回 (条目列表, 下一页链接, 是否确认为末页)。
 
-        return self.data
+        只依赖页面内容和解析后端，可以放到进程池中执行（见 parse_pipeline）。
+        """
+        soup = self._parse_document(html)
+        items = self._parse_items(soup, collection_type)
+        return items, self._get_pagination(soup), self._is_last_page(soup, items)
+
+    def _apply_page(self, current_url, response, parsed_page, collection_type, visited_urls):
+        """合并一页解析结果并保存断点，返回下一页链接；需要停止时返回 None。"""
+        items, next_url, page_complete = parsed_page
+        data_before_page = list(self.data)
+        self.metrics.inc('pages_total', category=self.category_key)
+        self.metrics.inc('items_total', len(items), category=self.category_key)
+        self.data.extend(items)
+        print(f"  已获取 {len(items)} 条数据")
+
+        if not items and next_url is None:
+            empty_message = describe_empty_parse(response)
+            print(f"[WARN] {empty_message}")
+            page_complete = is_known_empty_page(response)
+
+        if self.known_items is not None:
+            known = self.known_items.collection(self.category_key, collection_type)
+            if known.page_is_known(items):
+                print("  本页条目与上次备份一致，停止翻页并沿用上次备份的其余条目。")
+                self.data = known.merge(self.data)
+                next_url = None
+                page_complete = True
+
+        if next_url and next_url in visited_urls:
+            print("[WARN] 下一页链接指向已抓取页面，已停止并保留断点。")
+            self.data = data_before_page
+            self.incomplete = True
+            return None
+
+        if self.item_sink is not None and items:
+            self.item_sink.upsert(self.category_key, collection_type, items)
+
+        if self.state_store and self.category_key:
+            if next_url:
+                self.state_store.update_progress(
+                    self.category_key,
+                    collection_type,
+                    current_url=current_url,
+                    next_url=next_url,
+                    items=self.data,
+                )
+            elif page_complete:
+                self.state_store.mark_complete(
+                    self.category_key,
+                    collection_type,
+                    self.data,
+                )
+
+        if next_url is None and not page_complete:
+            print("[WARN] 无法确认已经到达最后一页，已停止并保留当前页断点。")
+            if self.state_store and self.category_key:
+                self.data = data_before_page
+            self.incomplete = True
+            return None
+
+        return next_url
 
-    def _is_last_page(self, response, items):
+    def _is_last_page(self, soup, items):
         """仅在有明确页面证据时确认分页结束。"""
-        soup = BeautifulSoup(response.text, 'html.parser')
         next_container = soup.select_one('span.next')
         if next_container is not None:
             return next_container.select_one('a') is None
@@ -165,12 +273,7 @@ class BaseCrawler:
 
     def _extract_json_ld(self, html):
         """从页面提取JSON-LD结构化数据"""
-        try:
-            pattern = r'<script type="application/ld\+json">(.*?)</script>'
-            matches = re.findall(pattern, html, re.DOTALL)
-            return [json.loads(match) for match in matches]
-        except Exception:
-            return []
+        return extract_json_ld(html)
 
     def _clean_text(self, text):
         """清理文本内容"""
@@ -0,0 +1,281 @@
+"""
+多账号批量备份
+读取账号清单（公开用户 ID 或各自的 Cookie 文件），用线程池同时备份多个账号：
+所有账号共享一个全局请求速率预算，每个账号写入自己的输出目录（断点、备份文件和运行报告互不干扰），
+全部结束后写一份批量汇总。
+
+清单格式（JSON）:
+    {
+      "accounts": [
+        {"name": "alice", "public": "alice-douban-id"},
+        {"name": "me", "cookies": "cookies/me.json", "only": "movies,books"}
+      ]
+    }
+cookies 的相对路径以清单文件所在目录为准；也可以直接写成账号数组。
+
+用法:
+    python batch.py accounts.json
+    python batch.py accounts.json --workers 3 --global-rate 2 --output data/batch
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from backup_formats import BACKUP_FORMATS, format_error
+from config import BATCH_GLOBAL_RATE, BATCH_WORKERS, CRAWL_ENGINES, DATA_DIR
+from crawl_public import run_public_backup
+from html_parsing import PARSER_BACKENDS
+from main import (
+    DoubanBackup,
+    backup_option_error,
+    count_items,
+    non_negative_delay,
+    positive_int,
+    resolve_selected_items,
+)
+from rate_limit import TokenBucket
+
+DEFAULT_OUTPUT_DIR = os.path.join(DATA_DIR, 'batch')
+ACCOUNT_NAME_PATTERN = re.compile(r'^[\w.-]+$')
+# 只适用于某一种备份模式的选项，传给另一种模式时忽略
+LOGIN_ONLY_OPTIONS = {'checkpoint_enabled', 'parallel_categories', 'engine', 'snapshots'}
+PUBLIC_ONLY_OPTIONS = {'fetch_workers'}
+
+
+def load_manifest(path):
+    """读取账号清单，返回校验后的账号列表；清单有误时抛出 ValueError。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    entries = manifest.get('accounts') if isinstance(manifest, dict) else manifest
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("账号清单为空，需要 accounts 数组。")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    accounts = []
+    names = set()
+    for index, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"第 {index} 个账号格式错误，应为对象。")
+        public_id = entry.get('public')
+        cookies_file = entry.get('cookies')
+        if bool(public_id) == bool(cookies_file):
+            raise ValueError(f"第 {index} 个账号需要且只能指定 public 或 cookies 之一。")
+        if cookies_file:
+            cookies_file = os.path.join(base_dir, cookies_file)
+            default_name = os.path.splitext(os.path.basename(cookies_file))[0]
+        else:
+            default_name = str(public_id)
+
+        name = str(entry.get('name') or default_name)
+        # 账号名直接用作输出子目录名，不允许路径分隔符
+        if not ACCOUNT_NAME_PATTERN.match(name):
+            raise ValueError(f"账号名只能包含字母、数字、下划线、点和短横线: {name}")
+        if name in names:
+            raise ValueError(f"账号名重复: {name}")
+        names.add(name)
+
+        accounts.append(
+            {
+                'name': name,
+                'mode': 'cookies' if cookies_file else 'public',
+                'user_id': str(public_id) if public_id else None,
+                'cookies_file': cookies_file,
+                'categories': resolve_selected_items(entry.get('only'), entry.get('skip')),
+            }
+        )
+    return accounts
+
+
+def backup_account(account, output_dir, request_budget=None, options=None):
+    """备份一个账号，返回该账号的汇总记录；异常只记录在汇总里，不影响其它账号。"""
+    options = dict(options or {})
+    account_dir = os.path.join(output_dir, account['name'])
+    result = {
+        'name': account['name'],
+        'mode': account['mode'],
+        'user_id': account['user_id'],
+        'ok': False,
+        'output_dir': account_dir,
+        'counts': {},
+        'duration_seconds': None,
+        'error': None,
+    }
+    started = time.perf_counter()
+    try:
+        if account['mode'] == 'public':
+            for key in LOGIN_ONLY_OPTIONS:
+                options.pop(key, None)
+            data = run_public_backup(
+                account['user_id'],
+                categories=account['categories'],
+                output_dir=account_dir,
+                request_budget=request_budget,
+                **options,
+            )
+            result['ok'] = bool(data)
+            result['counts'] = count_items(data or {})
+        else:
+            for key in PUBLIC_ONLY_OPTIONS:
+                options.pop(key, None)
+            backup = DoubanBackup(
+                selected_items=account['categories'],
+                output_dir=account_dir,
+                cookies_file=account['cookies_file'],
+                user_info_file=os.path.join(account_dir, 'user_info.json'),
+                interactive=False,
+                request_budget=request_budget,
+                **options,
+            )
+            result['ok'] = bool(backup.run())
+            result['user_id'] = backup.user_id
+            result['counts'] = backup.item_counts
+    except Exception as e:
+        print(f"[ERROR] 账号 {account['name']} 备份失败: {e}")
+        result['error'] = str(e)
+    result['duration_seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(accounts, output_dir=None, workers=BATCH_WORKERS, global_rate=BATCH_GLOBAL_RATE, options=None):
+    """并发备份清单中的账号，写出 batch_summary_<时间>.json 并返回汇总。"""
+    output_dir = output_dir or DEFAULT_OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    started_at = datetime.now().astimezone()
+    # 所有账号共享一个令牌桶，同时备份的账号越多，每个账号分到的请求越少
+    request_budget = TokenBucket(global_rate)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(accounts)))) as executor:
+        futures = [
+            executor.submit(backup_account, account, output_dir, request_budget, options)
+            for account in accounts
+        ]
+        results = [future.result() for future in futures]
+
+    summary = {
+        'started_at': started_at.isoformat(),
+        'finished_at': datetime.now().astimezone().isoformat(),
+        'workers': workers,
+        'global_rate': global_rate,
+        'ok': all(result['ok'] for result in results),
+        'accounts': results,
+    }
+    timestamp = started_at.strftime('%Y%m%d_%H%M%S')
+    summary_file = os.path.join(output_dir, f"batch_summary_{timestamp}.json")
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    summary['summary_file'] = summary_file
+    return summary
+
+
+def print_summary(summary):
+    print("\n" + "=" * 50)
+    print("批量备份汇总")
+    print("=" * 50)
+    for result in summary['accounts']:
+        counts = ', '.join(f"{category} {total}" for category, total in result['counts'].items())
+        if result['ok']:
+            print(f"[OK] {result['name']}: {counts or '无数据'} ({result['duration_seconds']} 秒)")
+        else:
+            print(f"[ERROR] {result['name']}: {result['error'] or '备份未完成'}")
+    print(f"\n汇总文件: {summary['summary_file']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="豆瓣多账号批量备份")
+    parser.add_argument("manifest", help="账号清单 JSON 文件")
+    parser.add_argument("--output", help="输出目录，每个账号一个子目录，默认 data/batch")
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=BATCH_WORKERS,
+        metavar="N",
+        help=f"同时备份的账号数，默认 {BATCH_WORKERS}",
+    )
+    parser.add_argument(
+        "--global-rate",
+        type=float,
+        default=BATCH_GLOBAL_RATE,
+        metavar="R",
+        help=f"所有账号合计每秒最多发出的请求数，默认 {BATCH_GLOBAL_RATE}；0 表示不限制",
+    )
+    parser.add_argument(
+        "--delay",
+        type=non_negative_delay,
+        metavar="SECONDS",
+        help="每个账号自身的请求间隔；默认登录备份为 2 秒，公开备份为 1 秒",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="公开备份并发抓取分页的线程数，默认 1；请求速率仍受 --delay 和 --global-rate 限制",
+    )
+    parser.add_argument("--adaptive-delay", action="store_true", help="自适应调整每个账号的请求间隔")
+    parser.add_argument("--no-resume", action="store_true", help="登录备份禁用断点续传")
+    parser.add_argument("--incremental", action="store_true", help="以各账号目录中最新的备份为基准增量备份")
+    parser.add_argument("--enrich", action="store_true", help="抓取条目详情页补全信息")
+    parser.add_argument("--http-cache", action="store_true", help="缓存页面并使用条件请求")
+    parser.add_argument("--covers", action="store_true", help="下载封面到共享的本地封面库")
+    parser.add_argument("--format", choices=BACKUP_FORMATS, default="json", help="备份文件格式，默认缩进 JSON")
+    parser.add_argument("--sqlite", action="store_true", help="同时写入各账号目录下的 SQLite 库")
+    parser.add_argument("--snapshots", action="store_true", help="登录备份使用快照模式，按条目内容去重保存历史备份")
+    parser.add_argument("--http2", action="store_true", help="使用 HTTP/2（需 pip install 'httpx[http2]'）")
+    parser.add_argument("--parser", choices=PARSER_BACKENDS, help="HTML 解析后端")
+    parser.add_argument(
+        "--engine",
+        choices=CRAWL_ENGINES,
+        help="登录备份的爬取引擎；pipeline 用进程池并行解析，多个账号共用同一个进程池",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    option_error = format_error(args.format) or backup_option_error(
+        http2=args.http2,
+        engine=args.engine,
+        http_cache=args.http_cache,
+    )
+    if option_error:
+        print(f"[ERROR] {option_error}")
+        return 1
+    try:
+        accounts = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] 无法读取账号清单: {e}")
+        return 1
+
+    summary = run_batch(
+        accounts,
+        output_dir=args.output,
+        workers=args.workers,
+        global_rate=args.global_rate or None,
+        options={
+            'request_delay': args.delay,
+            'parser_backend': args.parser,
+            'fetch_workers': args.fetch_workers,
+            'adaptive_delay': args.adaptive_delay,
+            'incremental': args.incremental,
+            'enrich': args.enrich,
+            'http_cache': args.http_cache,
+            'http2': args.http2,
+            'covers': args.covers,
+            'sqlite': args.sqlite,
+            'snapshots': args.snapshots,
+            'output_format': args.format,
+            'checkpoint_enabled': not args.no_resume,
+            'engine': args.engine,
+        },
+    )
+    print_summary(summary)
+    return 0 if summary['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,488 @@
+"""
+离线基准测试
+用合成的收藏列表页（默认每个分类 10 / 1000 / 20000 条）测量条目解析、爬取循环、
+断点写入和 JSON / Excel 导出的吞吐量（条/秒）与峰值内存，以及条目以记录和字典常驻内存时
+每条的占用，结果写成 JSON，
+便于在不同版本之间对比性能回退。全程不联网。
+
+用法:
+    python benchmark.py
+    python benchmark.py --sizes 10,1000 --output data/benchmarks/local.json
+    python benchmark.py --compare data/benchmarks/benchmark_1.53_20260101_000000.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+from backup_state import BackupState
+from base import BaseCrawler
+from books import BookCrawler
+from config import APP_VERSION, DATA_DIR
+from games import GameCrawler
+from html_parsing import PARSER_BACKENDS, is_parser_backend_available
+from item_records import records_from_dicts, to_json_default
+from movies import MovieCrawler
+from music import MusicCrawler
+from storage import DataStorage
+
+DEFAULT_SIZES = (10, 1000, 20000)
+DEFAULT_OUTPUT_DIR = os.path.join(DATA_DIR, 'benchmarks')
+BENCHMARKS = ('parse', 'crawl', 'checkpoint', 'json', 'excel', 'records')
+BENCH_USER = 'bench'
+PAGE_SIZE = BaseCrawler.PAGE_SIZE
+
+# 与 tests/fixtures 中各分类的收藏条目结构一致，只替换 ID、标题、评分和日期
+ITEM_TEMPLATES = {
+    'movies': """<div class="item">
+  <div class="pic"><a href="https://movie.douban.com/subject/{id}/"><img src="https://img.example/{id}.jpg"></a></div>
+  <div class="info">
+    <ul>
+      <li class="title"><a href="https://movie.douban.com/subject/{id}/"><em>基准电影 {index}</em></a></li>
+      <li><span class="rating{rating}-t"></span><span class="date">{date}</span></li>
+      <li><span class="comment">第 {index} 条短评</span></li>
+    </ul>
+  </div>
+</div>""",
+    'books': """<li class="subject-item">
+  <div class="pic"><a href="https://book.douban.com/subject/{id}/"><img src="https://img.example/{id}.jpg"></a></div>
+  <div class="info">
+    <h2><a href="https://book.douban.com/subject/{id}/">基准书籍 {index}</a></h2>
+    <div class="pub">作者 {index} / 出版社 / 2026</div>
+    <div class="short-note">
+      <div class="star clearfix"><span class="rating{rating}-t"></span><span class="date">{date}</span></div>
+      <span class="comment">第 {index} 条短评</span>
+    </div>
+  </div>
+</li>""",
+    'music': """<div class="item">
+  <div class="pic"><a href="https://music.douban.com/subject/{id}/"><img src="https://img.example/{id}.jpg"></a></div>
+  <div class="info">
+    <ul>
+      <li class="title"><a href="https://music.douban.com/subject/{id}/"><em>基准专辑 {index}</em></a></li>
+      <li class="intro">音乐人 {index} / 2026 / 专辑</li>
+      <li><span class="rating{rating}-t"></span><span class="date">{date}</span><span class="comment">第 {index} 条短评</span></li>
+    </ul>
+  </div>
+</div>""",
+    'games': """<div class="common-item">
+  <div class="info">
+    <div class="title"><a href="https://www.douban.com/game/{id}/">基准游戏 {index}</a></div>
+    <div class="rating-info"><span class="allstar{rating}0"></span></div>
+    <div class="desc">{date} / 游戏简介</div>
+    <span class="comment">第 {index} 条短评</span>
+  </div>
+</div>""",
+}
+
+LIST_URLS = {
+    'movies': 'https://movie.douban.com/people/{user}/collect',
+    'books': 'https://book.douban.com/people/{user}/collect',
+    'music': 'https://music.douban.com/people/{user}/collect',
+    'games': 'https://www.douban.com/people/{user}/games?action=collect',
+}
+
+CRAWLERS = {
+    'movies': MovieCrawler,
+    'books': BookCrawler,
+    'music': MusicCrawler,
+    'games': GameCrawler,
+}
+
+# 各分类的 ID 区间互不重叠，合并导出时不会出现重复条目
+ID_BASE = {'movies': 1000000, 'books': 2000000, 'music': 3000000, 'games': 4000000}
+
+
+def page_url(category, start):
+    url = LIST_URLS[category].format(user=BENCH_USER)
+    separator = '&' if '?' in url else '?'
+    return url if start == 0 else f"{url}{separator}start={start}"
+
+
+def make_item_html(category, index):
+    return ITEM_TEMPLATES[category].format(
+        id=ID_BASE[category] + index,
+        index=index,
+        rating=index % 5 + 1,
+        date=f"2026-{index % 12 + 1:02d}-{index % 28 + 1:02d}",
+    )
+
+
+def make_pages(category, size):
+    """生成 size 个条目的收藏列表页，返回 [(URL, HTML)]，每页 PAGE_SIZE 条并带“后页”链接。"""
+    pages = []
+    for start in range(0, max(size, 1), PAGE_SIZE):
+        items = '\n'.join(
+            make_item_html(category, index)
+            for index in range(start, min(start + PAGE_SIZE, size))
+        )
+        if start + PAGE_SIZE < size:
+            next_link = f'<span class="next"><a href="{page_url(category, start + PAGE_SIZE)}">后页&gt;</a></span>'
+        else:
+            next_link = '<span class="next">后页&gt;</span>'
+        html = (
+            '<html><head><title>基准测试</title></head><body>'
+            f'<div class="grid-view">\n{items}\n</div>'
+            f'<div class="paginator">{next_link}</div>'
+            '</body></html>'
+        )
+        pages.append((page_url(category, start), html))
+    return pages
+
+
+class SyntheticResponse:
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+
+
+class SyntheticSession:
+    """按 URL 返回预先生成的页面，代替真实会话。"""
+
+    def __init__(self, pages):
+        self.pages = dict(pages)
+
+    def get(self, url, **kwargs):
+        text = self.pages.get(url)
+        if text is None:
+            return SyntheticResponse(url, '', status_code=404)
+        return SyntheticResponse(url, text)
+
+
+def measure(func, track_memory=True):
+    """运行 func，返回 (结果, 耗时秒数, 峰值内存字节数)；不统计内存时峰值为 None。
+
+    tracemalloc 会明显拖慢运行，因此计时和内存分两次运行，互不干扰。
+    """
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    if not track_memory:
+        return result, seconds, None
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _result(name, size, items, seconds, peak, **labels):
+    result = {'name': name, 'size': size}
+    result.update(labels)
+    result.update({
+        'items': items,
+        'seconds': round(seconds, 6),
+        'items_per_sec': round(items / seconds, 1) if seconds > 0 else None,
+        'peak_memory_mb': None if peak is None else round(peak / 1024 / 1024, 2),
+    })
+    return result
+
+
+def bench_parse(category, size, backend, track_memory=True):
+    """对每一页分别解析文档并调用 _parse_items，与爬取时的单页处理相同。"""
+    pages = make_pages(category, size)
+    crawler = CRAWLERS[category](session=None, parser_backend=backend)
+
+    def run():
+        count = 0
+        for _, html in pages:
+            count += len(crawler._parse_items(crawler._parse_document(html), 'collect'))
+        return count
+
+    items, seconds, peak = measure(run, track_memory)
+    return _result('parse', size, items, seconds, peak, category=category, backend=backend)
+
+
+def bench_crawl(category, size, backend, track_memory=True):
+    """用 SyntheticSession 跑完整的 BaseCrawler.crawl 分页循环（无请求间隔）。"""
+    pages = make_pages(category, size)
+    session = SyntheticSession(pages)
+
+    def run():
+        crawler = CRAWLERS[category](session, request_delay=0, parser_backend=backend)
+        with redirect_stdout(StringIO()):
+            return len(crawler.crawl(pages[0][0], 'collect'))
+
+    items, seconds, peak = measure(run, track_memory)
+    return _result('crawl', size, items, seconds, peak, category=category, backend=backend)
+
+
+def bench_checkpoint(data, size, track_memory=True):
+    """按爬取时的节奏逐页写断点：每页开始和结束各写一次，最后标记完成。"""
+    workdir = tempfile.mkdtemp(prefix='douban_bench_')
+
+    def run():
+        shutil.rmtree(workdir, ignore_errors=True)
+        state = BackupState(workdir, BENCH_USER)
+        count = 0
+        for category, collections in data.items():
+            items = collections['collect']
+            for start in range(0, len(items), PAGE_SIZE):
+                url = page_url(category, start)
+                next_url = page_url(category, start + PAGE_SIZE)
+                state.update_progress(category, 'collect', url, url, items[:start])
+                state.update_progress(
+                    category, 'collect', url, next_url, items[:start + PAGE_SIZE]
+                )
+            state.mark_complete(category, 'collect', items)
+            count += len(items)
+        return count
+
+    try:
+        items, seconds, peak = measure(run, track_memory)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return _result('checkpoint', size, items, seconds, peak)
+
+
+def bench_export(name, data, size, track_memory=True):
+    workdir = tempfile.mkdtemp(prefix='douban_bench_')
+    storage = DataStorage(backup_dir=workdir, metadata={'backup_mode': 'benchmark'})
+    save = storage.save_json if name == 'json' else storage.save_excel
+    count = sum(len(items) for collections in data.values() for items in collections.values())
+
+    def run():
+        with redirect_stdout(StringIO()):
+            path = save(data, 'douban_backup_benchmark')
+        return os.path.getsize(path)
+
+    try:
+        file_size, seconds, peak = measure(run, track_memory)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result = _result(name, size, count, seconds, peak)
+    result['file_size_kb'] = round(file_size / 1024, 1)
+    return result
+
+
+def retained_memory(func):
+    """运行 func，返回 (结果, 结果仍在引用的内存字节数)。"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current - before
+
+
+def bench_records(data, size, track_memory=True):
+    """比较条目以记录和以字典常驻内存时每条的占用。
+
+    条目从 JSON 行重新解析（与读取断点、增量基准相同），字符串不与 data 共享；
+    字典为 dict(记录)，与爬虫改用记录之前逐条构造的字典大小相当。
+    """
+    lines = [
+        json.dumps(item, ensure_ascii=False, default=to_json_default)
+        for collections in data.values()
+        for items in collections.values()
+        for item in items
+    ]
+
+    def load_records():
+        return records_from_dicts(json.loads(line) for line in lines)
+
+    def load_dicts():
+        return [dict(record) for record in load_records()]
+
+    records, seconds, peak = measure(load_records, track_memory)
+    result = _result('records', size, len(records), seconds, peak)
+    if track_memory and records:
+        _, record_bytes = retained_memory(load_records)
+        _, dict_bytes = retained_memory(load_dicts)
+        result['record_bytes_per_item'] = round(record_bytes / len(records))
+        result['dict_bytes_per_item'] = round(dict_bytes / len(records))
+    return result
+
+
+def parse_all(size, backend):
+    """解析每个分类的合成页面，得到导出和断点测试使用的备份数据。"""
+    data = {}
+    for category, crawler_class in CRAWLERS.items():
+        crawler = crawler_class(session=None, parser_backend=backend)
+        items = []
+        for _, html in make_pages(category, size):
+            items.extend(crawler._parse_items(crawler._parse_document(html), 'collect'))
+        data[category] = {'collect': items}
+    return data
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, backends=None, benchmarks=BENCHMARKS, track_memory=True):
+    """依次运行所选基准，返回可直接写成 JSON 的结果。"""
+    if backends is None:
+        backends = [backend for backend in PARSER_BACKENDS if is_parser_backend_available(backend)]
+    default_backend = 'lxml' if 'lxml' in backends else backends[0]
+
+    results = []
+    for size in sizes:
+        print(f"\n[基准] 每个分类 {size} 条")
+        for category in CRAWLERS:
+            for backend in backends:
+                if 'parse' in benchmarks:
+                    results.append(bench_parse(category, size, backend, track_memory))
+                    _print_result(results[-1])
+                if 'crawl' in benchmarks:
+                    results.append(bench_crawl(category, size, backend, track_memory))
+                    _print_result(results[-1])
+
+        if not {'checkpoint', 'json', 'excel', 'records'} & set(benchmarks):
+            continue
+        data = parse_all(size, default_backend)
+        if 'checkpoint' in benchmarks:
+            results.append(bench_checkpoint(data, size, track_memory))
+            _print_result(results[-1])
+        for name in ('json', 'excel'):
+            if name in benchmarks:
+                results.append(bench_export(name, data, size, track_memory))
+                _print_result(results[-1])
+        if 'records' in benchmarks:
+            results.append(bench_records(data, size, track_memory))
+            _print_result(results[-1])
+
+    return {
+        'metadata': {
+            'app_version': APP_VERSION,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'generated_at': datetime.now().astimezone().isoformat(),
+            'sizes': list(sizes),
+            'parser_backends': list(backends),
+            'track_memory': track_memory,
+        },
+        'results': results,
+    }
+
+
+def result_key(result):
+    return (
+        result['name'],
+        result['size'],
+        result.get('category', ''),
+        result.get('backend', ''),
+    )
+
+
+def _label(result):
+    parts = [result['name']]
+    for key in ('category', 'backend'):
+        if result.get(key):
+            parts.append(result[key])
+    return '/'.join(parts)
+
+
+def _print_result(result):
+    memory = result['peak_memory_mb']
+    memory_text = '' if memory is None else f"，峰值内存 {memory} MB"
+    if 'record_bytes_per_item' in result:
+        memory_text += (
+            f"，每条 {result['record_bytes_per_item']} 字节"
+            f"（字典 {result['dict_bytes_per_item']} 字节）"
+        )
+    print(
+        f"  {_label(result):<28} {result['items']:>7} 条  {result['seconds']:.3f} 秒"
+        f"  {result['items_per_sec'] or 0:>10.1f} 条/秒{memory_text}"
+    )
+
+
+def compare_results(baseline, current):
+    """按基准名、规模、分类和解析后端配对，返回 [(结果, 吞吐量比值)]；比值小于 1 表示变慢。"""
+    previous = {result_key(result): result for result in baseline.get('results', [])}
+    comparisons = []
+    for result in current.get('results', []):
+        old = previous.get(result_key(result))
+        if not old or not old.get('items_per_sec') or not result.get('items_per_sec'):
+            continue
+        comparisons.append((result, result['items_per_sec'] / old['items_per_sec']))
+    return comparisons
+
+
+def print_comparison(baseline, current):
+    version = baseline.get('metadata', {}).get('app_version', '?')
+    print(f"\n[对比] 与 v{version} 的基准结果相比（吞吐量比值，小于 1 表示变慢）:")
+    for result, ratio in compare_results(baseline, current):
+        marker = '  [WARN] 变慢' if ratio < 0.9 else ''
+        print(f"  {_label(result):<28} {result['size']:>7} 条  x{ratio:.2f}{marker}")
+
+
+def _parse_list(value, allowed=None, convert=str):
+    values = [part.strip() for part in value.split(',') if part.strip()]
+    if allowed is not None:
+        unknown = [part for part in values if part not in allowed]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"不支持的取值: {', '.join(unknown)}")
+    try:
+        return [convert(part) for part in values]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='豆瓣备份离线基准测试')
+    parser.add_argument(
+        '--sizes',
+        type=lambda value: _parse_list(value, convert=int),
+        default=list(DEFAULT_SIZES),
+        help='每个分类的条目数，逗号分隔（默认 10,1000,20000）',
+    )
+    parser.add_argument(
+        '--backends',
+        type=lambda value: _parse_list(value, allowed=PARSER_BACKENDS),
+        help='要测试的解析后端，逗号分隔（默认测试所有已安装的后端）',
+    )
+    parser.add_argument(
+        '--only',
+        type=lambda value: _parse_list(value, allowed=BENCHMARKS),
+        default=list(BENCHMARKS),
+        help=f"只运行指定基准，逗号分隔（{','.join(BENCHMARKS)}）",
+    )
+    parser.add_argument('--no-memory', action='store_true', help='不统计峰值内存，只计时')
+    parser.add_argument('--output', help='结果 JSON 路径（默认 data/benchmarks/ 下按版本和时间命名）')
+    parser.add_argument('--compare', help='与之前保存的基准结果 JSON 对比吞吐量')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.backends:
+        unavailable = [b for b in args.backends if not is_parser_backend_available(b)]
+        if unavailable:
+            print(f"[ERROR] 未安装解析后端: {', '.join(unavailable)}")
+            return 1
+
+    report = run_benchmarks(
+        sizes=args.sizes,
+        backends=args.backends,
+        benchmarks=args.only,
+        track_memory=not args.no_memory,
+    )
+
+    output = args.output
+    if not output:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(DEFAULT_OUTPUT_DIR, f"benchmark_{APP_VERSION}_{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file_obj:
+        json.dump(report, file_obj, ensure_ascii=False, indent=2)
+    print(f"\n[OK] 基准结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file_obj:
+            print_comparison(json.load(file_obj), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@
 """
 import re
 from base import BaseCrawler
+from item_records import BookItem
 
 
 class BookCrawler(BaseCrawler):
@@ -12,12 +13,13 @@ class BookCrawler(BaseCrawler):
         'reading': '在读'
     }
 
-    def __init__(self, session, state_store=None, request_delay=None):
+    def __init__(self, session, state_store=None, request_delay=None, **crawler_options):
         super().__init__(
             session,
             category_key='books',
             state_store=state_store,
             request_delay=request_delay,
+            **crawler_options,
         )
         self.user_id = None
 
@@ -39,14 +41,10 @@ class BookCrawler(BaseCrawler):
         url = f"https://book.douban.com/people/{self.user_id}/reading?start=0&type=book"
         return self.crawl_collection(url, 'reading')
 
-    def _parse_items(self, response, collection_type=None):
+    def _parse_items(self, soup, collection_type=None):
         """解析书籍条目"""
         items = []
-        html = response.text
 
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
-        
         # Try finding items with new selector first
         list_items = soup.find_all('li', class_='subject-item')
         if not list_items:
@@ -109,17 +107,16 @@ class BookCrawler(BaseCrawler):
                 date_tag = item.find('span', class_='date')
                 if date_tag: date = date_tag.get_text(strip=True)
 
-                item_data = {
-                    'douban_id': douban_id,
-                    'cover': cover,
-                    'title': title,
-                    'author': author,
-                    'rating': rating,
-                    'comment': comment,
-                    'date': date,
-                    'type': 'book',
-                    'collection': self.COLLECTION_MAP.get(collection_type, collection_type)
-                }
+                item_data = BookItem(
+                    douban_id=douban_id,
+                    cover=cover,
+                    title=title,
+                    author=author,
+                    rating=rating,
+                    comment=comment,
+                    date=date,
+                    collection=self.COLLECTION_MAP.get(collection_type, collection_type)
+                )
                 items.append(item_data)
             except Exception as e:
                 print(f"解析出错: {e}")
@@ -127,11 +124,8 @@ class BookCrawler(BaseCrawler):
 
         return items
 
-    def _get_pagination(self, response):
+    def _get_pagination(self, soup):
         """获取下一页链接"""
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         next_link = soup.select_one('span.next a')
         if not next_link:
              next_link = soup.select_one('a.next')
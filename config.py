@@ -16,6 +16,23 @@ HEADERS = {
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 3
 DELAY_BETWEEN_REQUESTS = 2
+# HTML 解析后端: html.parser（纯 Python）或 lxml（需额外安装，速度更快）
+PARSER_BACKEND = 'html.parser'
+# 爬取引擎: sync（requests，逐页请求）、async（httpx，解析当前页时预取下一页）
+# 或 pipeline（抓取线程预取后续页面，进程池并行解析，按页码顺序合并）
+CRAWL_ENGINES = ('sync', 'async', 'pipeline')
+CRAWL_ENGINE = 'sync'
+# pipeline 引擎：解析进程数（None 为 CPU 核心数）和已抓取待解析页面的队列长度
+PARSE_WORKERS = None
+PARSE_QUEUE_SIZE = 4
+# 条目详情补全（--enrich）：详情页缓存有效期（天）和并发抓取数
+SUBJECT_CACHE_TTL_DAYS = 30
+ENRICH_WORKERS = 2
+# 封面归档（--covers）：并发下载数和所有下载线程合计每秒最多发出的请求数
+COVER_WORKERS = 4
+COVER_RATE = 4
+# verify 并发探测各分类页面的总时间预算（秒），超时未完成的分类记为 timeout
+VERIFY_TIMEOUT = 15
 
 # 数据存储目录始终相对于项目文件，而不是启动命令时的工作目录。
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -28,3 +45,7 @@ BACKUP_ITEMS = {
     'music': True,
     'games': True
 }
+
+# 批量备份（batch.py）：同时备份的账号数，以及所有账号合计每秒最多发出的请求数
+BATCH_WORKERS = 2
+BATCH_GLOBAL_RATE = 1.0
@@ -0,0 +1,198 @@
+"""
+封面归档
+把条目的封面图片下载到本地按内容寻址的存储中：文件以 SHA-256 命名，内容相同的图片只保存一份；
+index.json 记录封面链接到文件的对应关系，已下载的封面之后不再请求。
+每个条目的本地文件路径（相对备份目录）写入 cover_local 字段，豆瓣更换 CDN 路径后仍可找回封面。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from config import COVER_RATE, COVER_WORKERS, DATA_DIR, MAX_RETRIES, REQUEST_TIMEOUT
+from file_security import write_atomic
+from rate_limit import TokenBucket
+
+DEFAULT_COVER_DIR = os.path.join(DATA_DIR, 'covers')
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+RETRY_DELAY = 2
+# 图片已删除，记录下来，之后不再请求
+MISSING_STATUS_CODES = {404, 410}
+# 图床拒绝访问（防盗链或风控），继续请求只会全部失败，直接停止本次下载
+FATAL_STATUS_CODES = {403, 418, 429}
+IMAGE_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+
+
+def cover_key(url):
+    """封面在索引中的键：img1 / img2 / img3 / img9 等 doubanio 镜像主机上的同一路径视为同一张图。"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.endswith('.doubanio.com'):
+        host = 'doubanio.com'
+    return f"{host}{parts.path}"
+
+
+def _extension(url, content_type):
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if media_type in IMAGE_EXTENSIONS:
+        return IMAGE_EXTENSIONS[media_type]
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    return extension if extension in IMAGE_EXTENSIONS.values() else ''
+
+
+class CoverStore:
+    """按内容寻址的封面存储：objects/<前两位>/<sha256><扩展名>，加 index.json 索引。"""
+
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_COVER_DIR
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file_obj:
+                return json.load(file_obj)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, url):
+        """返回已归档封面的绝对路径；记录为已失效时返回 ''，未归档或文件已丢失时返回 None。"""
+        with self._lock:
+            entry = self.index.get(cover_key(url))
+        if entry is None:
+            return None
+        if entry.get('missing'):
+            return ''
+        path = os.path.join(self.root, entry['path'])
+        return path if os.path.exists(path) else None
+
+    def put(self, url, content, content_type=None):
+        """保存图片内容并登记索引，返回文件绝对路径；内容已存在时只登记索引。"""
+        digest = hashlib.sha256(content).hexdigest()
+        relative_path = os.path.join('objects', digest[:2], digest + _extension(url, content_type))
+        path = os.path.join(self.root, relative_path)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, content, 'wb')
+        self._register(url, {'sha256': digest, 'path': relative_path.replace(os.sep, '/'), 'size': len(content)})
+        return path
+
+    def mark_missing(self, url):
+        self._register(url, {'missing': True})
+
+    def _register(self, url, entry):
+        entry['fetched_at'] = time.time()
+        with self._lock:
+            self.index[cover_key(url)] = entry
+
+    def save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            write_atomic(
+                self.index_path,
+                lambda file_obj: json.dump(
+                    self.index, file_obj, ensure_ascii=False, indent=2, sort_keys=True
+                ),
+            )
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_cover_store(root=None):
+    """返回进程内共享的封面库实例；批量备份的多个账号写同一个索引，不会互相覆盖。"""
+    root = os.path.abspath(root or DEFAULT_COVER_DIR)
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = CoverStore(root)
+        return store
+
+
+class CoverArchiver:
+    """并发下载条目封面到 CoverStore，所有线程共享一个令牌桶限速。"""
+
+    def __init__(self, session, store=None, workers=COVER_WORKERS, rate=COVER_RATE, fetch_missing=True):
+        self.session = session
+        self.store = store or get_cover_store()
+        self.workers = max(1, workers)
+        self.bucket = TokenBucket(rate)
+        # 离线运行时只使用已归档的封面
+        self.fetch_missing = fetch_missing
+        self._stopped = threading.Event()
+
+    def archive(self, all_data, base_dir):
+        """原地为 {分类: {收藏状态: [条目]}} 写入 cover_local，返回 (已归档数, 新下载数, 失败数)。"""
+        pending = {}
+        for collections in all_data.values():
+            for items in collections.values():
+                for item in items:
+                    url = item.get('cover')
+                    if url and url.startswith(('http://', 'https://')):
+                        pending.setdefault(url, []).append(item)
+
+        paths = {}
+        missing = []
+        for url in pending:
+            path = self.store.lookup(url)
+            if path is None:
+                missing.append(url)
+            elif path:
+                paths[url] = path
+        stored = len(paths)
+
+        if missing and self.fetch_missing:
+            print(f"\n[封面] 需要下载 {len(missing)} 张封面（已归档 {stored} 张）...")
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    for url, path in zip(missing, executor.map(self._fetch_cover, missing)):
+                        if path:
+                            paths[url] = path
+            finally:
+                self.store.save_index()
+
+        for url, path in paths.items():
+            local_path = os.path.relpath(path, base_dir).replace(os.sep, '/')
+            for item in pending[url]:
+                item['cover_local'] = local_path
+
+        fetched = len(paths) - stored
+        failed = len(pending) - len(paths)
+        print(f"[封面] 已归档 {len(paths)} 张封面（新下载 {fetched}，已有 {stored}，失败或已失效 {failed}）")
+        return stored, fetched, failed
+
+    def _fetch_cover(self, url):
+        if self._stopped.is_set():
+            return None
+        for attempt in range(MAX_RETRIES):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+            except Exception as e:
+                if attempt == MAX_RETRIES - 1:
+                    print(f"[WARN] 封面下载失败: {url}, 错误: {e}")
+                    return None
+                continue
+
+            status_code = response.status_code
+            content_type = response.headers.get('Content-Type', '')
+            if status_code == 200 and content_type.startswith('image/'):
+                return self.store.put(url, response.content, content_type)
+            if status_code in MISSING_STATUS_CODES:
+                self.store.mark_missing(url)
+                return None
+            if status_code in FATAL_STATUS_CODES:
+                if not self._stopped.is_set():
+                    self._stopped.set()
+                    print(f"[WARN] 封面请求被拒绝（HTTP {status_code}），已停止下载，其余封面下次运行时继续。")
+                return None
+            if status_code not in RETRYABLE_STATUS_CODES or attempt == MAX_RETRIES - 1:
+                print(f"[WARN] 封面下载失败（HTTP {status_code} {content_type}）: {url}")
+                return None
+            time.sleep(RETRY_DELAY)
+        return None
@@ -0,0 +1,172 @@
+"""
+抓取存档的录制与重放
+--record 把每个原始响应（URL、状态码、响应头、正文）追加到 gzip 存档并写索引；
+--replay 用存档中的响应代替网络重跑整个备份，可用于修复解析器后重建备份和做可复现的基准测试。
+
+存档目录结构：
+    meta.json       存档信息（格式版本、账号、创建时间）
+    responses.gz    每条响应一个独立的 gzip 成员，首行为 JSON 头，其后为正文
+    index.jsonl     每条响应一行：URL、在 responses.gz 中的偏移和长度、状态码
+"""
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+
+from config import APP_VERSION
+from http_cache import CachedResponse
+
+ARCHIVE_FORMAT = 1
+META_FILE = 'meta.json'
+RESPONSES_FILE = 'responses.gz'
+INDEX_FILE = 'index.jsonl'
+# 只保留与解析和诊断相关的响应头
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Retry-After', 'Location')
+
+
+class ArchiveWriter:
+    def __init__(self, directory, user_id=None):
+        self.directory = directory
+        self.responses_path = os.path.join(directory, RESPONSES_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.index_path):
+            raise FileExistsError(f"录制目录中已有存档，请换一个目录: {directory}")
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            'format': ARCHIVE_FORMAT,
+            'app_version': APP_VERSION,
+            'user_id': user_id,
+            'created_at': datetime.now().astimezone().isoformat(),
+        }
+        with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as file_obj:
+            json.dump(meta, file_obj, ensure_ascii=False, indent=2)
+        # 先建好空文件，没有抓到任何页面的存档也能正常重放
+        open(self.responses_path, 'wb').close()
+        open(self.index_path, 'w', encoding='utf-8').close()
+
+    def record(self, url, response):
+        headers = getattr(response, 'headers', None) or {}
+        header = {
+            'url': url,
+            'final_url': getattr(response, 'url', url) or url,
+            'status_code': response.status_code,
+            'headers': {
+                name: headers[name] for name in RECORDED_HEADERS if headers.get(name)
+            },
+        }
+        body = (response.text or '').encode('utf-8')
+        member = gzip.compress(
+            json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n' + body
+        )
+
+        # 并发抓取时多个线程共用一个存档，偏移和索引必须串行写入
+        with self._lock:
+            with open(self.responses_path, 'ab') as file_obj:
+                offset = file_obj.tell()
+                file_obj.write(member)
+            entry = {
+                'url': url,
+                'offset': offset,
+                'length': len(member),
+                'status_code': response.status_code,
+            }
+            with open(self.index_path, 'a', encoding='utf-8') as file_obj:
+                file_obj.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class ArchiveReader:
+    def __init__(self, directory):
+        self.directory = directory
+        self.responses_path = os.path.join(directory, RESPONSES_FILE)
+        index_path = os.path.join(directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"目录中没有抓取存档: {directory}")
+
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as file_obj:
+            self.meta = json.load(file_obj)
+
+        self.entries = {}
+        with open(index_path, 'r', encoding='utf-8') as file_obj:
+            for line in file_obj:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 录制被中断时最后一行可能不完整
+                    break
+                self.entries.setdefault(entry['url'], []).append(entry)
+        self._served = {}
+        self._lock = threading.Lock()
+
+    @property
+    def user_id(self):
+        return self.meta.get('user_id')
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries.values())
+
+    def urls(self):
+        return list(self.entries)
+
+    def response(self, url):
+        """按录制顺序返回该 URL 的下一条响应（重试过程也能原样重现），用完后重复最后一条。"""
+        entries = self.entries.get(url)
+        if not entries:
+            return None
+        with self._lock:
+            served = self._served.get(url, 0)
+            self._served[url] = served + 1
+        entry = entries[min(served, len(entries) - 1)]
+        return self.read(entry)
+
+    def read(self, entry):
+        with open(self.responses_path, 'rb') as file_obj:
+            file_obj.seek(entry['offset'])
+            member = file_obj.read(entry['length'])
+        header_line, _, body = gzip.decompress(member).partition(b'\n')
+        header = json.loads(header_line)
+        return CachedResponse(
+            header['final_url'],
+            header['status_code'],
+            body.decode('utf-8'),
+            header.get('headers'),
+        )
+
+
+class RecordingSession:
+    """包装真实会话，把每个 get 响应写入存档后原样返回。"""
+
+    def __init__(self, session, writer):
+        self.session = session
+        self.writer = writer
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def get(self, url, **kwargs):
+        response = self.session.get(url, **kwargs)
+        self.writer.record(url, response)
+        return response
+
+
+class ReplaySession:
+    """用存档代替网络的会话；存档中没有的 URL 返回 404。"""
+
+    def __init__(self, reader, session=None):
+        self.reader = reader
+        # 请求头、Cookie 等属性仍由原会话提供，但不会经它发出任何请求
+        self.session = session
+
+    def __getattr__(self, name):
+        if self.session is None:
+            raise AttributeError(name)
+        return getattr(self.session, name)
+
+    def get(self, url, **kwargs):
+        response = self.reader.response(url)
+        if response is None:
+            print(f"[重放] 存档中没有该页面: {url}")
+            return CachedResponse(url, 404, '', from_cache=False)
+        return response
@@ -2,38 +2,51 @@
 豆瓣数据备份工具 - 针对特定用户
 无需登录，爬取公开数据
 """
-import json
 import os
 import re
 import time
 import sys
 import argparse
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import Workbook
 from datetime import datetime
+from urllib.parse import urlsplit
 from backup_metadata import build_metadata, merge_metadata, metadata_rows
-from diagnostics import classify_response
+from diagnostics import RETRYABLE_RESPONSE_CODES, classify_response
 from excel_safety import sanitize_excel_value
+from html_parsing import make_soup
+from config import COVER_WORKERS, ENRICH_WORKERS, MAX_RETRIES
+from crawl_archive import ArchiveReader, ArchiveWriter, RecordingSession, ReplaySession
+from covers import CoverArchiver
+from enrich import DetailEnricher
+from http_cache import CachedSession, HttpCache
+from incremental import KnownItems
+from backup_formats import BACKUP_FORMATS, format_error, save_backup
+from json_stream import BackupJsonWriter
+from metrics import NULL_METRICS, MeteredSession, RunMetrics, report_path
+from rate_limit import AdaptiveRateLimiter, BudgetedSession, HostThrottle, TokenBucket
+from sqlite_store import SQLITE_FILENAME, SqliteStore
+from transport import create_session
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 BASE_URL = 'https://www.douban.com'
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-}
 
-USER_ID = None  # 由命令行参数或交互输入设置
-SESSION = requests.Session()
-SESSION.headers.update(HEADERS)
+# 直接调用抓取函数且未传入会话时使用的默认会话；run_public_backup 每次运行创建自己的会话，
+# 账号、输出目录等也都作为参数传递，同一进程内可以同时运行多个公开备份
+SESSION = create_session()
 
 DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'backup')
-OUTPUT_DIR = DEFAULT_OUTPUT_DIR
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 DEFAULT_CATEGORIES = ['movies', 'books', 'music', 'games']
 DEFAULT_REQUEST_DELAY = 1
+PAGE_SIZE = 15
+# 各分类列表页所在主机，用作指标的分类标签
+PAGE_CATEGORIES = {
+    'movie.douban.com': 'movies',
+    'book.douban.com': 'books',
+    'music.douban.com': 'music',
+    'www.douban.com': 'games',
+}
 
 
 def get_comment(item):
@@ -42,60 +55,262 @@ def get_comment(item):
     return comment_tag.get_text(' ', strip=True) if comment_tag else ''
 
 
-def crawl_movies(request_delay=DEFAULT_REQUEST_DELAY):
-    """爬取电影数据"""
-    print("\n[电影] 爬取电影数据...")
-    all_movies = {'wish': [], 'collect': [], 'do': []}
+def find_movie_items(soup):
+    return soup.find_all('div', class_='item')
 
-    collections = [
-        ('collect', '已看'),
-        ('do', '在看'),
-        ('wish', '想看')
-    ]
 
-    for coll_type, coll_name in collections:
-        print(f"\n  爬取 {coll_name} 的电影...")
-        url = f"https://movie.douban.com/people/{USER_ID}/{coll_type}"
-        page = 0
-        total = 0
+def find_book_items(soup):
+    items = soup.find_all('li', class_='subject-item')
+    if not items:
+        items = soup.find_all('div', class_='item') # old style/fallback
+    if not items:
+        items = soup.find_all('li', class_='item') # another variant
+    return items
 
-        while True:
-            page_url = f"{url}?start={page * 15}&sort=time"
-            try:
-                response = SESSION.get(page_url, timeout=30)
-                status, _, message = classify_response(response)
-                if status != 'ok':
-                    print(f"    [WARN] {message}")
-                    break
 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                items = soup.find_all('div', class_='item')
+def find_music_items(soup):
+    return soup.select('div.item')
 
-                if not items:
-                    break
 
-                for item in items:
-                    try:
-                        movie = parse_movie_item(item)
-                        if movie:
-                            all_movies[coll_type].append(movie)
-                            total += 1
-                    except Exception as e:
-                        continue
+def find_game_items(soup):
+    return soup.select('div.common-item')
 
-                print(f"    第{page + 1}页: 获取 {len(items)} 条")
 
-                if len(items) < 15:
-                    break
+def read_page_count(soup):
+    """从第一页读取总页数；页面没有给出总数时返回 None。"""
+    subject_num = soup.select_one('.subject-num')
+    if subject_num:
+        match = re.search(r'/\s*(\d+)', subject_num.get_text(' ', strip=True))
+        if match:
+            return max(1, -(-int(match.group(1)) // PAGE_SIZE))
+
+    this_page = soup.select_one('.paginator .thispage[data-total-page]')
+    if this_page and this_page['data-total-page'].isdigit():
+        return int(this_page['data-total-page'])
+    return None
+
+
+def fetch_page(
+    page_url,
+    find_items,
+    parse_item,
+    parser_backend=None,
+    limiter=None,
+    session=None,
+    metrics=None,
+):
+    """抓取并解析一页，返回 (文档树, 页面条目数, 解析结果)。
+
+    传入限速器时由它控制请求节奏，触发风控或服务端错误的页面会在退避后重试。
+    """
+    metrics = metrics or NULL_METRICS
+    attempts = MAX_RETRIES if limiter is not None else 1
+    for attempt in range(attempts):
+        if limiter is not None:
+            limiter.wait(page_url)
+        response = (session or SESSION).get(page_url, timeout=30)
+        if limiter is not None:
+            limiter.record(page_url, response)
+        status, code, message = classify_response(response)
+        if status == 'ok':
+            break
+        if code not in RETRYABLE_RESPONSE_CODES or attempt == attempts - 1:
+            print(f"    [WARN] {message}")
+            return None, 0, []
+        print(f"    [WARN] {message} 即将重试（{attempt + 1}/{attempts}）")
+
+    category = PAGE_CATEGORIES.get(urlsplit(page_url).netloc)
+    with metrics.timer('parse_seconds', category=category):
+        soup = make_soup(response.text, parser_backend)
+        items = find_items(soup)
+        parsed = []
+        for item in items:
+            try:
+                result = parse_item(item)
+                if result:
+                    parsed.append(result)
+            except Exception:
+                continue
+    metrics.inc('pages_total', category=category)
+    metrics.inc('items_total', len(parsed), category=category)
+    return soup, len(items), parsed
+
+
+def crawl_collection_pages(
+    page_url,
+    find_items,
+    parse_item,
+    request_delay=DEFAULT_REQUEST_DELAY,
+    parser_backend=None,
+    fetch_workers=1,
+    limiter=None,
+    known=None,
+    session=None,
+    metrics=None,
+):
+    """按 start 偏移逐页抓取一个收藏列表。
+
+    fetch_workers 大于 1 时先从第一页读出总页数，其余偏移交给有界线程池并发抓取，
+    所有请求共享一个令牌桶；结果按页码顺序拼回，遇到失败页则只保留其之前的页。
+    传入 limiter（如 AdaptiveRateLimiter）时改由它控制全部请求的节奏。
+    传入 known（上次备份的 KnownCollection）时，翻到整页已知条目即停止并合并上次的数据。
+    """
+    collected = []
+    page = 0
+
+    while True:
+        try:
+            soup, count, parsed = fetch_page(
+                page_url(page * PAGE_SIZE),
+                find_items,
+                parse_item,
+                parser_backend,
+                limiter=limiter,
+                session=session,
+                metrics=metrics,
+            )
+        except Exception as e:
+            print(f"    错误: {e}")
+            break
+
+        if not count:
+            break
+        collected.extend(parsed)
+        print(f"    第{page + 1}页: 获取 {count} 条")
+
+        if known is not None and known.page_is_known(parsed):
+            return _merge_known(collected, known)
+        if count < PAGE_SIZE:
+            break
+
+        page += 1
+        if page == 1 and fetch_workers > 1:
+            page_count = read_page_count(soup)
+            if page_count is not None:
+                remaining, reached_known = _fetch_remaining_pages(
+                    page_url,
+                    page_count,
+                    find_items,
+                    parse_item,
+                    request_delay,
+                    parser_backend,
+                    fetch_workers,
+                    limiter,
+                    known,
+                    session,
+                    metrics,
+                )
+                collected.extend(remaining)
+                if reached_known:
+                    return _merge_known(collected, known)
+                break
+        if limiter is None:
+            time.sleep(request_delay)
+
+    return collected
+
+
+def _merge_known(collected, known):
+    print("    本页条目与上次备份一致，停止翻页并沿用上次备份的其余条目。")
+    return known.merge(collected)
+
+
+def _fetch_remaining_pages(
+    page_url,
+    page_count,
+    find_items,
+    parse_item,
+    request_delay,
+    parser_backend,
+    fetch_workers,
+    limiter=None,
+    known=None,
+    session=None,
+    metrics=None,
+):
+    """并发抓取第 2 页起的各页，返回 (按页码拼回的条目, 是否停在整页已知的页)。"""
+    bucket = None
+    if limiter is None:
+        bucket = TokenBucket(rate=1 / request_delay if request_delay else None)
+        # 桶初始是满的，先记上第一页的请求，第二页起与上一次请求间隔 request_delay
+        bucket.acquire()
+
+    def fetch(page):
+        if bucket is not None:
+            bucket.acquire()
+        return fetch_page(
+            page_url(page * PAGE_SIZE),
+            find_items,
+            parse_item,
+            parser_backend,
+            limiter=limiter,
+            session=session,
+            metrics=metrics,
+        )
 
-                page += 1
-                time.sleep(request_delay)
+    pages = range(1, page_count)
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        futures = {page: executor.submit(fetch, page) for page in pages}
 
+        collected = []
+        reached_known = False
+        for page in pages:
+            try:
+                _, count, parsed = futures[page].result()
             except Exception as e:
                 print(f"    错误: {e}")
+                count = 0
+            if not count:
+                break
+            collected.extend(parsed)
+            print(f"    第{page + 1}页: 获取 {count} 条")
+            if known is not None and known.page_is_known(parsed):
+                reached_known = True
                 break
+            if count < PAGE_SIZE:
+                break
+
+        for future in futures.values():
+            future.cancel()
+    return collected, reached_known
+
+
+def crawl_movies(
+    user_id,
+    request_delay=DEFAULT_REQUEST_DELAY,
+    parser_backend=None,
+    fetch_workers=1,
+    limiter=None,
+    known_items=None,
+    session=None,
+    metrics=None,
+):
+    """爬取电影数据"""
+    print("\n[电影] 爬取电影数据...")
+    all_movies = {'wish': [], 'collect': [], 'do': []}
 
-        print(f"  {coll_name}: {total} 部")
+    collections = [
+        ('collect', '已看'),
+        ('do', '在看'),
+        ('wish', '想看')
+    ]
+
+    for coll_type, coll_name in collections:
+        print(f"\n  爬取 {coll_name} 的电影...")
+        url = f"https://movie.douban.com/people/{user_id}/{coll_type}"
+        all_movies[coll_type] = crawl_collection_pages(
+            lambda start: f"{url}?start={start}&sort=time",
+            find_movie_items,
+            parse_movie_item,
+            request_delay=request_delay,
+            parser_backend=parser_backend,
+            fetch_workers=fetch_workers,
+            limiter=limiter,
+            known=known_items.collection('movies', coll_type) if known_items is not None else None,
+            session=session,
+            metrics=metrics,
+        )
+        print(f"  {coll_name}: {len(all_movies[coll_type])} 部")
 
     return all_movies
 
@@ -155,7 +370,16 @@ def parse_movie_item(item):
         return None
 
 
-def crawl_books(request_delay=DEFAULT_REQUEST_DELAY):
+def crawl_books(
+    user_id,
+    request_delay=DEFAULT_REQUEST_DELAY,
+    parser_backend=None,
+    fetch_workers=1,
+    limiter=None,
+    known_items=None,
+    session=None,
+    metrics=None,
+):
     """爬取书籍数据"""
     print("\n[书籍] 爬取书籍数据...")
     all_books = {'wish': [], 'collect': [], 'reading': []}
@@ -168,53 +392,20 @@ def crawl_books(request_delay=DEFAULT_REQUEST_DELAY):
 
     for coll_type, coll_name in collections:
         print(f"\n  爬取 {coll_name} 的书籍...")
-        url = f"https://book.douban.com/people/{USER_ID}/{coll_type}"
-        page = 0
-        total = 0
-
-        while True:
-            page_url = f"{url}?start={page * 15}"
-            try:
-                response = SESSION.get(page_url, timeout=30)
-                status, _, message = classify_response(response)
-                if status != 'ok':
-                    print(f"    [WARN] {message}")
-                    break
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-                items = soup.find_all('li', class_='subject-item')
-
-                if not items:
-                    items = soup.find_all('div', class_='item') # old style/fallback
-                
-                if not items:
-                    items = soup.find_all('li', class_='item') # another variant
-
-                if not items:
-                    break
-
-                for item in items:
-                    try:
-                        book = parse_book_item(item)
-                        if book:
-                            all_books[coll_type].append(book)
-                            total += 1
-                    except Exception:
-                        continue
-
-                print(f"    第{page + 1}页: 获取 {len(items)} 条")
-
-                if len(items) < 15:
-                    break
-
-                page += 1
-                time.sleep(request_delay)
-
-            except Exception as e:
-                print(f"    错误: {e}")
-                break
-
-        print(f"  {coll_name}: {total} 本")
+        url = f"https://book.douban.com/people/{user_id}/{coll_type}"
+        all_books[coll_type] = crawl_collection_pages(
+            lambda start: f"{url}?start={start}",
+            find_book_items,
+            parse_book_item,
+            request_delay=request_delay,
+            parser_backend=parser_backend,
+            fetch_workers=fetch_workers,
+            limiter=limiter,
+            known=known_items.collection('books', coll_type) if known_items is not None else None,
+            session=session,
+            metrics=metrics,
+        )
+        print(f"  {coll_name}: {len(all_books[coll_type])} 本")
 
     return all_books
 
@@ -288,7 +479,16 @@ def parse_book_item(item):
         return None
 
 
-def crawl_music(request_delay=DEFAULT_REQUEST_DELAY):
+def crawl_music(
+    user_id,
+    request_delay=DEFAULT_REQUEST_DELAY,
+    parser_backend=None,
+    fetch_workers=1,
+    limiter=None,
+    known_items=None,
+    session=None,
+    metrics=None,
+):
     """爬取音乐数据"""
     print("\n[音乐] 爬取音乐数据...")
     all_music = {'wish': [], 'collect': [], 'do': []}
@@ -301,47 +501,20 @@ def crawl_music(request_delay=DEFAULT_REQUEST_DELAY):
 
     for coll_type, coll_name in collections:
         print(f"\n  爬取 {coll_name} 的音乐...")
-        url = f"https://music.douban.com/people/{USER_ID}/{coll_type}"
-        page = 0
-        total = 0
-
-        while True:
-            page_url = f"{url}?start={page * 15}&sort=time"
-            try:
-                response = SESSION.get(page_url, timeout=30)
-                status, _, message = classify_response(response)
-                if status != 'ok':
-                    print(f"    [WARN] {message}")
-                    break
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-                items = soup.select('div.item')
-                
-                if not items:
-                    break
-
-                for item in items:
-                    try:
-                        music = parse_music_item(item)
-                        if music:
-                            all_music[coll_type].append(music)
-                            total += 1
-                    except Exception:
-                        continue
-
-                print(f"    第{page + 1}页: 获取 {len(items)} 条")
-
-                if len(items) < 15:
-                    break
-
-                page += 1
-                time.sleep(request_delay)
-
-            except Exception as e:
-                print(f"    错误: {e}")
-                break
-
-        print(f"  {coll_name}: {total} 张")
+        url = f"https://music.douban.com/people/{user_id}/{coll_type}"
+        all_music[coll_type] = crawl_collection_pages(
+            lambda start: f"{url}?start={start}&sort=time",
+            find_music_items,
+            parse_music_item,
+            request_delay=request_delay,
+            parser_backend=parser_backend,
+            fetch_workers=fetch_workers,
+            limiter=limiter,
+            known=known_items.collection('music', coll_type) if known_items is not None else None,
+            session=session,
+            metrics=metrics,
+        )
+        print(f"  {coll_name}: {len(all_music[coll_type])} 张")
 
     return all_music
 
@@ -397,7 +570,16 @@ def parse_music_item(item):
         return None
 
 
-def crawl_games(request_delay=DEFAULT_REQUEST_DELAY):
+def crawl_games(
+    user_id,
+    request_delay=DEFAULT_REQUEST_DELAY,
+    parser_backend=None,
+    fetch_workers=1,
+    limiter=None,
+    known_items=None,
+    session=None,
+    metrics=None,
+):
     """爬取游戏数据"""
     print("\n[游戏] 爬取游戏数据...")
     all_games = {'wish': [], 'collect': [], 'do': []}
@@ -410,47 +592,20 @@ def crawl_games(request_delay=DEFAULT_REQUEST_DELAY):
 
     for coll_type, coll_name in collections:
         print(f"\n  爬取 {coll_name} 的游戏...")
-        url = f"https://www.douban.com/people/{USER_ID}/games" 
-        page = 0
-        total = 0
-
-        while True:
-            page_url = f"{url}?action={coll_type}&start={page * 15}"
-            try:
-                response = SESSION.get(page_url, timeout=30)
-                status, _, message = classify_response(response)
-                if status != 'ok':
-                    print(f"    [WARN] {message}")
-                    break
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-                items = soup.select('div.common-item')
-                
-                if not items:
-                    break
-
-                for item in items:
-                    try:
-                        game = parse_game_item(item)
-                        if game:
-                            all_games[coll_type].append(game)
-                            total += 1
-                    except Exception:
-                        continue
-
-                print(f"    第{page + 1}页: 获取 {len(items)} 条")
-
-                if len(items) < 15:
-                    break
-
-                page += 1
-                time.sleep(request_delay)
-
-            except Exception as e:
-                print(f"    错误: {e}")
-                break
-
-        print(f"  {coll_name}: {total} 个")
+        url = f"https://www.douban.com/people/{user_id}/games"
+        all_games[coll_type] = crawl_collection_pages(
+            lambda start: f"{url}?action={coll_type}&start={start}",
+            find_game_items,
+            parse_game_item,
+            request_delay=request_delay,
+            parser_backend=parser_backend,
+            fetch_workers=fetch_workers,
+            limiter=limiter,
+            known=known_items.collection('games', coll_type) if known_items is not None else None,
+            session=session,
+            metrics=metrics,
+        )
+        print(f"  {coll_name}: {len(all_games[coll_type])} 个")
 
     return all_games
 
@@ -508,22 +663,40 @@ def parse_game_item(item):
         return None
 
 
-def save_json(data, filename, metadata=None):
-    """保存JSON文件"""
-    filepath = os.path.join(OUTPUT_DIR, f"{filename}.json")
-    payload = {
-        'metadata': merge_metadata(metadata),
-        'data': data,
-    }
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+def save_json(data, filename, metadata=None, output_dir=DEFAULT_OUTPUT_DIR, output_format='json'):
+    """保存备份文件，格式见 backup_formats（默认缩进 JSON）"""
+    filepath = save_backup(
+        os.path.join(output_dir, filename), data, merge_metadata(metadata), output_format
+    )
     print(f"\n[OK] 已保存: {filepath}")
     return filepath
 
 
-def save_excel(data, filename, metadata=None):
+def save_combined_json(
+    category_files,
+    filename,
+    metadata=None,
+    output_dir=DEFAULT_OUTPUT_DIR,
+    output_format='json',
+    data=None,
+):
+    """拼出完整备份。
+
+    缩进 JSON 直接用各分类已保存的文件逐行拼接，不再重新序列化全部数据；
+    其它格式的分类文件无法逐行拼接，改为用内存中的 data 写出。
+    """
+    if output_format != 'json':
+        return save_json(data, filename, metadata, output_dir, output_format)
+    filepath = os.path.join(output_dir, f"{filename}.json")
+    with BackupJsonWriter(filepath, merge_metadata(metadata)) as writer:
+        writer.write_data_from_files(category_files)
+    print(f"\n[OK] 已保存: {filepath}")
+    return filepath
+
+
+def save_excel(data, filename, metadata=None, output_dir=DEFAULT_OUTPUT_DIR):
     """保存Excel文件"""
-    filepath = os.path.join(OUTPUT_DIR, f"{filename}.xlsx")
+    filepath = os.path.join(output_dir, f"{filename}.xlsx")
     wb = Workbook()
     ws = wb.active
     ws.title = '数据'
@@ -566,32 +739,125 @@ def save_excel(data, filename, metadata=None):
     return filepath
 
 
-def run_public_backup(user_id, categories=None, output_dir=None, request_delay=None):
-    global USER_ID, OUTPUT_DIR
-
-    USER_ID = user_id
-    OUTPUT_DIR = output_dir or DEFAULT_OUTPUT_DIR
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+def run_public_backup(
+    user_id,
+    categories=None,
+    output_dir=None,
+    request_delay=None,
+    parser_backend=None,
+    fetch_workers=1,
+    adaptive_delay=False,
+    incremental=False,
+    enrich=False,
+    http_cache=False,
+    offline=False,
+    record_dir=None,
+    replay_dir=None,
+    metrics_textfile=None,
+    http2=False,
+    request_budget=None,
+    covers=False,
+    sqlite=False,
+    output_format='json',
+):
+    """备份一个用户的公开数据，返回 {分类: {收藏状态: [条目]}}。
+
+    所有运行状态（账号、输出目录、会话）都是本次调用的局部变量；
+    request_budget 为多个备份共享的 TokenBucket，用于限制总请求速率。
+    """
+    output_dir = output_dir or DEFAULT_OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
 
     categories = list(categories or DEFAULT_CATEGORIES)
     request_delay = (
         DEFAULT_REQUEST_DELAY if request_delay is None else request_delay
     )
+    unavailable_format = format_error(output_format)
+    if unavailable_format:
+        print(f"[ERROR] {unavailable_format}")
+        return {}
+    # 同一主机上最多同时进行的请求数：并发分页线程、详情补全线程或封面下载线程
+    concurrency = max(
+        fetch_workers,
+        ENRICH_WORKERS if enrich else 1,
+        COVER_WORKERS if covers else 1,
+    )
+    try:
+        base_session = create_session(concurrency, http2=http2)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        return {}
+    metrics = RunMetrics()
+    # 指标包装在最内层，只统计真正发出的网络请求
+    session = MeteredSession(base_session, metrics)
+    if request_budget is not None:
+        # 共享预算在缓存之内：缓存命中不占用请求配额
+        session = BudgetedSession(session, request_budget)
+    if replay_dir:
+        try:
+            session = ReplaySession(ArchiveReader(replay_dir), base_session)
+        except FileNotFoundError as e:
+            print(f"[ERROR] {e}")
+            return {}
+    elif http_cache or offline:
+        # 公开页面不带登录态，所有公开备份共用匿名缓存
+        session = CachedSession(session, HttpCache(), offline=offline)
+    if record_dir:
+        try:
+            session = RecordingSession(session, ArchiveWriter(record_dir, user_id=user_id))
+        except FileExistsError as e:
+            print(f"[ERROR] {e}")
+            return {}
+    if offline or replay_dir:
+        request_delay = 0
+    limiter = AdaptiveRateLimiter(request_delay) if adaptive_delay else None
     metadata = build_metadata(
         backup_mode='public',
         selected_categories=categories,
         user_id=user_id,
-        output_dir=OUTPUT_DIR,
+        output_dir=output_dir,
     )
 
     print("=" * 50)
     print("[豆瓣数据备份工具 - 公开数据]")
     print("=" * 50)
-    print(f"\n用户: {USER_ID}")
+    print(f"\n用户: {user_id}")
     print(f"时间: {metadata['generated_at']}")
 
+    enricher = None
+    if enrich:
+        enricher = DetailEnricher(
+            session,
+            limiter or HostThrottle(request_delay),
+            fetch_missing=not offline and replay_dir is None,
+        )
+
+    cover_archiver = None
+    if covers:
+        # 图片不经过页面缓存和存档，直接用底层会话下载
+        cover_session = base_session
+        if request_budget is not None:
+            cover_session = BudgetedSession(cover_session, request_budget)
+        cover_archiver = CoverArchiver(
+            cover_session,
+            fetch_missing=not offline and replay_dir is None,
+        )
+
+    known_items = None
+    if incremental:
+        known_items = KnownItems.from_backup(
+            output_dir,
+            user_id=user_id,
+            backup_mode='public',
+        )
+
+    sqlite_store = None
+    if sqlite:
+        sqlite_store = SqliteStore(os.path.join(output_dir, SQLITE_FILENAME))
+
     timestamp = datetime.now().astimezone().strftime('%Y%m%d_%H%M%S')
     all_data = {}
+    category_files = []
 
     crawlers = {
         'movies': crawl_movies,
@@ -602,21 +868,62 @@ def run_public_backup(user_id, categories=None, output_dir=None, request_delay=N
 
     try:
         for category in categories:
-            category_data = crawlers[category](request_delay=request_delay)
+            with metrics.phase('crawl', category=category):
+                category_data = crawlers[category](
+                    user_id,
+                    request_delay=request_delay,
+                    parser_backend=parser_backend,
+                    fetch_workers=fetch_workers,
+                    limiter=limiter,
+                    known_items=known_items,
+                    session=session,
+                    metrics=metrics,
+                )
+            if known_items is not None:
+                known_items.drop_moved({category: category_data})
+            if enricher is not None:
+                with metrics.phase('enrich', category=category):
+                    enricher.enrich({category: category_data})
+            if cover_archiver is not None:
+                with metrics.phase('covers', category=category):
+                    cover_archiver.archive({category: category_data}, output_dir)
             all_data[category] = category_data
-            save_json(
-                category_data,
-                f"{category}_{timestamp}",
-                metadata=build_metadata(
-                    backup_mode='public',
-                    selected_categories=[category],
-                    user_id=user_id,
-                    output_dir=OUTPUT_DIR,
-                ),
-            )
-
-        save_json(all_data, f"douban_backup_{timestamp}", metadata=metadata)
-        save_excel(all_data, f"douban_backup_{timestamp}", metadata=metadata)
+            with metrics.timer('export_seconds', format=output_format):
+                category_path = save_json(
+                    category_data,
+                    f"{category}_{timestamp}",
+                    metadata=build_metadata(
+                        backup_mode='public',
+                        selected_categories=[category],
+                        user_id=user_id,
+                        output_dir=output_dir,
+                    ),
+                    output_dir=output_dir,
+                    output_format=output_format,
+                )
+            category_files.append((category, category_path))
+            if sqlite_store is not None:
+                # 公开页面抓取失败时只保留已抓到的页，无法确认收藏列表完整，只更新不删除
+                with metrics.timer('export_seconds', format='sqlite'):
+                    sqlite_store.sync({category: category_data}, prune=False)
+
+        with metrics.phase('export'):
+            with metrics.timer('export_seconds', format=output_format):
+                save_combined_json(
+                    category_files,
+                    f"douban_backup_{timestamp}",
+                    metadata=metadata,
+                    output_dir=output_dir,
+                    output_format=output_format,
+                    data=all_data,
+                )
+            with metrics.timer('export_seconds', format='excel'):
+                save_excel(
+                    all_data,
+                    f"douban_backup_{timestamp}",
+                    metadata=metadata,
+                    output_dir=output_dir,
+                )
 
         print("\n" + "=" * 50)
         print("[备份统计]")
@@ -636,14 +943,39 @@ def run_public_backup(user_id, categories=None, output_dir=None, request_delay=N
                 'games': '个',
             }[category]
             print(f"  {label}: {total} {unit}")
-        print(f"\n文件保存在: {OUTPUT_DIR}")
+        print(f"\n文件保存在: {output_dir}")
         return all_data
     except KeyboardInterrupt:
         print("\n\n用户中断，保存已获取的数据...")
         if all_data:
-            save_json(all_data, f"douban_backup_interrupted_{timestamp}", metadata=metadata)
-            save_excel(all_data, f"douban_backup_interrupted_{timestamp}", metadata=metadata)
+            save_json(
+                all_data,
+                f"douban_backup_interrupted_{timestamp}",
+                metadata=metadata,
+                output_dir=output_dir,
+                output_format=output_format,
+            )
+            save_excel(
+                all_data,
+                f"douban_backup_interrupted_{timestamp}",
+                metadata=metadata,
+                output_dir=output_dir,
+            )
         return all_data
+    finally:
+        if sqlite_store is not None:
+            sqlite_store.close()
+        write_run_report(metrics, output_dir, timestamp, metadata, metrics_textfile)
+
+
+def write_run_report(metrics, output_dir, timestamp, metadata, metrics_textfile=None):
+    """在输出目录写出运行报告；指定了 metrics_textfile 时同时输出 Prometheus 指标。"""
+    try:
+        metrics.save_report(report_path(output_dir, timestamp), metadata)
+        if metrics_textfile:
+            metrics.write_prometheus(metrics_textfile)
+    except OSError as e:
+        print(f"[WARN] 运行报告写入失败: {e}")
 
 
 def non_negative_delay(raw_value):
@@ -656,6 +988,16 @@ def non_negative_delay(raw_value):
     return delay
 
 
+def positive_int(raw_value):
+    try:
+        value = int(raw_value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError("并发数必须是整数。") from error
+    if value < 1:
+        raise argparse.ArgumentTypeError("并发数不能小于 1。")
+    return value
+
+
 def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="豆瓣公开数据备份工具")
     parser.add_argument("user_id", nargs="?", help="豆瓣用户 ID")
@@ -665,6 +1007,75 @@ def parse_args(argv=None):
         metavar="SECONDS",
         help="每次请求之间等待的秒数，默认 1 秒",
     )
+    parser.add_argument(
+        "--fetch-workers",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="并发抓取分页的线程数，默认 1；大于 1 时按总页数并发抓取，请求速率仍受 --delay 限制",
+    )
+    parser.add_argument(
+        "--adaptive-delay",
+        action="store_true",
+        help="以 --delay 为起点自适应调整请求间隔：响应正常时加快，触发风控时指数退避",
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="抓取每个条目的详情页补全类型、导演、作者、ISBN、豆瓣评分等信息（结果缓存在 data/cache）",
+    )
+    parser.add_argument(
+        "--http-cache",
+        action="store_true",
+        help="缓存抓到的页面，之后带条件请求，未变化的页面直接读本地",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="离线模式：不联网，只用 --http-cache 缓存的页面重跑解析",
+    )
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument(
+        "--record",
+        metavar="DIR",
+        help="把每个原始响应录制到 DIR 下的 gzip 存档",
+    )
+    archive_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="不联网，用 --record 录制的存档重跑整个备份",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量备份：翻到整页都与上次备份一致的条目即停止，其余沿用上次备份",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        help="备份结束后把运行指标写成 Prometheus textfile（供 node_exporter 采集）",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="使用 HTTP/2（需 pip install 'httpx[http2]'），每个豆瓣主机复用一条多路复用连接",
+    )
+    parser.add_argument(
+        "--covers",
+        action="store_true",
+        help="下载条目封面到本地封面库（data/covers，按内容去重），备份中写入 cover_local 本地路径",
+    )
+    parser.add_argument(
+        "--format",
+        choices=BACKUP_FORMATS,
+        default="json",
+        help="备份文件格式：json（缩进，默认）、compact、gzip、zstd（需 zstandard）、ndjson、msgpack（需 msgpack）",
+    )
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help=f"同时写入输出目录下的 SQLite 库（{SQLITE_FILENAME}），按分类、收藏状态和豆瓣 ID 更新",
+    )
     return parser.parse_args(argv)
 
 
@@ -673,17 +1084,32 @@ def main(argv=None):
     user_id = args.user_id
 
     if not user_id:
-        USER_ID = input("请输入豆瓣用户ID: ").strip()
-        if not USER_ID:
+        user_id = input("请输入豆瓣用户ID: ").strip()
+        if not user_id:
             print("用户ID不能为空!")
             print("用法: python crawl_public.py <用户ID> [--delay 秒数]")
             return
-        user_id = USER_ID
 
     print("=" * 50)
     print("[豆瓣数据备份工具]")
     print("=" * 50)
-    run_public_backup(user_id, request_delay=args.delay)
+    run_public_backup(
+        user_id,
+        request_delay=args.delay,
+        fetch_workers=args.fetch_workers,
+        adaptive_delay=args.adaptive_delay,
+        incremental=args.incremental,
+        enrich=args.enrich,
+        http_cache=args.http_cache,
+        offline=args.offline,
+        record_dir=args.record,
+        replay_dir=args.replay,
+        metrics_textfile=args.metrics_textfile,
+        http2=args.http2,
+        covers=args.covers,
+        sqlite=args.sqlite,
+        output_format=args.format,
+    )
 
 
 if __name__ == '__main__':
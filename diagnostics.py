@@ -1,3 +1,7 @@
+# classify_response 返回的这些错误码值得重试，所有爬虫、详情补全和指标统计共用
+RETRYABLE_RESPONSE_CODES = frozenset({"rate_limited", "server_error"})
+
+
 def classify_response(response):
     if response is None:
         return "error", "request_failed", "请求失败，请稍后重试。"
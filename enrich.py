@@ -0,0 +1,216 @@
+"""
+条目详情补全
+逐个抓取条目详情页，把其中的 JSON-LD（类型、导演、作者、ISBN、片长、豆瓣评分等）
+写入条目的 detail 字段；详情页结果按条目缓存到磁盘，有效期内不再重复请求。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    DATA_DIR,
+    ENRICH_WORKERS,
+    MAX_RETRIES,
+    REQUEST_TIMEOUT,
+    SUBJECT_CACHE_TTL_DAYS,
+)
+from diagnostics import RETRYABLE_RESPONSE_CODES, classify_response
+from file_security import write_atomic
+from html_parsing import extract_json_ld
+
+DEFAULT_CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'subjects')
+# 这些情况继续请求只会加重风控或全部失败，直接结束补全
+FATAL_RESPONSE_CODES = {"rate_limited", "login_expired"}
+
+SUBJECT_URLS = {
+    'movie': 'https://movie.douban.com/subject/{}/',
+    'book': 'https://book.douban.com/subject/{}/',
+    'music': 'https://music.douban.com/subject/{}/',
+    'game': 'https://www.douban.com/game/{}/',
+}
+
+
+def subject_type(category, item):
+    return item.get('type') or category.rstrip('s')
+
+
+def _names(value):
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [
+        person.get('name', '').strip()
+        for person in value
+        if isinstance(person, dict) and person.get('name')
+    ]
+
+
+def summarize_json_ld(documents):
+    """从 JSON-LD 文档中挑出备份需要的字段。"""
+    detail = {}
+    for document in documents:
+        if isinstance(document, list):
+            detail.update(summarize_json_ld(document))
+            continue
+        if not isinstance(document, dict):
+            continue
+
+        if document.get('@type'):
+            detail['schema_type'] = document['@type']
+        genre = document.get('genre')
+        if genre:
+            detail['genres'] = genre if isinstance(genre, list) else [genre]
+        for key, field in (
+            ('director', 'directors'),
+            ('author', 'authors'),
+            ('actor', 'actors'),
+            ('byArtist', 'artists'),
+        ):
+            names = _names(document.get(key))
+            if names:
+                detail[field] = names
+        for key, field in (
+            ('isbn', 'isbn'),
+            ('duration', 'duration'),
+            ('datePublished', 'date_published'),
+        ):
+            if document.get(key):
+                detail[field] = document[key]
+        rating = document.get('aggregateRating')
+        if isinstance(rating, dict) and rating.get('ratingValue'):
+            detail['community_rating'] = rating['ratingValue']
+            if rating.get('ratingCount'):
+                detail['community_rating_count'] = rating['ratingCount']
+    return detail
+
+
+class SubjectCache:
+    """按 (类型, douban_id) 内容寻址的详情页缓存，每个条目一个 JSON 文件。"""
+
+    def __init__(self, cache_dir=None, ttl_days=SUBJECT_CACHE_TTL_DAYS):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.ttl = ttl_days * 24 * 3600
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, subject_type, douban_id):
+        key = hashlib.sha256(f"{subject_type}:{douban_id}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, subject_type, douban_id):
+        """返回缓存的 JSON-LD 文档列表；不存在或已过期时返回 None。"""
+        path = self._path(subject_type, douban_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as file_obj:
+                entry = json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('fetched_at', 0) > self.ttl:
+            return None
+        return entry.get('json_ld')
+
+    def put(self, subject_type, douban_id, json_ld):
+        path = self._path(subject_type, douban_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'type': subject_type,
+            'douban_id': douban_id,
+            'fetched_at': time.time(),
+            'json_ld': json_ld,
+        }
+        write_atomic(path, lambda file_obj: json.dump(entry, file_obj, ensure_ascii=False))
+
+
+class DetailEnricher:
+    """抓取条目详情页并补全到备份数据中。
+
+    所有请求都经过 throttle（HostThrottle 或 AdaptiveRateLimiter）限速，
+    并发数由 workers 限制；缓存命中的条目不发请求。
+    """
+
+    def __init__(self, session, throttle, cache=None, workers=ENRICH_WORKERS, fetch_missing=True):
+        self.session = session
+        self.throttle = throttle
+        self.cache = cache or SubjectCache()
+        self.workers = max(1, workers)
+        # 离线运行时只使用缓存，不抓取缓存中没有的条目
+        self.fetch_missing = fetch_missing
+        self._stopped = threading.Event()
+
+    def enrich(self, all_data):
+        """原地补全 {分类: {收藏状态: [条目]}}，返回 (缓存命中数, 新抓取数, 失败数)。"""
+        pending = {}
+        for category, collections in all_data.items():
+            for items in collections.values():
+                for item in items:
+                    douban_id = item.get('douban_id')
+                    if douban_id:
+                        key = (subject_type(category, item), douban_id)
+                        pending.setdefault(key, []).append(item)
+
+        results = {}
+        missing = []
+        for key in pending:
+            json_ld = self.cache.get(*key)
+            if json_ld is None:
+                missing.append(key)
+            else:
+                results[key] = json_ld
+        cached = len(results)
+
+        if missing and self.fetch_missing:
+            print(f"\n[详情] 需要抓取 {len(missing)} 个条目详情页（缓存命中 {cached} 个）...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for key, json_ld in zip(missing, executor.map(self._fetch_subject, missing)):
+                    if json_ld is not None:
+                        results[key] = json_ld
+
+        for key, json_ld in results.items():
+            detail = summarize_json_ld(json_ld)
+            for item in pending[key]:
+                item['detail'] = detail
+
+        fetched = len(results) - cached
+        failed = len(pending) - len(results)
+        print(f"[详情] 已补全 {len(results)} 个条目（新抓取 {fetched}，缓存 {cached}，失败 {failed}）")
+        return cached, fetched, failed
+
+    def _fetch_subject(self, key):
+        if self._stopped.is_set():
+            return None
+        kind, douban_id = key
+        url = SUBJECT_URLS.get(kind, SUBJECT_URLS['movie']).format(douban_id)
+
+        for attempt in range(MAX_RETRIES):
+            self.throttle.wait(url)
+            try:
+                response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+            except Exception as e:
+                if attempt == MAX_RETRIES - 1:
+                    print(f"[WARN] 详情页请求失败: {url}, 错误: {e}")
+                    return None
+                continue
+            self.throttle.record(url, response)
+
+            status, code, message = classify_response(response)
+            if status == 'ok':
+                json_ld = extract_json_ld(response.text)
+                self.cache.put(kind, douban_id, json_ld)
+                return json_ld
+            if code == 'not_found':
+                # 条目已删除或无权访问，同样缓存，过期前不再请求
+                self.cache.put(kind, douban_id, [])
+                return []
+            if code not in RETRYABLE_RESPONSE_CODES or attempt == MAX_RETRIES - 1:
+                if code in FATAL_RESPONSE_CODES and not self._stopped.is_set():
+                    self._stopped.set()
+                    print(f"[WARN] {message} 已停止补全详情，其余条目下次运行时继续。")
+                else:
+                    print(f"[WARN] {message} {url}")
+                return None
+            if self.throttle.retry_delay:
+                time.sleep(self.throttle.retry_delay)
+        return None
@@ -1,6 +1,7 @@
 import getpass
 import os
 import subprocess
+import threading
 
 
 def restrict_file_permissions(path):
@@ -25,3 +26,28 @@ def restrict_file_permissions(path):
         return True
     except (OSError, subprocess.SubprocessError):
         return False
+
+
+def write_atomic(path, data, mode="w", fsync=False):
+    """先写同目录下的临时文件再替换为 path，读取方不会看到写了一半的文件。
+
+    data 为要写入的 str / bytes，或接收文件对象、自行分块写出的函数；mode 为 "w" 或 "wb"。
+    临时文件名带进程号和线程号，多个线程同时写同一路径互不干扰；写入失败时删除临时文件。
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    encoding = None if "b" in mode else "utf-8"
+    try:
+        with open(temp_path, mode, encoding=encoding) as file_obj:
+            if callable(data):
+                data(file_obj)
+            else:
+                file_obj.write(data)
+            if fsync:
+                file_obj.flush()
+                os.fsync(file_obj.fileno())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return path
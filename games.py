@@ -3,7 +3,7 @@
 """
 import re
 from base import BaseCrawler
-from bs4 import BeautifulSoup
+from item_records import GameItem
 
 class GameCrawler(BaseCrawler):
     COLLECTION_MAP = {
@@ -12,12 +12,13 @@ class GameCrawler(BaseCrawler):
         'do': '在玩'
     }
 
-    def __init__(self, session, state_store=None, request_delay=None):
+    def __init__(self, session, state_store=None, request_delay=None, **crawler_options):
         super().__init__(
             session,
             category_key='games',
             state_store=state_store,
             request_delay=request_delay,
+            **crawler_options,
         )
         self.user_id = None
 
@@ -33,9 +34,8 @@ class GameCrawler(BaseCrawler):
             'do': self.crawl_collection(f"{base}?action=do", 'do')
         }
 
-    def _parse_items(self, response, collection_type=None):
+    def _parse_items(self, soup, collection_type=None):
         items = []
-        soup = BeautifulSoup(response.text, 'html.parser')
         div_items = soup.select('div.common-item')
         
         for item in div_items:
@@ -74,25 +74,23 @@ class GameCrawler(BaseCrawler):
                 comment_tag = item.select_one('.comment')
                 comment = comment_tag.get_text(' ', strip=True) if comment_tag else ''
 
-                items.append({
-                    'douban_id': douban_id,
-                    'title': title,
-                    'cover': cover,
-                    'rating': rating,
-                    'date': date,
-                    'info': desc,
-                    'comment': comment,
-                    'type': 'game',
-                    'collection': self.COLLECTION_MAP.get(collection_type, collection_type)
-                })
+                items.append(GameItem(
+                    douban_id=douban_id,
+                    title=title,
+                    cover=cover,
+                    rating=rating,
+                    date=date,
+                    info=desc,
+                    comment=comment,
+                    collection=self.COLLECTION_MAP.get(collection_type, collection_type)
+                ))
             except Exception as e:
                 print(f"Error parsing game: {e}")
                 continue
         
         return items
 
-    def _get_pagination(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+    def _get_pagination(self, soup):
         next_link = soup.select_one('span.next a')
         if next_link:
             href = next_link['href']
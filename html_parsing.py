@@ -0,0 +1,57 @@
+"""
+HTML 解析后端选择
+登录模式和公开模式的解析函数都通过这里创建文档树
+"""
+import importlib.util
+import json
+import re
+
+from bs4 import BeautifulSoup
+
+from config import PARSER_BACKEND
+
+# html.parser 为纯 Python 实现；lxml 为 C 实现，需要额外安装 lxml。
+PARSER_BACKENDS = ('html.parser', 'lxml')
+FALLBACK_PARSER_BACKEND = 'html.parser'
+
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.DOTALL | re.IGNORECASE,
+)
+
+_warned_backends = set()
+
+
+def is_parser_backend_available(backend):
+    if backend == 'lxml':
+        return importlib.util.find_spec('lxml') is not None
+    return backend in PARSER_BACKENDS
+
+
+def resolve_parser_backend(backend=None):
+    """返回实际使用的解析后端；所选后端未安装时回退到 html.parser。"""
+    backend = backend or PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"不支持的解析后端: {backend}")
+    if is_parser_backend_available(backend):
+        return backend
+    if backend not in _warned_backends:
+        _warned_backends.add(backend)
+        print(f"[WARN] 未安装 {backend}，已回退到 {FALLBACK_PARSER_BACKEND} 解析器。")
+    return FALLBACK_PARSER_BACKEND
+
+
+def make_soup(html, backend=None):
+    return BeautifulSoup(html or '', resolve_parser_backend(backend))
+
+
+def extract_json_ld(html):
+    """提取页面中的 JSON-LD 结构化数据，返回解析成功的文档列表。"""
+    documents = []
+    for match in JSON_LD_PATTERN.findall(html or ''):
+        try:
+            # 豆瓣的简介字段里常带未转义的换行，需要放宽控制字符检查
+            documents.append(json.loads(match, strict=False))
+        except ValueError:
+            continue
+    return documents
@@ -0,0 +1,120 @@
+"""
+HTTP 响应缓存
+按 (账号, URL) 把成功响应的正文和 ETag / Last-Modified 存到本地，
+之后的请求带上 If-None-Match / If-Modified-Since，服务器返回 304 时直接使用本地正文；
+离线模式只读缓存、完全不联网，便于用上次抓到的页面重跑解析。
+"""
+import hashlib
+import json
+import os
+import time
+
+from config import DATA_DIR
+from diagnostics import classify_response
+from file_security import write_atomic
+
+DEFAULT_HTTP_CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'http')
+ANONYMOUS_USER = 'anonymous'
+
+
+class CachedResponse:
+    """由缓存条目还原的响应，字段与 requests.Response 中爬虫用到的部分一致。"""
+
+    def __init__(self, url, status_code, text, headers=None, from_cache=True):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = dict(headers or {})
+        self.from_cache = from_cache
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+
+class HttpCache:
+    def __init__(self, cache_dir=None, user_key=None):
+        self.cache_dir = cache_dir or DEFAULT_HTTP_CACHE_DIR
+        self.user_key = str(user_key or ANONYMOUS_USER)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(f"{self.user_key}\n{url}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def load(self, url):
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as file_obj:
+                return json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url, response):
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        headers = getattr(response, 'headers', None) or {}
+        entry = {
+            'url': url,
+            'final_url': getattr(response, 'url', url) or url,
+            'status_code': response.status_code,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type'),
+            'stored_at': time.time(),
+            'body': response.text,
+        }
+        write_atomic(path, lambda file_obj: json.dump(entry, file_obj, ensure_ascii=False))
+
+    @staticmethod
+    def to_response(entry):
+        headers = {}
+        if entry.get('content_type'):
+            headers['Content-Type'] = entry['content_type']
+        return CachedResponse(
+            entry.get('final_url') or entry['url'],
+            entry.get('status_code', 200),
+            entry.get('body', ''),
+            headers,
+        )
+
+
+class CachedSession:
+    """包装 requests.Session：get 请求经过 HttpCache，其余属性和方法原样转发。"""
+
+    def __init__(self, session, cache, offline=False):
+        self.session = session
+        self.cache = cache
+        self.offline = offline
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def get(self, url, **kwargs):
+        entry = self.cache.load(url)
+
+        if self.offline:
+            if entry is None:
+                print(f"[离线] 缓存中没有该页面: {url}")
+                return CachedResponse(url, 404, '', from_cache=False)
+            return self.cache.to_response(entry)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.session.get(url, headers=headers or None, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            return self.cache.to_response(entry)
+
+        status, _, _ = classify_response(response)
+        if status == 'ok':
+            # 风控页、登录跳转等异常页面不进缓存，避免离线重放时当成正常数据
+            self.cache.store(url, response)
+        return response
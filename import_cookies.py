@@ -5,9 +5,8 @@ Import Cookies for Douban Backup
 import json
 import os
 from config import DATA_DIR
-import requests
-from config import HEADERS
 from file_security import restrict_file_permissions
+from transport import create_session
 
 def parse_cookies(cookie_str):
     """解析Cookie字符串为字典"""
@@ -33,8 +32,7 @@ def save_cookies(cookies):
 def verify_cookies(cookies):
     """验证Cookies是否有效"""
     print("正在验证 Cookies...")
-    session = requests.Session()
-    session.headers.update(HEADERS)
+    session = create_session()
     session.cookies.update(cookies)
     
     try:
@@ -0,0 +1,138 @@
+"""
+增量备份
+收藏列表按标记时间倒序排列：翻到整页都是上次备份中已有且未变化的条目时即可停止，
+其余条目直接沿用上一次的备份。
+"""
+import os
+import re
+
+from backup_formats import BACKUP_EXTENSIONS, load_backup
+from item_records import record_from_dict
+from snapshots import SNAPSHOT_DIRNAME, SnapshotRepository
+
+# 只以完整结束的备份为基准，中断时保存的 douban_backup_interrupted_* 不参与比较
+BACKUP_FILE_PATTERN = re.compile(
+    r'^douban_backup_\d{8}_\d{6}(' + '|'.join(re.escape(ext) for ext in BACKUP_EXTENSIONS) + r')$'
+)
+
+
+def find_latest_backup(backup_dir, user_id=None, backup_mode=None):
+    """返回目录中最新一份属于该账号和备份模式的完整备份内容，没有时返回 None。"""
+    if not os.path.isdir(backup_dir):
+        return None
+
+    # 快照模式的备份只有快照清单，与备份文件按同样的时间命名一起比较
+    snapshots = SnapshotRepository(os.path.join(backup_dir, SNAPSHOT_DIRNAME))
+    candidates = [
+        (name, os.path.join(backup_dir, name), False)
+        for name in os.listdir(backup_dir)
+        if BACKUP_FILE_PATTERN.match(name)
+    ]
+    candidates.extend(
+        (f"{name}.json", snapshots.manifest_path(name), True)
+        for name in snapshots.list_snapshots()
+        if BACKUP_FILE_PATTERN.match(f"{name}.json")
+    )
+    for name, path, is_snapshot in sorted(candidates, reverse=True):
+        try:
+            if is_snapshot:
+                payload = snapshots.load(name[:-len('.json')])
+            else:
+                payload = load_backup(path)
+        except (OSError, ValueError, RuntimeError):
+            # 损坏的文件，或需要未安装的可选依赖才能读取的格式
+            continue
+
+        metadata = payload.get('metadata') or {}
+        if user_id and metadata.get('user_id') not in (None, user_id):
+            continue
+        if backup_mode and metadata.get('backup_mode') not in (None, backup_mode):
+            continue
+        print(f"[增量] 以上次备份为基准: {path}")
+        return payload
+    return None
+
+
+class KnownCollection:
+    """上次备份中一个收藏列表的条目，按 douban_id 索引并保持原有顺序。"""
+
+    def __init__(self, items):
+        self.items = {}
+        for item in items or []:
+            douban_id = item.get('douban_id')
+            if douban_id:
+                # 沿用的条目会合并进本次备份，转成记录与新抓到的条目保持同一形式
+                self.items.setdefault(douban_id, record_from_dict(item))
+
+    def __contains__(self, douban_id):
+        return douban_id in self.items
+
+    def page_is_known(self, items):
+        """整页条目都在上次备份中且内容未变时返回 True。
+
+        上次备份的条目可能带有列表页之外的字段（如 --enrich 补全的 detail），
+        只比较本次从列表页解析出的字段。
+        """
+        return bool(items) and all(
+            item.get('douban_id') and self._unchanged(item)
+            for item in items
+        )
+
+    def _unchanged(self, item):
+        known = self.items.get(item['douban_id'])
+        return known is not None and all(
+            known.get(key) == value for key, value in item.items()
+        )
+
+    def merge(self, items):
+        """在本次抓到的条目之后补上上次备份中没有重新抓到的条目。"""
+        seen = {item.get('douban_id') for item in items}
+        return list(items) + [
+            item for douban_id, item in self.items.items() if douban_id not in seen
+        ]
+
+
+class KnownItems:
+    """上次备份中各分类、各收藏状态的已知条目。"""
+
+    def __init__(self, data):
+        self.collections = {}
+        for category, collections in (data or {}).items():
+            if not isinstance(collections, dict):
+                continue
+            for collection, items in collections.items():
+                if isinstance(items, list):
+                    self.collections[(category, collection)] = KnownCollection(items)
+
+    @classmethod
+    def from_backup(cls, backup_dir, user_id=None, backup_mode=None):
+        payload = find_latest_backup(backup_dir, user_id=user_id, backup_mode=backup_mode)
+        if payload is None:
+            print("[增量] 没有找到可用的上次备份，将完整备份。")
+            return None
+        return cls(payload.get('data'))
+
+    def collection(self, category, collection):
+        return self.collections.get((category, collection)) or KnownCollection([])
+
+    def drop_moved(self, all_data):
+        """条目在两次备份之间换了收藏状态（如想看 → 看过）时，去掉沿用下来的旧状态。"""
+        for category, collections in all_data.items():
+            new_ids = set()
+            for collection, items in collections.items():
+                known = self.collection(category, collection)
+                new_ids.update(
+                    item.get('douban_id')
+                    for item in items
+                    if item.get('douban_id') and item.get('douban_id') not in known
+                )
+            if not new_ids:
+                continue
+            for collection, items in collections.items():
+                known = self.collection(category, collection)
+                collections[collection] = [
+                    item
+                    for item in items
+                    if not (item.get('douban_id') in new_ids and item.get('douban_id') in known)
+                ]
+        return all_data
@@ -0,0 +1,159 @@
+"""
+收藏条目记录
+每个分类一种带 __slots__ 的条目类型，代替每条目一个字典：评分存为小整数，
+收藏状态等重复字符串做驻留，大批量条目常驻内存（爬虫数据、断点状态、增量基准）时每条比字典
+少约四分之一（字符串本身占大头），可用 python benchmark.py --only records 测量。
+
+记录实现映射接口，item['title'] / item.get('rating') / dict(item) 得到的仍是原来的 JSON 结构，
+解析、导出和比较代码无需区分记录和字典；序列化时用 to_json_default 作为 json 的 default。
+"""
+import sys
+from collections.abc import Mapping
+
+
+_RATING_VALUES = {str(star): star for star in range(1, 6)}
+
+
+def _pack_rating(value):
+    """'1'~'5' 存为整数，空字符串存为 0（未评分）；其它值（包括 '0'）原样保留。"""
+    if value == '':
+        return 0
+    if isinstance(value, str) and value in _RATING_VALUES:
+        return _RATING_VALUES[value]
+    return value
+
+
+def _unpack_rating(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value) if value else ''
+    return value
+
+
+class ItemRecord(Mapping):
+    """条目记录基类。FIELDS 为输出顺序；未出现的字段不占用值，也不会出现在 to_dict() 中。"""
+
+    __slots__ = (
+        'douban_id', 'cover', 'title', 'rating', 'comment', 'collection', 'detail', 'cover_local',
+        'extra',
+    )
+    TYPE = None
+    FIELDS = ()
+    _field_set = frozenset()
+
+    def __init__(self, **fields):
+        # 列表页之外的字段（如以后新增的字段）放在 extra 中，保证与字典互转不丢数据
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.TYPE
+        if key in self._field_set:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            return _unpack_rating(value) if key == 'rating' else value
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'type':
+            if value != self.TYPE:
+                raise ValueError(f"{type(self).__name__} 的 type 只能是 {self.TYPE}")
+        elif key in self._field_set:
+            if key == 'rating':
+                value = _pack_rating(value)
+            elif key == 'collection' and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if key == 'type' or hasattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS) - {'type'}
+
+
+class MovieItem(ItemRecord):
+    __slots__ = ('date', 'tags')
+    TYPE = 'movie'
+    FIELDS = (
+        'douban_id', 'cover', 'title', 'rating', 'date', 'comment', 'tags',
+        'type', 'collection', 'detail', 'cover_local',
+    )
+
+
+class BookItem(ItemRecord):
+    __slots__ = ('author', 'date')
+    TYPE = 'book'
+    FIELDS = (
+        'douban_id', 'cover', 'title', 'author', 'rating', 'comment', 'date',
+        'type', 'collection', 'detail', 'cover_local',
+    )
+
+
+class MusicItem(ItemRecord):
+    __slots__ = ('artist', 'info')
+    TYPE = 'music'
+    FIELDS = (
+        'douban_id', 'title', 'artist', 'cover', 'rating', 'info', 'comment',
+        'type', 'collection', 'detail', 'cover_local',
+    )
+
+
+class GameItem(ItemRecord):
+    __slots__ = ('date', 'info')
+    TYPE = 'game'
+    FIELDS = (
+        'douban_id', 'title', 'cover', 'rating', 'date', 'info', 'comment',
+        'type', 'collection', 'detail', 'cover_local',
+    )
+
+
+RECORD_TYPES = {record.TYPE: record for record in (MovieItem, BookItem, MusicItem, GameItem)}
+
+
+def record_from_dict(data):
+    """按 type 字段把字典转为对应的条目记录；已是记录或类型未知时原样返回。"""
+    if isinstance(data, ItemRecord) or not isinstance(data, dict):
+        return data
+    record_type = RECORD_TYPES.get(data.get('type'))
+    if record_type is None:
+        return data
+    return record_type.from_dict(data)
+
+
+def records_from_dicts(items):
+    return [record_from_dict(item) for item in items or []]
+
+
+def to_json_default(value):
+    """json.dump(s) 的 default 参数：把条目记录序列化为原来的字典结构。"""
+    if isinstance(value, ItemRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,250 @@
+"""
+流式读写备份 JSON
+逐条序列化条目并写入临时文件，完成后原子替换为正式文件；
+输出与 json.dump(payload, ensure_ascii=False, indent=2) 逐字节一致。
+读取时按同样的缩进格式逐行解析，一次只在内存中保留一个条目。
+"""
+import json
+import os
+
+from item_records import to_json_default
+
+INDENT = '  '
+
+
+def _dumps(value, depth):
+    """序列化单个值，并把续行缩进到所在层级。"""
+    text = json.dumps(value, ensure_ascii=False, indent=len(INDENT), default=to_json_default)
+    # JSON 字符串内的换行都已转义，按行加缩进是安全的
+    return text.replace('\n', '\n' + INDENT * depth)
+
+
+class BackupJsonWriter:
+    """以 {"metadata": ..., "data": ...} 结构流式写出备份文件。
+
+    用法::
+
+        with BackupJsonWriter(path, metadata) as writer:
+            writer.write_data(data)
+
+    正常退出时才把临时文件替换为 path；写入过程中出错或被中断时删除临时文件，
+    已有的同名文件保持不变。
+    """
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.metadata = metadata
+        self._file = None
+        self._data_written = False
+
+    def __enter__(self):
+        self._file = open(self.temp_path, 'w', encoding='utf-8')
+        self._file.write('{\n' + INDENT + '"metadata": ' + _dumps(self.metadata, 1))
+        self._file.write(',\n' + INDENT + '"data": ')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if not self._data_written:
+                    self._file.write('null')
+                self._file.write('\n}')
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        return False
+
+    def write_data(self, data):
+        """写出 data 字段；字典逐个键、列表逐个元素写入，不生成整份 JSON 字符串。"""
+        self._write_value(data, 1)
+        self._data_written = True
+
+    def write_data_from_files(self, sources):
+        """用已保存的备份文件拼出 data 字段。
+
+        sources 为 (键, 文件路径) 列表，每个文件的 data 字段原样逐行复制为对应键的值，
+        不经过反序列化和再次序列化，内存占用与单行长度相当。
+        """
+        if not sources:
+            self._file.write('{}')
+            self._data_written = True
+            return
+
+        self._file.write('{')
+        for index, (key, source_path) in enumerate(sources):
+            self._file.write(',\n' if index else '\n')
+            self._file.write(INDENT * 2 + json.dumps(key, ensure_ascii=False) + ': ')
+            _copy_data_section(source_path, self._file, INDENT)
+        self._file.write('\n' + INDENT + '}')
+        self._data_written = True
+
+    def _write_value(self, value, depth):
+        write = self._file.write
+        if isinstance(value, dict) and value:
+            write('{')
+            for index, (key, item) in enumerate(value.items()):
+                write(',\n' if index else '\n')
+                write(INDENT * (depth + 1) + json.dumps(str(key), ensure_ascii=False) + ': ')
+                self._write_value(item, depth + 1)
+            write('\n' + INDENT * depth + '}')
+        elif isinstance(value, (list, tuple)) and value:
+            write('[')
+            for index, item in enumerate(value):
+                write(',\n' if index else '\n')
+                write(INDENT * (depth + 1) + _dumps(item, depth + 1))
+            write('\n' + INDENT * depth + ']')
+        else:
+            write(_dumps(value, depth))
+
+
+def _copy_data_section(source_path, target, extra_indent):
+    """把备份文件中 data 字段的值逐行复制到 target，续行额外缩进 extra_indent。"""
+    marker = INDENT + '"data": '
+    with open(source_path, 'r', encoding='utf-8') as source:
+        for line in source:
+            if line.startswith(marker):
+                target.write(line[len(marker):].rstrip('\n'))
+                break
+        else:
+            raise ValueError(f"备份文件中没有 data 字段: {source_path}")
+
+        # data 是最后一个字段，其后只剩结束的 "}" 行
+        pending = None
+        for line in source:
+            if pending is not None:
+                target.write('\n' + extra_indent + pending)
+            pending = line.rstrip('\n')
+        if pending != '}':
+            raise ValueError(f"备份文件格式不完整: {source_path}")
+
+
+def save_backup_json(path, data, metadata):
+    with BackupJsonWriter(path, metadata) as writer:
+        writer.write_data(data)
+    return path
+
+
+class BackupJsonReader:
+    """逐条读取 BackupJsonWriter（或 json.dump(indent=2)）写出的备份文件。
+
+    用法::
+
+        with BackupJsonReader(path) as reader:
+            reader.metadata
+            for keys, item in reader.iter_items():
+                ...
+
+    keys 为条目所在列表的键路径，完整备份为 (分类, 收藏状态)，单分类备份为 (收藏状态,)。
+    文件不是这种缩进格式（如手工编辑过）时退回整体 json.load。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.metadata = {}
+        self._file = None
+        self._data_line = None
+        self._payload = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'r', encoding='utf-8')
+        if not self._read_header():
+            self._file.seek(0)
+            payload = json.load(self._file)
+            if isinstance(payload, dict) and 'data' in payload:
+                self.metadata = payload.get('metadata') or {}
+                self._payload = payload['data']
+            else:
+                # 没有 metadata 包装的旧备份，整个文件就是 data
+                self.metadata = {}
+                self._payload = payload
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        return False
+
+    def _read_header(self):
+        """读取 metadata 并停在 data 字段所在行；格式不符时返回 False。"""
+        if self._file.readline().rstrip('\n') != '{':
+            return False
+        line = self._file.readline().rstrip('\n')
+        marker = INDENT + '"metadata": '
+        if not line.startswith(marker):
+            return False
+        lines = [line[len(marker):]]
+        if not lines[0].endswith(','):
+            for line in self._file:
+                line = line.rstrip('\n')
+                lines.append(line)
+                if line == INDENT + '},':
+                    break
+            else:
+                return False
+        data_line = self._file.readline().rstrip('\n')
+        data_marker = INDENT + '"data": '
+        if not data_line.startswith(data_marker):
+            return False
+        try:
+            self.metadata = json.loads('\n'.join(lines)[:-1]) or {}
+        except ValueError:
+            return False
+        self._data_line = data_line[len(data_marker):]
+        return True
+
+    def iter_items(self):
+        if self._payload is not None:
+            yield from _walk_items(self._payload, ())
+            return
+
+        if self._data_line not in ('{', '['):
+            # data 为空容器或 null，没有条目
+            return
+        decoder = json.JSONDecoder()
+        keys = []
+        item_lines = None
+        item_end = None
+        for line in self._file:
+            if item_lines is not None:
+                # 条目内部的行缩进更深，同一缩进的 "}" 就是条目结束
+                if line.startswith(item_end):
+                    item_lines.append('}')
+                    yield tuple(keys), json.loads(''.join(item_lines))
+                    item_lines = None
+                else:
+                    item_lines.append(line)
+                continue
+
+            line = line.rstrip('\n')
+            text = line.lstrip(' ')
+            if text.rstrip(',') in ('}', ']'):
+                if not keys:
+                    # data 容器结束，其后只剩文件末尾的 "}"
+                    return
+                keys.pop()
+            elif text.startswith('"'):
+                key, end = decoder.raw_decode(text)
+                value = text[end + 2:]
+                if value in ('{', '['):
+                    keys.append(key)
+            elif text == '{':
+                item_lines = ['{']
+                item_end = line[:len(line) - len(text)] + '}'
+            elif text.startswith('{'):
+                # 写在一行里的条目（如空对象）
+                yield tuple(keys), json.loads(text.rstrip(','))
+
+
+def _walk_items(value, keys):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from _walk_items(child, keys + (key,))
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                yield keys, item
@@ -6,23 +6,54 @@ import getpass
 import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from async_engine import is_async_engine_available
 from auth import DoubanAuth
+from backup_diff import CHANGE_LABELS, diff_backups, save_diff_report
+from backup_formats import BACKUP_FORMATS, format_error
 from backup_metadata import build_metadata
 from backup_state import BackupState
 from books import BookCrawler
-from config import BACKUP_ITEMS, DATA_DIR, REQUEST_TIMEOUT
-from crawl_public import run_public_backup
+from config import (
+    BACKUP_ITEMS,
+    CRAWL_ENGINES,
+    DELAY_BETWEEN_REQUESTS,
+    COVER_WORKERS,
+    ENRICH_WORKERS,
+    REQUEST_TIMEOUT,
+    VERIFY_TIMEOUT,
+)
+from crawl_public import positive_int, run_public_backup
 from diagnostics import classify_response
 from games import GameCrawler
+from html_parsing import PARSER_BACKENDS
+from crawl_archive import ArchiveReader, ArchiveWriter, RecordingSession, ReplaySession
+from covers import CoverArchiver
+from enrich import DetailEnricher
+from http_cache import CachedSession, HttpCache
+from incremental import BACKUP_FILE_PATTERN, KnownItems
+from metrics import MeteredSession, RunMetrics, report_path
 from movies import MovieCrawler
 from music import MusicCrawler
+from rate_limit import AdaptiveRateLimiter, BudgetedSession, HostThrottle
+from sqlite_store import SQLITE_FILENAME, SqliteStore
 from storage import DataStorage
+from transport import create_session, is_http2_available
 
 
 VALID_CATEGORIES = ["movies", "books", "music", "games"]
+CRAWL_METHODS = {
+    "movies": "crawl_all_movies",
+    "books": "crawl_all_books",
+    "music": "crawl_all_music",
+    "games": "crawl_all_games",
+}
 CATEGORY_LABELS = {
     "movies": ("电影", "部"),
     "books": ("书籍", "本"),
@@ -31,6 +62,14 @@ CATEGORY_LABELS = {
 }
 
 
+def count_items(data):
+    """统计 {分类: {收藏状态: [条目]}} 中每个分类的条目数。"""
+    return {
+        category: sum(len(items) for items in statuses.values())
+        for category, statuses in data.items()
+    }
+
+
 def parse_category_list(raw_value):
     if not raw_value:
         return []
@@ -47,6 +86,22 @@ def non_negative_delay(raw_value):
     return delay
 
 
+def backup_option_error(
+    http2=False, engine=None, http_cache=False, offline=False, record_dir=None, replay_dir=None
+):
+    """返回登录备份选项组合不可用的原因，可用时返回 None；main.py 和 batch.py 启动时提前检查。"""
+    if http2 and not is_http2_available():
+        return "HTTP/2 需要安装 h2: pip install 'httpx[http2]'"
+    if engine == "async" and not is_async_engine_available():
+        return "异步引擎需要安装 httpx: pip install httpx"
+    if engine == "async" and (http_cache or offline or record_dir or replay_dir):
+        return (
+            "异步引擎不经过同步会话，不能与 --http-cache / --offline / "
+            "--record / --replay 同时使用。"
+        )
+    return None
+
+
 def resolve_selected_items(only=None, skip=None):
     if only:
         selected = parse_category_list(only)
@@ -74,8 +129,21 @@ def parse_args(argv=None):
     parser.add_argument(
         "command",
         nargs="?",
-        choices=["verify", "list", *VALID_CATEGORIES],
-        help="verify 校验登录和页面可访问性；list 查看备份；或指定单个分类备份",
+        choices=["verify", "list", "query", "diff", "restore", "gc", *VALID_CATEGORIES],
+        help=(
+            "verify 校验登录和页面可访问性；list 查看备份；"
+            "query 查询 --sqlite 写入的备份库；diff 比较两份备份；"
+            "restore 从快照重建备份；gc 清理快照仓库；或指定单个分类备份"
+        ),
+    )
+    parser.add_argument(
+        "backups",
+        nargs="*",
+        metavar="BACKUP",
+        help=(
+            "diff 比较的旧备份和新备份 JSON，省略时比较导出目录中最新的两份完整备份；"
+            "restore 要重建的快照名（如 douban_backup_20240601_030000），省略时列出所有快照"
+        ),
     )
     parser.add_argument("--only", help="仅备份指定分类，逗号分隔，例如 movies,books")
     parser.add_argument("--skip", help="跳过指定分类，逗号分隔，例如 music,games")
@@ -87,8 +155,229 @@ def parse_args(argv=None):
         metavar="SECONDS",
         help="每次请求之间等待的秒数；默认登录备份为 2 秒，公开备份为 1 秒",
     )
+    parser.add_argument(
+        "--adaptive-delay",
+        action="store_true",
+        help="以 --delay 为起点自适应调整请求间隔：响应正常时加快，触发风控时指数退避",
+    )
     parser.add_argument("--no-resume", action="store_true", help="禁用断点续传")
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="抓取每个条目的详情页，补全类型、导演、作者、ISBN、片长、豆瓣评分等信息（结果缓存在 data/cache）",
+    )
+    parser.add_argument(
+        "--covers",
+        action="store_true",
+        help="下载条目封面到本地封面库（data/covers，按内容去重），备份中写入 cover_local 本地路径",
+    )
+    parser.add_argument(
+        "--format",
+        choices=BACKUP_FORMATS,
+        default="json",
+        help=(
+            "备份文件格式：json（缩进，默认）、compact（紧凑 JSON）、gzip、zstd（需 pip install zstandard）、"
+            "ndjson（每行一个条目）、msgpack（需 pip install msgpack）；list、diff、--incremental 可读取所有格式"
+        ),
+    )
+    parser.add_argument(
+        "--sqlite",
+        action="store_true",
+        help=f"同时写入导出目录下的 SQLite 库（{SQLITE_FILENAME}），按分类、收藏状态和豆瓣 ID 更新，可用 query 查询",
+    )
+    parser.add_argument(
+        "--snapshots",
+        action="store_true",
+        help="快照模式：完整备份按条目内容去重存入导出目录下的 snapshots 仓库，不再每次写整份 JSON 和 Excel",
+    )
+    parser.add_argument(
+        "--keep",
+        type=positive_int,
+        metavar="N",
+        help="gc 时只保留最新的 N 份快照，其余快照连同不再被引用的条目一起删除",
+    )
+    parser.add_argument(
+        "--http-cache",
+        action="store_true",
+        help="缓存抓到的页面，之后带 If-None-Match / If-Modified-Since 请求，未变化的页面直接读本地",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="离线模式：不联网，只用 --http-cache 缓存的页面重跑解析",
+    )
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument(
+        "--record",
+        metavar="DIR",
+        help="把每个原始响应（URL、状态码、响应头、正文）录制到 DIR 下的 gzip 存档",
+    )
+    archive_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="不联网，用 --record 录制的存档重跑整个备份",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量备份：以输出目录中最新的备份为基准，翻到整页已知条目即停止并合并上次的数据",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="使用 HTTP/2（需 pip install 'httpx[http2]'），每个豆瓣主机复用一条多路复用连接",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        help="备份结束后把运行指标写成 Prometheus textfile（供 node_exporter 采集）",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_BACKENDS,
+        help="HTML 解析后端，默认 html.parser；lxml 更快，未安装时自动回退",
+    )
+    parser.add_argument(
+        "--parallel-categories",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="同时爬取的分类数，默认 1；大于 1 时请求间隔按主机分别计算",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=CRAWL_ENGINES,
+        help=(
+            "登录备份的爬取引擎，默认 sync；async 需安装 httpx，解析当前页时预取下一页；"
+            "pipeline 预取后续页面并用多个进程并行解析"
+        ),
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="公开模式下并发抓取分页的线程数，默认 1；请求速率仍受 --delay 限制",
+    )
+    query_group = parser.add_argument_group("query 查询条件")
+    query_group.add_argument("--title", help="标题前缀")
+    query_group.add_argument("--rating", type=int, choices=range(1, 6), metavar="1-5", help="我的评分")
+    query_group.add_argument("--since", metavar="YYYY-MM-DD", help="标记日期不早于")
+    query_group.add_argument("--until", metavar="YYYY-MM-DD", help="标记日期不晚于")
+    query_group.add_argument("--collection", help="收藏状态，例如 collect、wish、do、reading")
+    query_group.add_argument("--id", dest="douban_id", metavar="DOUBAN_ID", help="豆瓣条目 ID")
+    query_group.add_argument(
+        "--limit", type=positive_int, default=50, metavar="N", help="最多返回的条目数，默认 50"
+    )
+    args = parser.parse_args(argv)
+    if args.backups and args.command not in ("diff", "restore"):
+        parser.error("只有 diff 和 restore 命令接受备份参数。")
+    if args.command == "diff" and len(args.backups) not in (0, 2):
+        parser.error("diff 需要两份备份文件（旧、新），或者都省略。")
+    return args
+
+
+def find_recent_backups(backup_dir, count=2):
+    """返回目录中最新的 count 份完整备份 JSON（按时间从旧到新）。"""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = sorted(name for name in os.listdir(backup_dir) if BACKUP_FILE_PATTERN.match(name))
+    return [os.path.join(backup_dir, name) for name in names[-count:]]
+
+
+def run_diff(args):
+    """比较两份备份并在导出目录写出变化报告，返回对比结果；找不到备份时返回 None。"""
+    output_dir = args.output or DataStorage.DEFAULT_BACKUP_DIR
+    paths = args.backups or find_recent_backups(output_dir)
+    if len(paths) != 2:
+        print(f"[ERROR] {output_dir} 中的完整备份不足两份，请指定要比较的两份备份文件。")
+        return None
+
+    old_path, new_path = paths
+    print(f"原备份: {old_path}")
+    print(f"新备份: {new_path}")
+    started = time.perf_counter()
+    try:
+        diff = diff_backups(old_path, new_path)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] 无法读取备份: {e}")
+        return None
+    json_path, excel_path = save_diff_report(diff, output_dir)
+
+    print("\n变化统计:")
+    for change, total in diff["summary"].items():
+        print(f"  {CHANGE_LABELS[change]}: {total}")
+    print(f"\n对比耗时 {time.perf_counter() - started:.2f} 秒")
+    print(f"  已保存: {json_path}")
+    print(f"  已保存: {excel_path}")
+    return diff
+
+
+def run_restore(args):
+    """从快照重建备份文件；未指定快照时列出仓库中的快照。返回重建的文件路径列表。"""
+    storage = DataStorage(backup_dir=args.output, output_format=args.format)
+    available = storage.snapshots.list_snapshots()
+    if not args.backups:
+        print("\n已有快照:")
+        for name in available:
+            print(f"  {name}")
+        if not available:
+            print("  （无）")
+        return []
+
+    missing = [name for name in args.backups if name not in available]
+    if missing:
+        print(f"[ERROR] 找不到快照: {', '.join(missing)}")
+        return []
+    paths = []
+    for name in args.backups:
+        paths.extend(storage.restore_snapshot(name))
+    return paths
+
+
+def run_gc(args):
+    """清理快照仓库中不再被引用的对象，返回 (删除的快照名列表, 删除的对象数, 释放的字节数)。"""
+    storage = DataStorage(backup_dir=args.output)
+    removed_snapshots, removed_objects, freed_bytes = storage.gc_snapshots(keep=args.keep)
+    for name in removed_snapshots:
+        print(f"  已删除快照: {name}")
+    print(f"[OK] 已删除 {removed_objects} 个不再引用的对象，释放 {freed_bytes / 1024:.1f} KB")
+    return removed_snapshots, removed_objects, freed_bytes
+
+
+def run_query(args):
+    """在导出目录的 SQLite 库中查询条目并打印，返回结果列表。"""
+    path = os.path.join(args.output or DataStorage.DEFAULT_BACKUP_DIR, SQLITE_FILENAME)
+    if not os.path.exists(path):
+        print(f"[ERROR] 未找到备份库: {path}，请先用 --sqlite 备份。")
+        return []
+
+    categories = resolve_selected_items(args.only, args.skip) if args.only or args.skip else None
+    store = SqliteStore(path)
+    try:
+        started = time.perf_counter()
+        rows = store.query(
+            categories=categories,
+            collection=args.collection,
+            douban_id=args.douban_id,
+            title=args.title,
+            rating=args.rating,
+            since=args.since,
+            until=args.until,
+            limit=args.limit,
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        store.close()
+
+    for row in rows:
+        rating = f"{row['rating']}星" if row['rating'] else "未评分"
+        print(
+            f"  {row['date'] or '----------'}  [{row['category']}/{row['collection']}] "
+            f"{row['title']} ({rating}, {row['douban_id']})"
+        )
+    print(f"\n共 {len(rows)} 条，查询耗时 {elapsed_ms:.1f} 毫秒")
+    return rows
 
 
 class DoubanBackup:
@@ -98,18 +387,83 @@ class DoubanBackup:
         output_dir=None,
         checkpoint_enabled=True,
         request_delay=None,
+        parser_backend=None,
+        parallel_categories=1,
+        engine=None,
+        adaptive_delay=False,
+        incremental=False,
+        enrich=False,
+        http_cache=False,
+        offline=False,
+        record_dir=None,
+        replay_dir=None,
+        metrics_textfile=None,
+        http2=False,
+        cookies_file=None,
+        user_info_file=None,
+        interactive=True,
+        request_budget=None,
+        covers=False,
+        sqlite=False,
+        snapshots=False,
+        output_format="json",
     ):
-        self.auth = DoubanAuth()
+        # 分类位于不同主机，同一主机上的并发只来自详情补全线程和封面下载线程
+        concurrency = max(ENRICH_WORKERS if enrich else 1, COVER_WORKERS if covers else 1)
+        self.auth = DoubanAuth(
+            create_session(concurrency, http2=http2),
+            cookies_file=cookies_file,
+            user_info_file=user_info_file,
+        )
+        # 批量备份时不能停下来等待输入密码，Cookie 失效直接判定失败
+        self.interactive = interactive
+        # 多个备份共享的 TokenBucket，限制总请求速率
+        self.request_budget = request_budget
         self.selected_items = list(selected_items or VALID_CATEGORIES)
         self.output_dir = output_dir
-        self.storage = DataStorage(backup_dir=output_dir)
-        self.checkpoint_enabled = checkpoint_enabled
+        # 每次运行的耗时和计数，结束时写成运行报告放在备份旁边
+        self.metrics = RunMetrics()
+        self.metrics_textfile = metrics_textfile
+        self.storage = DataStorage(
+            backup_dir=output_dir,
+            metrics=self.metrics,
+            snapshots=snapshots,
+            output_format=output_format,
+        )
+        # 离线模式只读本地缓存，重放模式只读抓取存档，都不联网
+        self.offline = offline
+        self.http_cache = http_cache or offline
+        self.record_dir = record_dir
+        self.replay_dir = replay_dir
+        network_free = offline or replay_dir is not None
+        # 离线重放不写断点，避免覆盖真实运行留下的续传进度
+        self.checkpoint_enabled = checkpoint_enabled and not network_free
+        if network_free:
+            request_delay = 0
         self.request_delay = request_delay
+        self.parser_backend = parser_backend
+        self.parallel_categories = parallel_categories
+        self.engine = engine
+        self.throttle = None
+        delay = DELAY_BETWEEN_REQUESTS if request_delay is None else request_delay
+        if adaptive_delay:
+            self.throttle = AdaptiveRateLimiter(delay)
+        elif parallel_categories > 1:
+            self.throttle = HostThrottle(delay)
+        self.delay = delay
+        self.incremental = incremental
+        self.enrich = enrich
+        self.covers = covers
+        # 额外写入备份目录下的 SQLite 库，爬取时逐页写入，导出时按完整数据同步
+        self.sqlite = sqlite
+        self.item_sink = None
+        self.known_items = None
         self.state_store = None
         self.session = None
         self.user_id = None
         self.user_name = None
         self.backup_incomplete = False
+        self.item_counts = {}
 
     def _build_metadata(self, backup_mode, selected_items=None):
         return build_metadata(
@@ -135,14 +489,23 @@ class DoubanBackup:
         try:
             print("\n开始备份数据...")
             all_data = self._backup_all()
+            if self.enrich:
+                self._enrich_details(all_data)
+            if self.covers:
+                self._archive_covers(all_data)
 
-            print("\n保存数据...")
-            self.storage.save_all_json(all_data)
-            self.storage.save_all_excel(all_data)
-
-            if self.backup_incomplete or (
+            incomplete = self.backup_incomplete or (
                 self.state_store and self.state_store.has_incomplete_collections()
-            ):
+            )
+            print("\n保存数据...")
+            with self.metrics.phase("export"):
+                self.storage.save_all_json(all_data)
+                self.storage.save_all_excel(all_data)
+                if self.sqlite:
+                    # 未完整结束时部分收藏列表不全，只更新不删除
+                    self.storage.save_sqlite(all_data, prune=not incomplete)
+
+            if incomplete:
                 print("\n[WARN] 本次备份未完整结束，已保存部分数据和断点。")
                 self._print_summary(all_data)
                 return False
@@ -156,6 +519,22 @@ class DoubanBackup:
         except KeyboardInterrupt:
             print("\n[WARN] 已中断，断点状态已保存，下次运行会从上次进度继续。")
             return False
+        finally:
+            self.storage.close_sqlite()
+            self._write_run_report()
+
+    def _write_run_report(self):
+        """在备份目录写出运行报告；指定了 --metrics-textfile 时同时输出 Prometheus 指标。"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        try:
+            self.metrics.save_report(
+                report_path(self.storage.backup_dir, timestamp),
+                self.storage.metadata,
+            )
+            if self.metrics_textfile:
+                self.metrics.write_prometheus(self.metrics_textfile)
+        except OSError as e:
+            print(f"[WARN] 运行报告写入失败: {e}")
 
     def verify(self):
         """验证 Cookie、用户信息和分类页面可访问性。"""
@@ -188,39 +567,78 @@ class DoubanBackup:
         report["user"] = user_info or {"id": self.user_id, "name": self.user_name}
         print(f"[OK] 当前用户: {self.user_name or self.user_id} ({self.user_id})")
 
-        for category, url in self._build_category_urls().items():
-            try:
-                response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-            except Exception as exc:
-                report["checks"].append(
-                    {
-                        "category": category,
-                        "status": "error",
-                        "code": "request_failed",
-                        "message": f"请求失败: {exc}",
-                        "url": url,
-                    }
-                )
-                print(f"[ERROR] {CATEGORY_LABELS[category][0]}: 请求失败: {exc}")
-                continue
+        for check in self._probe_categories(self._build_category_urls()):
+            report["checks"].append(check)
+            label = CATEGORY_LABELS[check["category"]][0]
+            if check["status"] == "ok":
+                print(f"[OK] {label}: {check['message']}")
+            elif check["code"] in ("request_failed", "timeout"):
+                print(f"[ERROR] {label}: {check['message']}")
+            else:
+                print(f"[WARN] {label}: {check['message']}")
 
-            status, code, message = classify_response(response)
-            report["checks"].append(
+        report["ok"] = report["login_ok"] and all(
+            check["status"] == "ok" for check in report["checks"]
+        )
+        return report
+
+    def _probe_categories(self, urls, budget=VERIFY_TIMEOUT):
+        """并发请求各分类页面，按分类顺序返回检查结果；超过 budget 秒仍未完成的记为 timeout。"""
+        if not urls:
+            return []
+        timeout = min(REQUEST_TIMEOUT, budget)
+        # requests 的 timeout 只限制单次连接和读取，整体期限由这里控制；
+        # 探测放在守护线程里，超时的请求不会拖住 verify 的返回和进程退出
+        deadline = time.monotonic() + budget
+        results = {}
+        threads = []
+        for category, url in urls.items():
+            def probe(category=category, url=url):
+                results[category] = self._probe_category(category, url, timeout)
+
+            thread = threading.Thread(target=probe, name=f"verify-{category}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+        checks = []
+        for category, url in urls.items():
+            check = results.get(category)
+            if check is not None:
+                checks.append(check)
+                continue
+            checks.append(
                 {
                     "category": category,
-                    "status": status,
-                    "code": code,
-                    "message": message,
+                    "status": "error",
+                    "code": "timeout",
+                    "message": f"超过 {budget} 秒仍未完成。",
                     "url": url,
                 }
             )
-            prefix = "[OK]" if status == "ok" else "[WARN]"
-            print(f"{prefix} {CATEGORY_LABELS[category][0]}: {message}")
+        return checks
 
-        report["ok"] = report["login_ok"] and all(
-            check["status"] == "ok" for check in report["checks"]
-        )
-        return report
+    def _probe_category(self, category, url, timeout=REQUEST_TIMEOUT):
+        try:
+            response = self.session.get(url, timeout=timeout)
+        except Exception as exc:
+            return {
+                "category": category,
+                "status": "error",
+                "code": "request_failed",
+                "message": f"请求失败: {exc}",
+                "url": url,
+            }
+
+        status, code, message = classify_response(response)
+        return {
+            "category": category,
+            "status": status,
+            "code": code,
+            "message": message,
+            "url": url,
+        }
 
     def _build_category_urls(self):
         urls = {
@@ -235,8 +653,18 @@ class DoubanBackup:
         """登录豆瓣"""
         print("\n[1/2] 登录豆瓣账号")
 
+        if self.offline:
+            print("[离线] 跳过登录，使用本地缓存的页面。")
+            return self._finalize_login()
+        if self.replay_dir:
+            print(f"[重放] 跳过登录，使用抓取存档: {self.replay_dir}")
+            return self._finalize_login()
+
         if self.auth.login_with_cookies():
             return self._finalize_login()
+        if not self.interactive:
+            print(f"[ERROR] Cookie 无效或已过期: {self.auth.cookies_file}")
+            return False
 
         email = input("请输入豆瓣邮箱: ").strip()
         password = getpass.getpass("请输入密码（输入时不显示）: ")
@@ -249,14 +677,53 @@ class DoubanBackup:
 
     def _finalize_login(self):
         """完成认证后的会话和用户信息校验。"""
-        self.session = self.auth.get_session()
+        # 指标包装在最内层，只统计真正发出的网络请求，缓存和存档命中不计入
+        self.session = MeteredSession(self.auth.get_session(), self.metrics)
+        if self.request_budget is not None:
+            # 共享预算在缓存之内：缓存和存档命中不占用请求配额
+            self.session = BudgetedSession(self.session, self.request_budget)
         self._load_user_info()
+        reader = None
+        if self.replay_dir:
+            try:
+                reader = ArchiveReader(self.replay_dir)
+            except FileNotFoundError as e:
+                print(f"[ERROR] {e}")
+                self.session = None
+                return False
+            # 存档中的链接都带着录制时的账号，以存档记录为准
+            self.user_id = reader.user_id or self.user_id
         if self.user_id:
+            if reader is not None:
+                self.session = ReplaySession(reader, self.session)
+            elif self.http_cache:
+                self.session = CachedSession(
+                    self.session,
+                    HttpCache(user_key=self.user_id),
+                    offline=self.offline,
+                )
+            if self.record_dir:
+                try:
+                    writer = ArchiveWriter(self.record_dir, user_id=self.user_id)
+                except FileExistsError as e:
+                    print(f"[ERROR] {e}")
+                    self.session = None
+                    return False
+                self.session = RecordingSession(self.session, writer)
             if self.checkpoint_enabled:
                 self.state_store = BackupState(
                     self.storage.backup_dir,
                     user_id=self.user_id,
+                    metrics=self.metrics,
+                )
+            if self.incremental:
+                self.known_items = KnownItems.from_backup(
+                    self.storage.backup_dir,
+                    user_id=self.user_id,
+                    backup_mode="authenticated",
                 )
+            if self.sqlite:
+                self.item_sink = self.storage.open_sqlite()
             return True
 
         self.session = None
@@ -265,7 +732,7 @@ class DoubanBackup:
 
     def _load_user_info(self):
         """加载用户信息"""
-        user_info_file = os.path.join(DATA_DIR, "user_info.json")
+        user_info_file = self.auth.user_info_file
         if not os.path.exists(user_info_file):
             return None
 
@@ -277,63 +744,95 @@ class DoubanBackup:
         print(f"欢迎, {self.user_name or self.user_id or ''}")
         return user_info
 
-    def _backup_all(self):
-        """备份所有数据"""
-        all_data = {}
-
-        if "movies" in self.selected_items:
-            print("\n[电影] 备份电影...")
-            movie_crawler = MovieCrawler(
-                self.session,
-                state_store=self.state_store,
-                request_delay=self.request_delay,
-            )
-            movie_crawler.set_user_id(self.user_id)
-            all_data["movies"] = movie_crawler.crawl_all_movies()
-            self.backup_incomplete |= movie_crawler.incomplete
+    def _crawler_options(self):
+        return {
+            "state_store": self.state_store,
+            "request_delay": self.request_delay,
+            "parser_backend": self.parser_backend,
+            "throttle": self.throttle,
+            "engine": self.engine,
+            "known_items": self.known_items,
+            "metrics": self.metrics,
+            "item_sink": self.item_sink,
+        }
 
-        if "books" in self.selected_items:
-            print("\n[书籍] 备份书籍...")
-            book_crawler = BookCrawler(
-                self.session,
-                state_store=self.state_store,
-                request_delay=self.request_delay,
-            )
-            book_crawler.set_user_id(self.user_id)
-            all_data["books"] = book_crawler.crawl_all_books()
-            self.backup_incomplete |= book_crawler.incomplete
+    def _create_crawler(self, category):
+        crawler_class = {
+            "movies": MovieCrawler,
+            "books": BookCrawler,
+            "music": MusicCrawler,
+            "games": GameCrawler,
+        }[category]
+        crawler = crawler_class(self.session, **self._crawler_options())
+        crawler.set_user_id(self.user_id)
+        return crawler
 
-        if "music" in self.selected_items:
-            print("\n[音乐] 备份音乐...")
-            music_crawler = MusicCrawler(
+    def _enrich_details(self, data):
+        """抓取条目详情页补全 detail 字段，与爬取共用限速器。"""
+        throttle = self.throttle or HostThrottle(self.delay)
+        with self.metrics.phase("enrich"):
+            DetailEnricher(
                 self.session,
-                state_store=self.state_store,
-                request_delay=self.request_delay,
-            )
-            music_crawler.set_user_id(self.user_id)
-            all_data["music"] = music_crawler.crawl_all_music()
-            self.backup_incomplete |= music_crawler.incomplete
+                throttle,
+                fetch_missing=not self.offline and self.replay_dir is None,
+            ).enrich(data)
+
+    def _archive_covers(self, data):
+        """下载封面到本地封面库，条目写入相对备份目录的 cover_local。"""
+        # 图片不经过页面缓存和存档，直接用登录会话下载
+        session = self.auth.get_session()
+        if self.request_budget is not None:
+            session = BudgetedSession(session, self.request_budget)
+        with self.metrics.phase("covers"):
+            CoverArchiver(
+                session,
+                fetch_missing=not self.offline and self.replay_dir is None,
+            ).archive(data, self.storage.backup_dir)
+
+    def _crawl_category(self, category):
+        label, _ = CATEGORY_LABELS[category]
+        print(f"\n[{label}] 备份{label}...")
+        crawler = self._create_crawler(category)
+        with self.metrics.phase("crawl", category=category):
+            category_data = getattr(crawler, CRAWL_METHODS[category])()
+        return category_data, crawler.incomplete
 
-        if "games" in self.selected_items:
-            print("\n[游戏] 备份游戏...")
-            game_crawler = GameCrawler(
-                self.session,
-                state_store=self.state_store,
-                request_delay=self.request_delay,
-            )
-            game_crawler.set_user_id(self.user_id)
-            all_data["games"] = game_crawler.crawl_all_games()
-            self.backup_incomplete |= game_crawler.incomplete
+    def _backup_all(self):
+        """备份所有数据"""
+        categories = [
+            category for category in VALID_CATEGORIES if category in self.selected_items
+        ]
+        if self.parallel_categories > 1 and len(categories) > 1:
+            results = self._crawl_categories_concurrently(categories)
+        else:
+            results = {category: self._crawl_category(category) for category in categories}
 
+        all_data = {}
+        for category in categories:
+            category_data, incomplete = results[category]
+            all_data[category] = category_data
+            self.backup_incomplete |= incomplete
+        if self.known_items is not None:
+            self.known_items.drop_moved(all_data)
         return all_data
 
+    def _crawl_categories_concurrently(self, categories):
+        """各分类位于不同主机，并发爬取时由共享节流器按主机控制请求间隔。"""
+        with ThreadPoolExecutor(max_workers=self.parallel_categories) as executor:
+            futures = {
+                category: executor.submit(self._crawl_category, category)
+                for category in categories
+            }
+            return {category: future.result() for category, future in futures.items()}
+
     def _print_summary(self, data):
         """打印备份摘要"""
+        self.item_counts = count_items(data)
         print("\n备份统计:")
         for category in self.selected_items:
             if category not in data:
                 continue
-            total = sum(len(v) for v in data[category].values())
+            total = self.item_counts[category]
             label, unit = CATEGORY_LABELS[category]
             print(f"  {label}: {total} {unit}")
 
@@ -344,28 +843,34 @@ class DoubanBackup:
         if not self._login():
             return False
 
-        crawler_class, crawl_method = {
-            "movies": (MovieCrawler, "crawl_all_movies"),
-            "books": (BookCrawler, "crawl_all_books"),
-            "music": (MusicCrawler, "crawl_all_music"),
-            "games": (GameCrawler, "crawl_all_games"),
-        }[category]
-
         self._prepare_storage("authenticated", [category])
-        crawler = crawler_class(
-            self.session,
-            state_store=self.state_store,
-            request_delay=self.request_delay,
-        )
-        crawler.set_user_id(self.user_id)
-        category_data = getattr(crawler, crawl_method)()
+        try:
+            return self._backup_single_category(category)
+        finally:
+            self.storage.close_sqlite()
+            self._write_run_report()
+
+    def _backup_single_category(self, category):
+        crawler = self._create_crawler(category)
+        with self.metrics.phase("crawl", category=category):
+            category_data = getattr(crawler, CRAWL_METHODS[category])()
         data = {category: category_data}
-
-        self.storage.save_json(category_data, category)
-        self.storage.save_excel(data, category)
-        if crawler.incomplete or (
+        if self.known_items is not None:
+            self.known_items.drop_moved(data)
+        if self.enrich:
+            self._enrich_details(data)
+        if self.covers:
+            self._archive_covers(data)
+
+        incomplete = crawler.incomplete or (
             self.state_store and self.state_store.has_incomplete_collections()
-        ):
+        )
+        with self.metrics.phase("export"):
+            self.storage.save_json(category_data, category)
+            self.storage.save_excel(data, category)
+            if self.sqlite:
+                self.storage.save_sqlite(data, prune=not incomplete)
+        if incomplete:
             print("\n[WARN] 本次备份未完整结束，已保存部分数据和断点。")
             self._print_summary(data)
             return False
@@ -387,21 +892,78 @@ class DoubanBackup:
 
 def main(argv=None):
     args = parse_args(argv)
+    if args.command == "query":
+        return run_query(args)
+    if args.command == "diff":
+        return run_diff(args)
+    unavailable_format = format_error(args.format)
+    if unavailable_format:
+        print(f"[ERROR] {unavailable_format}")
+        return False
+    if args.command == "restore":
+        return run_restore(args)
+    if args.command == "gc":
+        return run_gc(args)
     selected_items = resolve_selected_items(args.only, args.skip)
 
     if args.public:
+        if args.snapshots:
+            print("[ERROR] --snapshots 只适用于登录备份，公开模式请使用默认的备份文件。")
+            return False
         return run_public_backup(
             args.public,
             categories=selected_items,
             output_dir=args.output,
             request_delay=args.delay,
+            parser_backend=args.parser,
+            fetch_workers=args.fetch_workers,
+            adaptive_delay=args.adaptive_delay,
+            incremental=args.incremental,
+            enrich=args.enrich,
+            http_cache=args.http_cache,
+            offline=args.offline,
+            record_dir=args.record,
+            replay_dir=args.replay,
+            metrics_textfile=args.metrics_textfile,
+            http2=args.http2,
+            covers=args.covers,
+            sqlite=args.sqlite,
+            output_format=args.format,
         )
 
+    option_error = backup_option_error(
+        http2=args.http2,
+        engine=args.engine,
+        http_cache=args.http_cache,
+        offline=args.offline,
+        record_dir=args.record,
+        replay_dir=args.replay,
+    )
+    if option_error:
+        print(f"[ERROR] {option_error}")
+        return False
+
     backup = DoubanBackup(
         selected_items=selected_items,
         output_dir=args.output,
         checkpoint_enabled=not args.no_resume,
         request_delay=args.delay,
+        parser_backend=args.parser,
+        parallel_categories=args.parallel_categories,
+        engine=args.engine,
+        adaptive_delay=args.adaptive_delay,
+        incremental=args.incremental,
+        enrich=args.enrich,
+        http_cache=args.http_cache,
+        offline=args.offline,
+        record_dir=args.record,
+        replay_dir=args.replay,
+        metrics_textfile=args.metrics_textfile,
+        http2=args.http2,
+        covers=args.covers,
+        sqlite=args.sqlite,
+        snapshots=args.snapshots,
+        output_format=args.format,
     )
 
     if args.command == "verify":
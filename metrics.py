@@ -0,0 +1,295 @@
+"""
+运行指标
+记录请求耗时分布、下载字节数、每页解析耗时、断点写入耗时、按 classify_response 结果统计的重试次数、
+导出耗时和各阶段耗时；备份结束后在备份旁写一份 JSON 运行报告，
+并可输出 Prometheus textfile（node_exporter textfile collector 格式）。
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from diagnostics import RETRYABLE_RESPONSE_CODES, classify_response
+from file_security import write_atomic
+
+METRIC_PREFIX = 'douban_backup_'
+# 覆盖从本地缓存命中（毫秒级）到慢请求和整段阶段（分钟级）的耗时，单位秒
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800,
+)
+
+METRIC_HELP = {
+    'request_seconds': '单次 HTTP 请求耗时',
+    'response_bytes_total': '响应正文字节数',
+    'responses_total': '按 classify_response 结果统计的响应数',
+    'request_errors_total': '抛出异常的请求数',
+    'retries_total': '按上一次失败原因统计的重试次数',
+    'parse_seconds': '每页解析耗时',
+    'pages_total': '已解析页数',
+    'items_total': '已解析条目数',
+    'collection_seconds': '每个收藏列表的爬取耗时',
+    'checkpoint_write_seconds': '断点写入耗时',
+    'export_seconds': '导出文件耗时',
+    'phase_seconds': '各运行阶段耗时',
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _url_host(url):
+    return urlsplit(url).netloc or 'unknown'
+
+
+def _response_size(response):
+    content = getattr(response, 'content', None)
+    if isinstance(content, (bytes, bytearray)):
+        return len(content)
+    text = getattr(response, 'text', None)
+    if isinstance(text, str):
+        return len(text.encode('utf-8'))
+    return 0
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative_counts(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """按桶上界估算分位数；落在最后一个桶之外时返回观测到的最大值。"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative_counts():
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'max': round(self.max, 6),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {str(bound): total for bound, total in self.cumulative_counts()},
+        }
+
+
+class RunMetrics:
+    """线程安全的计数器和直方图集合，一次备份运行共用一个实例。"""
+
+    enabled = True
+
+    def __init__(self):
+        self.started_at = datetime.now().astimezone()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        # 每个 URL 最近一次请求的结果，同一 URL 再次请求即为重试
+        self._last_code = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def phase(self, name, **labels):
+        return self.timer('phase_seconds', phase=name, **labels)
+
+    def record_response(self, url, response, seconds):
+        """记录一次完成的请求：耗时、字节数、响应分类；上一次同 URL 请求失败时计一次重试。"""
+        host = _url_host(url)
+        source = 'cache' if getattr(response, 'from_cache', False) else 'network'
+        _, code, _ = classify_response(response)
+        self._count_retry(url, code)
+        self.observe('request_seconds', seconds, host=host, source=source)
+        self.inc('response_bytes_total', _response_size(response), host=host, source=source)
+        self.inc('responses_total', host=host, code=code)
+
+    def record_error(self, url):
+        self._count_retry(url, 'request_failed')
+        self.inc('request_errors_total', host=_url_host(url))
+
+    def _count_retry(self, url, code):
+        with self._lock:
+            previous = self._last_code.get(url)
+            self._last_code[url] = code
+        if previous in RETRYABLE_RESPONSE_CODES or previous == 'request_failed':
+            self.inc('retries_total', code=previous)
+
+    def to_dict(self):
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                dict({'name': name, 'labels': dict(labels)}, **histogram.to_dict())
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+        phases = [
+            dict(entry['labels'], seconds=entry['sum'])
+            for entry in histograms
+            if entry['name'] == 'phase_seconds'
+        ]
+        return {
+            'started_at': self.started_at.isoformat(),
+            'duration_seconds': round(time.perf_counter() - self._started, 3),
+            'phases': phases,
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def save_report(self, path, metadata=None):
+        """写出 JSON 运行报告，返回文件路径。"""
+        report = {'metadata': metadata or {}}
+        report.update(self.to_dict())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file_obj:
+            json.dump(report, file_obj, ensure_ascii=False, indent=2)
+        print(f"  运行报告: {path}")
+        return path
+
+    def to_prometheus(self):
+        lines = []
+        described = set()
+
+        def describe(name, metric_type):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name[len(METRIC_PREFIX):], name)}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                full_name = METRIC_PREFIX + name
+                describe(full_name, 'counter')
+                lines.append(f"{full_name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                full_name = METRIC_PREFIX + name
+                describe(full_name, 'histogram')
+                for bound, total in histogram.cumulative_counts():
+                    bucket_labels = labels + (('le', str(bound)),)
+                    lines.append(f"{full_name}_bucket{_format_labels(bucket_labels)} {total}")
+                inf_labels = labels + (('le', '+Inf'),)
+                lines.append(f"{full_name}_bucket{_format_labels(inf_labels)} {histogram.count}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+        duration_name = METRIC_PREFIX + 'run_duration_seconds'
+        lines.append(f"# HELP {duration_name} 本次运行总耗时")
+        lines.append(f"# TYPE {duration_name} gauge")
+        lines.append(f"{duration_name} {time.perf_counter() - self._started:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """写出 Prometheus textfile；先写临时文件再替换，避免采集到写了一半的文件。"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_atomic(path, self.to_prometheus())
+        print(f"  Prometheus 指标: {path}")
+        return path
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{escaped}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class NullMetrics:
+    """未启用指标时的空实现，调用方无需判断是否为 None。"""
+
+    enabled = False
+
+    def inc(self, name, amount=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+    @contextmanager
+    def timer(self, name, **labels):
+        yield
+
+    def phase(self, name, **labels):
+        return self.timer('phase_seconds')
+
+    def record_response(self, url, response, seconds):
+        pass
+
+    def record_error(self, url):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MeteredSession:
+    """包装会话，记录每个 get 请求的耗时、字节数和响应分类，其余属性原样转发。"""
+
+    def __init__(self, session, metrics):
+        self.session = session
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def get(self, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except Exception:
+            self.metrics.record_error(url)
+            raise
+        self.metrics.record_response(url, response, time.perf_counter() - started)
+        return response
+
+
+def report_path(output_dir, timestamp):
+    return os.path.join(output_dir, f"douban_run_report_{timestamp}.json")
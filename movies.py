@@ -3,6 +3,7 @@
 """
 import re
 from base import BaseCrawler
+from item_records import MovieItem
 
 
 class MovieCrawler(BaseCrawler):
@@ -12,12 +13,13 @@ class MovieCrawler(BaseCrawler):
         'do': '在看'
     }
 
-    def __init__(self, session, state_store=None, request_delay=None):
+    def __init__(self, session, state_store=None, request_delay=None, **crawler_options):
         super().__init__(
             session,
             category_key='movies',
             state_store=state_store,
             request_delay=request_delay,
+            **crawler_options,
         )
         self.user_id = None
 
@@ -39,18 +41,11 @@ class MovieCrawler(BaseCrawler):
         url = f"https://movie.douban.com/people/{self.user_id}/do"
         return self.crawl_collection(url, 'do')
 
-    def _parse_items(self, response, collection_type=None):
+    def _parse_items(self, soup, collection_type=None):
         """解析电影条目"""
         items = []
-        html = response.text
 
-        # Pattern for authenticated page might differ slightly, but let's try to be robust
         # Authenticated view typically has .item .comment
-        
-        # We'll use BeautifulSoup if regex gets too complex, but sticking to regex for consistency with existing code
-        # Actually, switching to BS4 for parsing is cleaner and safer for comment extraction
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
         div_items = soup.find_all('div', class_='item')
         
         for item in div_items:
@@ -102,17 +97,16 @@ class MovieCrawler(BaseCrawler):
                 tags_tag = item.find('span', class_='tags')
                 if tags_tag: tags = tags_tag.get_text(strip=True).replace('标签: ', '')
 
-                item_data = {
-                    'douban_id': douban_id,
-                    'cover': cover,
-                    'title': title,
-                    'rating': rating,
-                    'date': date,
-                    'comment': comment,
-                    'tags': tags,
-                    'type': 'movie',
-                    'collection': self.COLLECTION_MAP.get(collection_type, collection_type)
-                }
+                item_data = MovieItem(
+                    douban_id=douban_id,
+                    cover=cover,
+                    title=title,
+                    rating=rating,
+                    date=date,
+                    comment=comment,
+                    tags=tags,
+                    collection=self.COLLECTION_MAP.get(collection_type, collection_type)
+                )
                 items.append(item_data)
             except Exception as e:
                 print(f"解析出错: {e}")
@@ -121,25 +115,21 @@ class MovieCrawler(BaseCrawler):
         if not items and not div_items:
             # Fallback to Regex if BS4 finding failed (unlikely if page is valid)
             alt_pattern = r'<li class="ll">.*?href="https://movie\.douban\.com/subject/(\d+)/".*?src="([^"]*)".*?<span class="title">([^<]*)</span>.*?<span class="rating(\d+)-t">'
-            alt_matches = re.findall(alt_pattern, html, re.DOTALL)
+            alt_matches = re.findall(alt_pattern, str(soup), re.DOTALL)
             for match in alt_matches:
-                item = {
-                    'douban_id': match[0],
-                    'cover': match[1],
-                    'title': self._clean_text(match[2]),
-                    'rating': match[3],
-                    'type': 'movie',
-                    'collection': self.COLLECTION_MAP.get(collection_type, collection_type)
-                }
+                item = MovieItem(
+                    douban_id=match[0],
+                    cover=match[1],
+                    title=self._clean_text(match[2]),
+                    rating=match[3],
+                    collection=self.COLLECTION_MAP.get(collection_type, collection_type)
+                )
                 items.append(item)
 
         return items
 
-    def _get_pagination(self, response):
+    def _get_pagination(self, soup):
         """获取下一页链接"""
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Try common next link patterns
         next_link = soup.select_one('span.next a')
         if not next_link:
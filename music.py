@@ -3,7 +3,7 @@
 """
 import re
 from base import BaseCrawler
-from bs4 import BeautifulSoup
+from item_records import MusicItem
 
 class MusicCrawler(BaseCrawler):
     COLLECTION_MAP = {
@@ -12,12 +12,13 @@ class MusicCrawler(BaseCrawler):
         'do': '在听'
     }
 
-    def __init__(self, session, state_store=None, request_delay=None):
+    def __init__(self, session, state_store=None, request_delay=None, **crawler_options):
         super().__init__(
             session,
             category_key='music',
             state_store=state_store,
             request_delay=request_delay,
+            **crawler_options,
         )
         self.user_id = None
 
@@ -31,9 +32,8 @@ class MusicCrawler(BaseCrawler):
             'do': self.crawl_collection(f"https://music.douban.com/people/{self.user_id}/do", 'do')
         }
 
-    def _parse_items(self, response, collection_type=None):
+    def _parse_items(self, soup, collection_type=None):
         items = []
-        soup = BeautifulSoup(response.text, 'html.parser')
         div_items = soup.select('div.item')
         
         for item in div_items:
@@ -70,25 +70,23 @@ class MusicCrawler(BaseCrawler):
                 comment_tag = item.select_one('.comment')
                 comment = comment_tag.get_text(' ', strip=True) if comment_tag else ''
 
-                items.append({
-                    'douban_id': douban_id,
-                    'title': title,
-                    'artist': artist,
-                    'cover': cover,
-                    'rating': rating,
-                    'info': intro,
-                    'comment': comment,
-                    'type': 'music',
-                    'collection': self.COLLECTION_MAP.get(collection_type, collection_type)
-                })
+                items.append(MusicItem(
+                    douban_id=douban_id,
+                    title=title,
+                    artist=artist,
+                    cover=cover,
+                    rating=rating,
+                    info=intro,
+                    comment=comment,
+                    collection=self.COLLECTION_MAP.get(collection_type, collection_type)
+                ))
             except Exception as e:
                 print(f"Error parsing music: {e}")
                 continue
         
         return items
 
-    def _get_pagination(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+    def _get_pagination(self, soup):
         next_link = soup.select_one('span.next a') # Standard
         if not next_link:
              next_link = soup.select_one('a.next') # Alternative
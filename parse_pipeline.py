@@ -0,0 +1,177 @@
+"""
+抓取 / 解析流水线爬取引擎
+抓取线程按 start 偏移预取后续页面，把页面正文放入有界队列并提交给进程池解析
+（沿用各爬虫的 _parse_items 和分页逻辑），主线程按页码顺序合并结果、保存断点。
+BeautifulSoup 解析是 CPU 密集型，放到多个进程后不再与网络请求共用一个线程；
+重放存档或批量备份多个账号时可以用满所有 CPU 核心。
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from async_engine import is_same_page, predict_next_url
+from config import PARSE_QUEUE_SIZE, PARSE_WORKERS
+from diagnostics import classify_response
+
+_pools = {}
+_pools_lock = threading.Lock()
+# 解析进程内按 (爬虫类, 解析后端) 缓存的爬虫实例，只用来调用解析方法
+_worker_crawlers = {}
+
+
+def _pool_context():
+    """进程池在工作线程里按需创建子进程，fork 会复制其他线程持有的锁，改用 forkserver / spawn。"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_parse_pool(workers=None):
+    """返回按进程数共享的解析进程池，同一进程内的所有爬虫（包括批量备份的多个账号）共用。"""
+    workers = workers or PARSE_WORKERS or os.cpu_count() or 1
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=_pool_context()
+            )
+        return pool
+
+
+def parse_page(crawler_class, parser_backend, html, collection_type=None):
+    """在解析进程中解析一页，返回 (条目列表, 下一页链接, 是否末页, 解析耗时)。"""
+    started = time.perf_counter()
+    key = (crawler_class, parser_backend)
+    crawler = _worker_crawlers.get(key)
+    if crawler is None:
+        crawler = _worker_crawlers[key] = crawler_class(
+            None, request_delay=0, parser_backend=parser_backend
+        )
+    items, next_url, last_page = crawler._parse_page(html, collection_type)
+    return items, next_url, last_page, time.perf_counter() - started
+
+
+class PageFetcher(threading.Thread):
+    """抓取线程：从 start_url 开始逐页请求，每页提交解析后放入有界队列。
+
+    speculate 为 True 时按 start 偏移继续预取后续页面，直到被停止或遇到失败的响应；
+    队列满时阻塞，预取量不超过队列长度。
+    """
+
+    def __init__(self, crawler, executor, start_url, collection_type, speculate, queue_size):
+        super().__init__(daemon=True)
+        self.crawler = crawler
+        self.executor = executor
+        self.start_url = start_url
+        self.collection_type = collection_type
+        self.speculate = speculate
+        self.pages = queue.Queue(maxsize=max(1, queue_size))
+        self.stopped = threading.Event()
+
+    def run(self):
+        url = self.start_url
+        try:
+            while url and not self.stopped.is_set():
+                response = self.crawler._make_request(url)
+                future = None
+                if response is not None and classify_response(response)[0] == 'ok':
+                    future = self.executor.submit(
+                        parse_page,
+                        type(self.crawler),
+                        self.crawler.parser_backend,
+                        response.text,
+                        self.collection_type,
+                    )
+                if not self._put((url, response, future)) or future is None:
+                    break
+                url = predict_next_url(url, self.crawler.PAGE_SIZE) if self.speculate else None
+        except Exception as e:
+            self._put((url, e, None))
+        finally:
+            self._put(None)
+
+    def _put(self, entry):
+        while not self.stopped.is_set():
+            try:
+                self.pages.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def next_page(self):
+        return self.pages.get()
+
+    def stop(self):
+        """停止预取并取消尚未开始的解析任务。"""
+        self.stopped.set()
+        while True:
+            try:
+                entry = self.pages.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None and entry[2] is not None:
+                entry[2].cancel()
+        self.join()
+
+
+class PipelineCrawlEngine:
+    def __init__(self, crawler, executor=None, queue_size=PARSE_QUEUE_SIZE):
+        self.crawler = crawler
+        self.executor = executor or get_parse_pool(crawler.parse_workers)
+        self.queue_size = queue_size
+
+    def crawl(self, url, collection_type=None, initial_data=None):
+        crawler = self.crawler
+        crawler.data = list(initial_data or [])
+        visited_urls = set()
+        current_url = url
+        # 第一页的链接格式与分页链接不同，从跟随的分页链接开始才预取
+        speculate = False
+        while current_url:
+            current_url = self._crawl_run(current_url, collection_type, visited_urls, speculate)
+            speculate = True
+        return crawler.data
+
+    def _crawl_run(self, start_url, collection_type, visited_urls, speculate):
+        """按页码顺序处理一轮预取的页面；预测的下一页与实际分页链接不一致时返回实际链接重新开始。"""
+        crawler = self.crawler
+        fetcher = PageFetcher(
+            crawler, self.executor, start_url, collection_type, speculate, self.queue_size
+        )
+        fetcher.start()
+        try:
+            while True:
+                entry = fetcher.next_page()
+                if entry is None:
+                    return None
+                url, response, future = entry
+                if isinstance(response, Exception):
+                    raise response
+                if not crawler._start_page(url, collection_type, visited_urls):
+                    return None
+                if future is None:
+                    # 请求失败或页面异常，由同步引擎的逻辑记录原因并停止
+                    return crawler._finish_page(url, response, collection_type, visited_urls)
+
+                items, next_url, last_page, seconds = future.result()
+                crawler.metrics.observe('parse_seconds', seconds, category=crawler.category_key)
+                next_url = crawler._apply_page(
+                    url, response, (items, next_url, last_page), collection_type, visited_urls
+                )
+                if next_url is None:
+                    return None
+                if not speculate or not is_same_page(
+                    predict_next_url(url, crawler.PAGE_SIZE), next_url
+                ):
+                    return next_url
+        finally:
+            fetcher.stop()
+
+
+def crawl_pipeline(crawler, url, collection_type=None, initial_data=None, executor=None):
+    engine = PipelineCrawlEngine(crawler, executor=executor)
+    return engine.crawl(url, collection_type, initial_data=initial_data)
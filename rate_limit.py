@@ -0,0 +1,163 @@
+"""
+请求节流
+按主机分别控制请求间隔，供登录模式和公开模式的爬虫共享
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from diagnostics import classify_response
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（秒数或 HTTP 日期），无法解析时返回 None。"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+
+class HostThrottle:
+    """同一主机的相邻请求至少间隔 delay 秒，不同主机之间互不阻塞。"""
+
+    # 重试前额外等待的秒数
+    retry_delay = 2
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def _host_delay(self, host):
+        return self.delay
+
+    def wait(self, url):
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._host_delay(host)
+        pause = slot - now
+        if pause > 0:
+            time.sleep(pause)
+
+    def record(self, url, response):
+        """固定间隔节流器不根据响应调整。"""
+
+
+class AdaptiveRateLimiter(HostThrottle):
+    """按主机自适应调整请求间隔。
+
+    每个主机从 delay 开始：响应正常时间隔逐步缩短，直到 min_delay；
+    遇到 rate_limited（403/429、/misc/sorry、sec.douban.com）时暂停该主机，
+    暂停时长按指数退避并加入随机抖动，同时放大之后的请求间隔；
+    响应带 Retry-After 时至少等待其给出的时长。
+    """
+
+    # 退避暂停已经包含在 wait() 中，重试前不再额外等待
+    retry_delay = 0
+
+    def __init__(
+        self,
+        delay,
+        min_delay=None,
+        max_delay=120,
+        speedup=0.9,
+        backoff=2.0,
+        jitter=0.5,
+    ):
+        super().__init__(delay)
+        self.min_delay = delay / 2 if min_delay is None else min_delay
+        self.max_delay = max_delay
+        self.speedup = speedup
+        self.backoff = backoff
+        self.jitter = jitter
+        self._delays = {}
+        self._failures = {}
+
+    def _host_delay(self, host):
+        return self._delays.get(host, self.delay)
+
+    def current_delay(self, url):
+        with self._lock:
+            return self._host_delay(urlsplit(url).hostname or '')
+
+    def record(self, url, response):
+        status, code, _ = classify_response(response)
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            delay = self._host_delay(host)
+            if code == "rate_limited":
+                failures = self._failures.get(host, 0) + 1
+                self._failures[host] = failures
+                pause = min(self.max_delay, max(self.delay, 1) * self.backoff ** failures)
+                pause *= 1 + random.uniform(0, self.jitter)
+                headers = getattr(response, "headers", None) or {}
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                if retry_after is not None:
+                    pause = max(pause, retry_after)
+                now = time.monotonic()
+                self._next_slot[host] = max(self._next_slot.get(host, now), now + pause)
+                self._delays[host] = min(self.max_delay, max(delay, 1) * self.backoff)
+            elif status == "ok":
+                self._failures[host] = 0
+                self._delays[host] = max(self.min_delay, delay * self.speedup)
+
+
+class TokenBucket:
+    """令牌桶：平均每秒发放 rate 个令牌，最多积攒 capacity 个。
+
+    多个线程共享同一个桶时，先到的调用预占令牌，等待时间在锁外完成。
+    rate 为 None 时不做限制。
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_at) * self.rate,
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            pause = -self._tokens / self.rate if self._tokens < 0 else 0
+        if pause > 0:
+            time.sleep(pause)
+
+
+class BudgetedSession:
+    """包装会话：每个 get 请求先从共享的 TokenBucket 取令牌。
+
+    批量备份时所有账号共用一个桶，总请求速率不随并发账号数增加。
+    """
+
+    def __init__(self, session, bucket):
+        self.session = session
+        self.bucket = bucket
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def get(self, url, **kwargs):
+        self.bucket.acquire()
+        return self.session.get(url, **kwargs)
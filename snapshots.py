@@ -0,0 +1,146 @@
+"""
+快照仓库
+按内容寻址保存每次备份：每个条目序列化后以 SHA-256 为名存为一个对象，每个收藏列表存为
+条目哈希数组对象，每次备份只写一份很小的清单（元数据 + 各收藏列表的对象哈希）。
+内容未变的条目和收藏列表在多次备份之间共用同一个对象，仓库增长只与实际变化的条目数有关。
+
+目录结构（位于备份目录下的 snapshots/）:
+    objects/<前两位>/<sha256>      条目或收藏列表对象（紧凑 JSON）
+    manifests/<备份名>.json        一次备份的清单，备份名与 douban_backup_<时间>.json 一致
+
+任意一次备份都可以用 restore 重建为原样的 douban_backup_<时间>.json；
+删除清单后用 gc 清理不再被任何清单引用的对象。
+"""
+import hashlib
+import json
+import os
+
+from backup_formats import save_backup
+from file_security import write_atomic
+from item_records import to_json_default
+
+SNAPSHOT_DIRNAME = 'snapshots'
+
+
+class SnapshotRepository:
+    """一个备份目录对应一个快照仓库（root 一般为 <备份目录>/snapshots）。"""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def manifest_path(self, name):
+        return os.path.join(self.manifests_dir, f"{name}.json")
+
+    def put_object(self, value):
+        """保存一个 JSON 值，返回 (哈希, 是否新写入)；内容相同的对象只保存一份。"""
+        content = json.dumps(
+            value, ensure_ascii=False, separators=(',', ':'), default=to_json_default
+        ).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, content, 'wb')
+        return digest, True
+
+    def get_object(self, digest):
+        with open(self._object_path(digest), 'r', encoding='utf-8') as file_obj:
+            return json.load(file_obj)
+
+    def commit(self, name, data, metadata):
+        """把 {分类: {收藏状态: [条目]}} 存为名为 name 的快照，返回 (清单路径, 新对象数, 复用对象数)。"""
+        created = reused = 0
+        tree = {}
+        for category, collections in data.items():
+            tree[category] = {}
+            for collection, items in collections.items():
+                digests = []
+                for item in items:
+                    digest, is_new = self.put_object(item)
+                    digests.append(digest)
+                    created += is_new
+                    reused += not is_new
+                list_digest, is_new = self.put_object(digests)
+                tree[category][collection] = list_digest
+                created += is_new
+                reused += not is_new
+
+        # 对象全部写完后才写清单，中途中断不会留下指向缺失对象的快照
+        manifest = {'metadata': metadata, 'data': tree}
+        path = self.manifest_path(name)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        write_atomic(path, json.dumps(manifest, ensure_ascii=False, indent=2))
+        return path, created, reused
+
+    def list_snapshots(self):
+        """按时间从旧到新返回快照名。"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(
+            name[:-len('.json')]
+            for name in os.listdir(self.manifests_dir)
+            if name.endswith('.json')
+        )
+
+    def _load_manifest(self, name):
+        with open(self.manifest_path(name), 'r', encoding='utf-8') as file_obj:
+            return json.load(file_obj)
+
+    def load(self, name):
+        """读取快照，返回与备份文件相同结构的 {'metadata': ..., 'data': ...}。"""
+        manifest = self._load_manifest(name)
+        data = {}
+        for category, collections in manifest['data'].items():
+            data[category] = {
+                collection: [self.get_object(digest) for digest in self.get_object(list_digest)]
+                for collection, list_digest in collections.items()
+            }
+        return {'metadata': manifest.get('metadata') or {}, 'data': data}
+
+    def restore(self, name, output_dir, fmt='json'):
+        """把快照按 fmt 格式重建为 output_dir 下的备份文件（默认 <快照名>.json），返回 (文件路径, 快照内容)。"""
+        payload = self.load(name)
+        path = save_backup(os.path.join(output_dir, name), payload['data'], payload['metadata'], fmt)
+        return path, payload
+
+    def gc(self, keep=None):
+        """keep 为正整数时先删除最新 keep 份之外的清单，再删除没有被任何清单引用的对象。
+
+        返回 (删除的快照名列表, 删除的对象数, 释放的字节数)。
+        """
+        names = self.list_snapshots()
+        removed_snapshots = []
+        if keep:
+            removed_snapshots = names[:-keep]
+            for name in removed_snapshots:
+                os.remove(self.manifest_path(name))
+            names = names[-keep:]
+
+        referenced = set()
+        for name in names:
+            for collections in self._load_manifest(name)['data'].values():
+                for list_digest in collections.values():
+                    if list_digest not in referenced:
+                        referenced.add(list_digest)
+                        referenced.update(self.get_object(list_digest))
+
+        removed_objects = freed_bytes = 0
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                for digest in os.listdir(prefix_dir):
+                    if digest in referenced:
+                        continue
+                    path = os.path.join(prefix_dir, digest)
+                    freed_bytes += os.path.getsize(path)
+                    os.remove(path)
+                    removed_objects += 1
+                if not os.listdir(prefix_dir):
+                    os.rmdir(prefix_dir)
+        return removed_snapshots, removed_objects, freed_bytes
@@ -0,0 +1,164 @@
+"""
+SQLite 备份库
+把条目写入备份目录下的 douban_backup.sqlite3：一张 items 表，主键为 (分类, 收藏状态, 豆瓣ID)，
+评分、日期和标题建有索引。爬取过程中每页一个事务批量写入，之后的运行按主键更新，
+完整备份结束时删除已不在该收藏列表中的条目（如从想看移到看过）。
+“什么时候标记的某部电影”“所有五星书籍”这类查询不必再读取整份 JSON。
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from item_records import to_json_default
+
+SQLITE_FILENAME = 'douban_backup.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    category TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    douban_id TEXT NOT NULL,
+    title TEXT,
+    rating INTEGER,
+    date TEXT,
+    comment TEXT,
+    data TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (category, collection, douban_id)
+);
+CREATE INDEX IF NOT EXISTS idx_items_rating ON items (rating);
+CREATE INDEX IF NOT EXISTS idx_items_date ON items (date);
+CREATE INDEX IF NOT EXISTS idx_items_title ON items (title);
+CREATE INDEX IF NOT EXISTS idx_items_douban_id ON items (douban_id);
+"""
+
+UPSERT_SQL = """
+INSERT INTO items (
+    category, collection, douban_id, title, rating, date, comment, data, first_seen, last_seen
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (category, collection, douban_id) DO UPDATE SET
+    title = excluded.title,
+    rating = excluded.rating,
+    date = excluded.date,
+    comment = excluded.comment,
+    data = excluded.data,
+    last_seen = excluded.last_seen
+"""
+
+QUERY_COLUMNS = ('category', 'collection', 'douban_id', 'title', 'rating', 'date', 'comment')
+
+
+def _rating_value(rating):
+    try:
+        value = int(rating)
+    except (TypeError, ValueError):
+        return None
+    return value or None
+
+
+class SqliteStore:
+    """一个备份目录对应一个 SQLite 库；多个分类并发爬取时写入串行化。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def upsert(self, category, collection, items):
+        """在一个事务中批量写入一页（或一个收藏列表）的条目。"""
+        now = datetime.now().astimezone().isoformat()
+        rows = [
+            (
+                category,
+                collection,
+                item['douban_id'],
+                item.get('title'),
+                _rating_value(item.get('rating')),
+                item.get('date') or None,
+                item.get('comment') or None,
+                json.dumps(item, ensure_ascii=False, default=to_json_default),
+                now,
+                now,
+            )
+            for item in items
+            if item.get('douban_id')
+        ]
+        if not rows:
+            return 0
+        with self._lock, self.connection:
+            self.connection.executemany(UPSERT_SQL, rows)
+        return len(rows)
+
+    def sync(self, all_data, prune=True):
+        """写入 {分类: {收藏状态: [条目]}}；prune 时删除各收藏列表中本次没有出现的条目。"""
+        total = 0
+        for category, collections in all_data.items():
+            for collection, items in collections.items():
+                total += self.upsert(category, collection, items)
+                if prune:
+                    ids = [item.get('douban_id') for item in items if item.get('douban_id')]
+                    with self._lock, self.connection:
+                        self.connection.execute(
+                            'DELETE FROM items WHERE category = ? AND collection = ? '
+                            'AND douban_id NOT IN (SELECT value FROM json_each(?))',
+                            (category, collection, json.dumps(ids)),
+                        )
+        return total
+
+    def query(
+        self,
+        categories=None,
+        collection=None,
+        douban_id=None,
+        title=None,
+        rating=None,
+        since=None,
+        until=None,
+        limit=50,
+    ):
+        """按条件查询条目，返回字典列表，按标记日期倒序；title 为标题前缀。"""
+        clauses = []
+        params = []
+        if categories:
+            clauses.append(f"category IN ({', '.join('?' for _ in categories)})")
+            params.extend(categories)
+        if collection:
+            clauses.append('collection = ?')
+            params.append(collection)
+        if douban_id:
+            clauses.append('douban_id = ?')
+            params.append(str(douban_id))
+        if title:
+            # 用范围条件代替 LIKE，走 title 索引
+            clauses.append('title >= ? AND title < ?')
+            params.extend([title, title + '\U0010ffff'])
+        if rating is not None:
+            clauses.append('rating = ?')
+            params.append(rating)
+        if since:
+            clauses.append('date >= ?')
+            params.append(since)
+        if until:
+            clauses.append('date <= ?')
+            params.append(until)
+
+        sql = f"SELECT {', '.join(QUERY_COLUMNS)} FROM items"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY date DESC, title LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return [dict(zip(QUERY_COLUMNS, row)) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self.connection.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
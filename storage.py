@@ -2,15 +2,19 @@
 数据存储模块
 支持保存为JSON和Excel格式（美化版）
 """
-import json
 import os
 from datetime import datetime
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import Cell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 from backup_metadata import merge_metadata, metadata_rows
 from config import DATA_DIR
 from excel_safety import sanitize_excel_value
+from backup_formats import BACKUP_EXTENSIONS, save_backup
+from metrics import NULL_METRICS
+from snapshots import SNAPSHOT_DIRNAME, SnapshotRepository
+from sqlite_store import SQLITE_FILENAME, SqliteStore
 
 
 # 星级显示
@@ -119,59 +123,193 @@ _HEADER_ALIGN = Alignment(horizontal='center', vertical='center')
 
 _ROW_EVEN_FILL = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
 _ROW_ODD_FILL = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid')
+_SUM_FILL = PatternFill(start_color='ECEFF1', end_color='ECEFF1', fill_type='solid')
 
 _TITLE_FONT = Font(name='Microsoft YaHei', size=11)
 _CELL_FONT = Font(name='Microsoft YaHei', size=10)
+_BOLD_FONT = Font(name='Microsoft YaHei', bold=True, size=11)
 _LINK_FONT = Font(name='Microsoft YaHei', size=10, color='1565C0', underline='single')
 _STAR_FONT = Font(name='Microsoft YaHei', size=10, color='FF8F00')
+_GROUP_FONT = Font(name='Microsoft YaHei', bold=True, size=12, color='FFFFFF')
+
+_CENTER_ALIGN = Alignment(horizontal='center')
+_WRAP_ALIGN = Alignment(vertical='center', wrap_text=True)
+_GROUP_ALIGN = Alignment(horizontal='left', vertical='center')
+
+# 类别 sheet 数据行的行高；用工作表默认行高代替逐行设置，写入时不必为每行保存尺寸对象
+_DATA_ROW_HEIGHT = 22
+
+# 类别 sheet 各种单元格的样式: 名称 -> (字体, 对齐)，每种再分奇偶行两个填充色
+_CELL_STYLES = {
+    'index': (_CELL_FONT, _CENTER_ALIGN),
+    'rating': (_STAR_FONT, _CENTER_ALIGN),
+    'title': (_TITLE_FONT, None),
+    'link': (_LINK_FONT, None),
+    'plain': (_CELL_FONT, None),
+    'text': (_CELL_FONT, _WRAP_ALIGN),
+}
+
+
+def _register_named_styles(wb):
+    """注册类别 sheet 用到的命名样式，返回 样式名 -> 样式数组。
+
+    流式写入时每个单元格直接复用注册好的样式数组，不再逐格创建字体、对齐等对象。
+    NamedStyle 注册后会绑定到工作簿，因此每个工作簿都要重新构建一份。
+    """
+    styles = [
+        NamedStyle(
+            name='douban_header',
+            font=_HEADER_FONT,
+            fill=_HEADER_FILL,
+            alignment=_HEADER_ALIGN,
+            border=_THIN_BORDER,
+        )
+    ]
+    for kind, (font, alignment) in _CELL_STYLES.items():
+        for parity, fill in (('even', _ROW_EVEN_FILL), ('odd', _ROW_ODD_FILL)):
+            style = NamedStyle(
+                name=f'douban_{kind}_{parity}',
+                font=font,
+                fill=fill,
+                border=_THIN_BORDER,
+            )
+            if alignment is not None:
+                style.alignment = alignment
+            styles.append(style)
+    colors = {color for statuses in _STATUS_ORDER.values() for _, _, color in statuses}
+    for color in sorted(colors):
+        styles.append(
+            NamedStyle(
+                name=f'douban_group_{color}',
+                font=_GROUP_FONT,
+                fill=PatternFill(start_color=color, end_color=color, fill_type='solid'),
+                alignment=_GROUP_ALIGN,
+            )
+        )
+
+    style_arrays = {}
+    for style in styles:
+        wb.add_named_style(style)
+        style_arrays[style.name] = style.as_tuple()
+    return style_arrays
+
+
+def _styled_cell(ws, value, style=None, font=None, fill=None, alignment=None, border=None):
+    """创建写入模式下的单元格；style 为 _register_named_styles 返回的样式数组。"""
+    cell = Cell(ws, row=1, column=1, value=value, style_array=style)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if alignment is not None:
+        cell.alignment = alignment
+    if border is not None:
+        cell.border = border
+    return cell
 
 
 class DataStorage:
-    def __init__(self, backup_dir=None, metadata=None):
-        self.backup_dir = backup_dir or os.path.join(DATA_DIR, 'backup')
+    DEFAULT_BACKUP_DIR = os.path.join(DATA_DIR, 'backup')
+
+    def __init__(self, backup_dir=None, metadata=None, metrics=None, snapshots=False, output_format='json'):
+        self.backup_dir = backup_dir or self.DEFAULT_BACKUP_DIR
         self.metadata = metadata or {}
+        self.metrics = metrics or NULL_METRICS
+        self.sqlite_store = None
+        # 快照模式：完整备份存入按内容去重的快照仓库，不再每次写整份 JSON 和 Excel
+        self.snapshots = SnapshotRepository(os.path.join(self.backup_dir, SNAPSHOT_DIRNAME))
+        self.snapshot_mode = snapshots
+        # 备份文件格式，见 backup_formats.BACKUP_FORMATS
+        self.output_format = output_format
         os.makedirs(self.backup_dir, exist_ok=True)
 
     def set_metadata(self, metadata):
         self.metadata = metadata or {}
 
-    def _build_payload(self, data, metadata=None):
-        return {
-            "metadata": merge_metadata(self.metadata, metadata),
-            "data": data,
-        }
-
     # ───────── JSON ─────────
 
     def save_json(self, data, filename, metadata=None):
-        filepath = os.path.join(self.backup_dir, f"{filename}.json")
-        payload = self._build_payload(data, metadata)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+        """按 output_format 写出备份文件（默认缩进 JSON），返回文件路径。"""
+        with self.metrics.timer('export_seconds', format=self.output_format):
+            filepath = save_backup(
+                os.path.join(self.backup_dir, filename),
+                data,
+                merge_metadata(self.metadata, metadata),
+                self.output_format,
+            )
         print(f"  已保存: {filepath}")
         return filepath
 
     def save_all_json(self, all_data):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if self.snapshot_mode:
+            return self.save_snapshot(all_data, f"douban_backup_{timestamp}")
         return self.save_json(all_data, f"douban_backup_{timestamp}")
 
+    # ───────── 快照 ─────────
+
+    def save_snapshot(self, data, name, metadata=None):
+        with self.metrics.timer('export_seconds', format='snapshot'):
+            path, created, reused = self.snapshots.commit(
+                name, data, merge_metadata(self.metadata, metadata)
+            )
+        print(f"  已保存快照: {path}（新对象 {created} 个，复用 {reused} 个）")
+        return path
+
+    def restore_snapshot(self, name):
+        """把快照重建为备份目录下的 <快照名>.json 和 .xlsx，返回两个文件路径。"""
+        json_path, payload = self.snapshots.restore(name, self.backup_dir, self.output_format)
+        print(f"  已保存: {json_path}")
+        excel_storage = DataStorage(self.backup_dir, metadata=payload['metadata'], metrics=self.metrics)
+        excel_path = excel_storage.save_excel(payload['data'], name)
+        return json_path, excel_path
+
+    def gc_snapshots(self, keep=None):
+        return self.snapshots.gc(keep=keep)
+
+    # ───────── SQLite ─────────
+
+    def open_sqlite(self):
+        """打开备份目录下的 SQLite 库（只打开一次），爬取时作为条目输出后端逐页写入。"""
+        if self.sqlite_store is None:
+            self.sqlite_store = SqliteStore(os.path.join(self.backup_dir, SQLITE_FILENAME))
+        return self.sqlite_store
+
+    def save_sqlite(self, data, prune=True):
+        """把完整数据同步到 SQLite 库；prune 时删除已不在对应收藏列表中的条目。"""
+        store = self.open_sqlite()
+        with self.metrics.timer('export_seconds', format='sqlite'):
+            store.sync(data, prune=prune)
+        print(f"  已保存: {store.path}")
+        return store.path
+
+    def close_sqlite(self):
+        if self.sqlite_store is not None:
+            self.sqlite_store.close()
+            self.sqlite_store = None
+
     # ───────── Excel ─────────
 
     def save_excel(self, data, filename):
+        """以写入模式流式生成工作簿，行数据边生成边写盘，内存占用不随条目数增长。"""
+        with self.metrics.timer('export_seconds', format='excel'):
+            return self._save_excel(data, filename)
+
+    def _save_excel(self, data, filename):
         filepath = os.path.join(self.backup_dir, f"{filename}.xlsx")
-        wb = Workbook()
-        wb.remove(wb.active)
+        wb = Workbook(write_only=True)
+        styles = _register_named_styles(wb)
 
-        self._write_metadata_sheet(wb, merge_metadata(self.metadata))
+        self._write_metadata_sheet(wb, merge_metadata(self.metadata), styles)
 
         # 1) 总览 sheet
-        self._write_overview_sheet(wb, data)
+        self._write_overview_sheet(wb, data, styles)
 
         # 2) 各类别 sheet
         for category in ['movies', 'books', 'music', 'games']:
             if category in data and data[category]:
                 cat_cn, _ = _CATEGORY_CN[category]
-                self._write_category_sheet(wb, cat_cn, category, data[category])
+                self._write_category_sheet(wb, cat_cn, category, data[category], styles)
 
         # 确保至少有一个 sheet
         if len(wb.sheetnames) == 0:
@@ -182,64 +320,68 @@ class DataStorage:
         return filepath
 
     def save_all_excel(self, all_data):
+        if self.snapshot_mode:
+            # Excel 不参与去重，需要时用 restore 从快照重建
+            return None
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         return self.save_excel(all_data, f"douban_backup_{timestamp}")
 
     # ───────── 总览 Sheet ─────────
 
-    def _write_metadata_sheet(self, wb, metadata):
-        ws = wb.create_sheet('元数据', 0)
+    def _write_metadata_sheet(self, wb, metadata, styles):
+        ws = wb.create_sheet('元数据')
         ws.column_dimensions['A'].width = 24
         ws.column_dimensions['B'].width = 48
 
-        for row_index, (key, value) in enumerate(metadata_rows(metadata), 1):
-            key_cell = ws.cell(row=row_index, column=1, value=key)
-            key_cell.font = _HEADER_FONT
-            key_cell.fill = _HEADER_FILL
-            key_cell.alignment = _HEADER_ALIGN
-            key_cell.border = _THIN_BORDER
-
-            value_cell = ws.cell(
-                row=row_index,
-                column=2,
-                value=sanitize_excel_value(value),
-            )
-            value_cell.font = _CELL_FONT
-            value_cell.alignment = Alignment(vertical='center', wrap_text=True)
-            value_cell.border = _THIN_BORDER
+        for key, value in metadata_rows(metadata):
+            ws.append([
+                _styled_cell(ws, key, style=styles['douban_header']),
+                _styled_cell(
+                    ws,
+                    sanitize_excel_value(value),
+                    font=_CELL_FONT,
+                    alignment=_WRAP_ALIGN,
+                    border=_THIN_BORDER,
+                ),
+            ])
+
+    def _write_overview_sheet(self, wb, data, styles):
+        ws = wb.create_sheet('总览')
+        status_labels = self._get_overview_status_labels(data)
+        headers = ['类别'] + status_labels + ['合计']
 
-    def _write_overview_sheet(self, wb, data):
-        ws = wb.create_sheet('总览', 1)
+        # 写入模式下列宽、行高和合并区域都要在对应行写出之前设置好
+        ws.column_dimensions['A'].width = 10
+        for i in range(2, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(i)].width = 12
+        ws.merged_cells.add('A1:F1')
+        ws.merged_cells.add('A2:F2')
+        ws.row_dimensions[1].height = 40
+        ws.row_dimensions[2].height = 22
+        ws.row_dimensions[4].height = 28
 
         # 标题
-        ws.merge_cells('A1:F1')
-        title_cell = ws['A1']
-        title_cell.value = '豆瓣数据备份报告'
-        title_cell.font = Font(name='Microsoft YaHei', bold=True, size=18, color='37474F')
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        ws.row_dimensions[1].height = 40
+        ws.append([_styled_cell(
+            ws,
+            '豆瓣数据备份报告',
+            font=Font(name='Microsoft YaHei', bold=True, size=18, color='37474F'),
+            alignment=Alignment(horizontal='center', vertical='center'),
+        )])
 
         # 导出时间
-        ws.merge_cells('A2:F2')
-        time_cell = ws['A2']
-        time_cell.value = f'导出时间: {datetime.now().strftime("%Y-%m-%d %H:%M")}'
-        time_cell.font = Font(name='Microsoft YaHei', size=11, color='757575')
-        time_cell.alignment = Alignment(horizontal='center')
-        ws.row_dimensions[2].height = 22
+        ws.append([_styled_cell(
+            ws,
+            f'导出时间: {datetime.now().strftime("%Y-%m-%d %H:%M")}',
+            font=Font(name='Microsoft YaHei', size=11, color='757575'),
+            alignment=_CENTER_ALIGN,
+        )])
 
         # 空行
+        ws.append([])
         row = 4
 
         # 统计表头
-        status_labels = self._get_overview_status_labels(data)
-        headers = ['类别'] + status_labels + ['合计']
-        for col_idx, h in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col_idx, value=h)
-            cell.font = _HEADER_FONT
-            cell.fill = _HEADER_FILL
-            cell.alignment = _HEADER_ALIGN
-            cell.border = _THIN_BORDER
-        ws.row_dimensions[row].height = 28
+        ws.append([_styled_cell(ws, h, style=styles['douban_header']) for h in headers])
 
         # 统计数据行
         totals_by_col = [0] * len(status_labels)
@@ -250,57 +392,50 @@ class DataStorage:
                 continue
             row += 1
             cat_cn, _ = _CATEGORY_CN[category]
-            ws.cell(row=row, column=1, value=cat_cn).font = Font(name='Microsoft YaHei', bold=True, size=11)
-            ws.cell(row=row, column=1).alignment = Alignment(horizontal='center')
-            ws.cell(row=row, column=1).border = _THIN_BORDER
+            # 交替行色
+            fill = _ROW_EVEN_FILL if (row % 2 == 0) else _ROW_ODD_FILL
+            cells = [_styled_cell(
+                ws, cat_cn, font=_BOLD_FONT, fill=fill,
+                alignment=_CENTER_ALIGN, border=_THIN_BORDER,
+            )]
 
             cat_total = 0
             for si, (status_key, _, _) in enumerate(_STATUS_ORDER[category]):
-                items = data[category].get(status_key, [])
-                count = len(items)
-                col = si + 2
-                cell = ws.cell(row=row, column=col, value=count)
-                cell.font = _CELL_FONT
-                cell.alignment = Alignment(horizontal='center')
-                cell.border = _THIN_BORDER
+                count = len(data[category].get(status_key, []))
+                cells.append(_styled_cell(
+                    ws, count, font=_CELL_FONT, fill=fill,
+                    alignment=_CENTER_ALIGN, border=_THIN_BORDER,
+                ))
                 if si < len(totals_by_col):
                     totals_by_col[si] += count
                 cat_total += count
 
-            total_cell = ws.cell(row=row, column=len(headers), value=cat_total)
-            total_cell.font = Font(name='Microsoft YaHei', bold=True, size=11)
-            total_cell.alignment = Alignment(horizontal='center')
-            total_cell.border = _THIN_BORDER
+            cells.append(_styled_cell(
+                ws, cat_total, font=_BOLD_FONT, fill=fill,
+                alignment=_CENTER_ALIGN, border=_THIN_BORDER,
+            ))
             grand_total += cat_total
-
-            # 交替行色
-            fill = _ROW_EVEN_FILL if (row % 2 == 0) else _ROW_ODD_FILL
-            for c in range(1, len(headers) + 1):
-                ws.cell(row=row, column=c).fill = fill
+            ws.append(cells)
 
         # 合计行
-        row += 1
-        ws.cell(row=row, column=1, value='合计').font = Font(name='Microsoft YaHei', bold=True, size=11)
-        ws.cell(row=row, column=1).alignment = Alignment(horizontal='center')
-        ws.cell(row=row, column=1).border = _THIN_BORDER
-        sum_fill = PatternFill(start_color='ECEFF1', end_color='ECEFF1', fill_type='solid')
-        ws.cell(row=row, column=1).fill = sum_fill
-        for si, t in enumerate(totals_by_col):
-            cell = ws.cell(row=row, column=si + 2, value=t)
-            cell.font = Font(name='Microsoft YaHei', bold=True, size=11)
-            cell.alignment = Alignment(horizontal='center')
-            cell.border = _THIN_BORDER
-            cell.fill = sum_fill
-        gt_cell = ws.cell(row=row, column=len(headers), value=grand_total)
-        gt_cell.font = Font(name='Microsoft YaHei', bold=True, size=11, color='D32F2F')
-        gt_cell.alignment = Alignment(horizontal='center')
-        gt_cell.border = _THIN_BORDER
-        gt_cell.fill = sum_fill
-
-        # 列宽
-        ws.column_dimensions['A'].width = 10
-        for i in range(2, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(i)].width = 12
+        cells = [_styled_cell(
+            ws, '合计', font=_BOLD_FONT, fill=_SUM_FILL,
+            alignment=_CENTER_ALIGN, border=_THIN_BORDER,
+        )]
+        for t in totals_by_col:
+            cells.append(_styled_cell(
+                ws, t, font=_BOLD_FONT, fill=_SUM_FILL,
+                alignment=_CENTER_ALIGN, border=_THIN_BORDER,
+            ))
+        cells.append(_styled_cell(
+            ws,
+            grand_total,
+            font=Font(name='Microsoft YaHei', bold=True, size=11, color='D32F2F'),
+            fill=_SUM_FILL,
+            alignment=_CENTER_ALIGN,
+            border=_THIN_BORDER,
+        ))
+        ws.append(cells)
 
     def _get_overview_status_labels(self, data):
         """根据实际数据决定总览表的状态列标签"""
@@ -318,113 +453,105 @@ class DataStorage:
 
     # ───────── 类别 Sheet ─────────
 
-    def _write_category_sheet(self, wb, sheet_name, category, cat_data):
+    def _write_category_sheet(self, wb, sheet_name, category, cat_data, styles):
         ws = wb.create_sheet(sheet_name)
         columns = _COLUMNS[category]
-        col_count = len(columns)
 
         # 设置列宽
         for ci, (_, _, width) in enumerate(columns, 1):
             ws.column_dimensions[get_column_letter(ci)].width = width
+        ws.sheet_format.defaultRowHeight = _DATA_ROW_HEIGHT
+        ws.sheet_format.customHeight = True
 
+        # 冻结到第一个表头行为止（分组标题行 + 表头行都保持可见）。
+        # 第一个非空分组总是从第 1 行开始，表头在第 2 行；写入模式下需在写出首行前设置。
+        if any(cat_data.get(status_key) for status_key, _, _ in _STATUS_ORDER[category]):
+            ws.freeze_panes = 'A3'
+
+        for row in self._iter_category_rows(ws, category, cat_data, styles):
+            ws.append(row)
+
+    def _iter_category_rows(self, ws, category, cat_data, styles):
+        """逐行生成类别 sheet 的单元格，分组标题行的合并区域和行高在生成该行时登记。"""
+        columns = _COLUMNS[category]
+        col_count = len(columns)
+        _, unit = _CATEGORY_CN[category]
         current_row = 1
-        first_header_row = None
 
         for status_key, status_label, color in _STATUS_ORDER[category]:
             items = cat_data.get(status_key, [])
             if not items:
                 continue
 
-            _, unit = _CATEGORY_CN[category]
-
             # ── 状态分组标题行 ──
-            ws.merge_cells(
-                start_row=current_row, start_column=1,
-                end_row=current_row, end_column=col_count
+            ws.merged_cells.add(
+                f'A{current_row}:{get_column_letter(col_count)}{current_row}'
             )
-            group_cell = ws.cell(row=current_row, column=1)
-            group_cell.value = f'  {status_label} ({len(items)}{unit})'
-            group_cell.font = Font(name='Microsoft YaHei', bold=True, size=12, color='FFFFFF')
-            group_cell.fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
-            group_cell.alignment = Alignment(horizontal='left', vertical='center')
             ws.row_dimensions[current_row].height = 30
+            yield [_styled_cell(
+                ws,
+                f'  {status_label} ({len(items)}{unit})',
+                style=styles[f'douban_group_{color}'],
+            )]
             current_row += 1
 
             # ── 表头行 ──
-            for ci, (_, header, _) in enumerate(columns, 1):
-                cell = ws.cell(row=current_row, column=ci, value=header)
-                cell.font = _HEADER_FONT
-                cell.fill = _HEADER_FILL
-                cell.alignment = _HEADER_ALIGN
-                cell.border = _THIN_BORDER
             ws.row_dimensions[current_row].height = 26
-            if first_header_row is None:
-                first_header_row = current_row
+            yield [_styled_cell(ws, header, style=styles['douban_header']) for _, header, _ in columns]
             current_row += 1
 
             # ── 数据行 ──
             for idx, item in enumerate(items, 1):
-                fill = _ROW_EVEN_FILL if (idx % 2 == 0) else _ROW_ODD_FILL
-
-                for ci, (key, _, _) in enumerate(columns, 1):
-                    if key == '_index':
-                        value = idx
-                        cell = ws.cell(row=current_row, column=ci, value=value)
-                        cell.font = _CELL_FONT
-                        cell.alignment = Alignment(horizontal='center')
-                    elif key == '_link':
-                        douban_id = item.get('douban_id', '')
-                        item_type = item.get('type', category.rstrip('s'))
-                        prefix = _LINK_PREFIX.get(item_type, 'https://www.douban.com/subject/')
-                        if douban_id:
-                            link_url = f'{prefix}{douban_id}/'
-                            cell = ws.cell(row=current_row, column=ci)
-                            cell.value = link_url
-                            cell.hyperlink = link_url
-                            cell.font = _LINK_FONT
-                        else:
-                            cell = ws.cell(row=current_row, column=ci, value='')
-                            cell.font = _CELL_FONT
-                    elif key == 'rating':
-                        cell = ws.cell(row=current_row, column=ci, value=_rating_to_stars(item.get(key, '')))
-                        cell.font = _STAR_FONT
-                        cell.alignment = Alignment(horizontal='center')
-                    elif key == 'title':
-                        cell = ws.cell(
-                            row=current_row,
-                            column=ci,
-                            value=sanitize_excel_value(item.get(key, ''))
-                        )
-                        cell.font = _TITLE_FONT
-                    else:
-                        cell = ws.cell(
-                            row=current_row,
-                            column=ci,
-                            value=sanitize_excel_value(item.get(key, ''))
-                        )
-                        cell.font = _CELL_FONT
-
-                    cell.fill = fill
-                    cell.border = _THIN_BORDER
-                    if key not in ('_index', 'rating', '_link', 'title'):
-                        cell.alignment = Alignment(vertical='center', wrap_text=True)
-
-                ws.row_dimensions[current_row].height = 22
+                yield self._category_row(ws, category, columns, idx, item, styles)
                 current_row += 1
 
             # 分组间空一行
+            yield []
             current_row += 1
 
-        # 冻结到第一个表头行为止（分组标题行 + 表头行都保持可见）
-        if first_header_row is not None:
-            ws.freeze_panes = f'A{first_header_row + 1}'
+    def _category_row(self, ws, category, columns, idx, item, styles):
+        parity = 'even' if idx % 2 == 0 else 'odd'
+        cells = []
+        for key, _, _ in columns:
+            if key == '_index':
+                cell = _styled_cell(ws, idx, style=styles[f'douban_index_{parity}'])
+            elif key == '_link':
+                douban_id = item.get('douban_id', '')
+                item_type = item.get('type', category.rstrip('s'))
+                prefix = _LINK_PREFIX.get(item_type, 'https://www.douban.com/subject/')
+                if douban_id:
+                    link_url = f'{prefix}{douban_id}/'
+                    cell = _styled_cell(ws, link_url, style=styles[f'douban_link_{parity}'])
+                    cell.hyperlink = link_url
+                else:
+                    cell = _styled_cell(ws, '', style=styles[f'douban_plain_{parity}'])
+            elif key == 'rating':
+                cell = _styled_cell(
+                    ws,
+                    _rating_to_stars(item.get(key, '')),
+                    style=styles[f'douban_rating_{parity}'],
+                )
+            elif key == 'title':
+                cell = _styled_cell(
+                    ws,
+                    sanitize_excel_value(item.get(key, '')),
+                    style=styles[f'douban_title_{parity}'],
+                )
+            else:
+                cell = _styled_cell(
+                    ws,
+                    sanitize_excel_value(item.get(key, '')),
+                    style=styles[f'douban_text_{parity}'],
+                )
+            cells.append(cell)
+        return cells
 
     # ───────── 备份列表 ─────────
 
     def get_backup_list(self):
         files = []
         for f in os.listdir(self.backup_dir):
-            if f.endswith(('.json', '.xlsx')):
+            if f.endswith((*BACKUP_EXTENSIONS, '.xlsx', '.sqlite3')):
                 filepath = os.path.join(self.backup_dir, f)
                 files.append({
                     'name': f,
@@ -432,4 +559,13 @@ class DataStorage:
                     'size': os.path.getsize(filepath),
                     'modified': datetime.fromtimestamp(os.path.getmtime(filepath)).strftime('%Y-%m-%d %H:%M:%S')
                 })
+        for name in self.snapshots.list_snapshots():
+            filepath = self.snapshots.manifest_path(name)
+            files.append({
+                'name': f"{name} (快照)",
+                'path': filepath,
+                'size': os.path.getsize(filepath),
+                'modified': datetime.fromtimestamp(os.path.getmtime(filepath)).strftime('%Y-%m-%d %H:%M:%S'),
+                'snapshot': name,
+            })
         return sorted(files, key=lambda x: x['modified'], reverse=True)
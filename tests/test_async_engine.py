@@ -0,0 +1,149 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import async_engine
+from backup_state import BackupState
+from movies import MovieCrawler
+from rate_limit import BudgetedSession
+
+
+def movie_page(start, next_start=None):
+    items = "".join(
+        f'<div class="item"><div class="info"><ul><li class="title">'
+        f'<a href="https://movie.douban.com/subject/{start + index}/">'
+        f"Movie {start + index}</a></li></ul></div></div>"
+        for index in range(15)
+    )
+    if next_start is None:
+        paginator = '<span class="next">后页</span>'
+    else:
+        paginator = (
+            f'<span class="next"><a href="/people/demo/collect?start={next_start}'
+            f'&amp;sort=time">后页</a></span>'
+        )
+    return f"<html><body>{items}{paginator}</body></html>"
+
+
+class FakeResponse:
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.headers = {}
+
+
+class FakeClient:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get(self, url):
+        self.requested.append(url)
+        start = 0
+        if "start=" in url:
+            start = int(url.split("start=")[1].split("&")[0])
+        if start not in self.pages:
+            return FakeResponse(url, "", status_code=404)
+        return FakeResponse(url, self.pages[start])
+
+
+class CountingBucket:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+class AsyncEngineTests(unittest.TestCase):
+    def crawl(self, client, state_store=None, session=None):
+        crawler = MovieCrawler(
+            session=session,
+            state_store=state_store,
+            request_delay=0,
+            engine="async",
+        )
+        with patch.object(async_engine, "create_client", return_value=client):
+            data = crawler.crawl_collection(
+                "https://movie.douban.com/people/demo/collect", "collect"
+            )
+        return crawler, data
+
+    def test_async_engine_uses_existing_parsers_and_pagination(self):
+        client = FakeClient({0: movie_page(0, 15), 15: movie_page(15, 30), 30: movie_page(30)})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            crawler, data = self.crawl(client, state_store=state)
+
+            self.assertTrue(state.is_collection_complete("movies", "collect"))
+
+        self.assertFalse(crawler.incomplete)
+        self.assertEqual(
+            [item["douban_id"] for item in data], [str(index) for index in range(45)]
+        )
+
+    def test_prefetched_page_is_not_requested_twice(self):
+        client = FakeClient({0: movie_page(0, 15), 15: movie_page(15, 30), 30: movie_page(30)})
+
+        self.crawl(client)
+
+        third_page = [url for url in client.requested if "start=30" in url]
+        self.assertEqual(len(third_page), 1)
+
+    def test_not_found_is_not_retried(self):
+        client = FakeClient({})
+
+        crawler, data = self.crawl(client)
+
+        self.assertTrue(crawler.incomplete)
+        self.assertEqual(data, [])
+        self.assertEqual(len(client.requested), 1)
+
+    def test_server_errors_are_retried(self):
+        client = FakeClient({})
+
+        async def fake_get(url):
+            client.requested.append(url)
+            return FakeResponse(url, "", status_code=503)
+
+        async def no_wait(_seconds):
+            return None
+
+        client.get = fake_get
+        with patch("async_engine.asyncio.sleep", side_effect=no_wait):
+            crawler, _ = self.crawl(client)
+
+        self.assertTrue(crawler.incomplete)
+        self.assertEqual(len(client.requested), 3)
+
+    def test_every_request_takes_a_token_from_the_shared_budget(self):
+        client = FakeClient({0: movie_page(0, 15), 15: movie_page(15, 30), 30: movie_page(30)})
+        bucket = CountingBucket()
+
+        self.crawl(client, session=BudgetedSession(None, bucket))
+
+        # 预取的下一页同样计入预算
+        self.assertEqual(bucket.acquired, len(client.requested))
+        self.assertGreaterEqual(bucket.acquired, 3)
+
+    def test_predict_next_url_advances_start_offset(self):
+        self.assertTrue(
+            async_engine.is_same_page(
+                async_engine.predict_next_url(
+                    "https://movie.douban.com/people/demo/collect?start=15&sort=time", 15
+                ),
+                "https://movie.douban.com/people/demo/collect?sort=time&start=30",
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import Mock
+
+from auth import DoubanAuth, is_login_page, parse_user_info
+
+
+class DummyResponse:
+    def __init__(self, url, text=""):
+        self.url = url
+        self.text = text
+
+
+class CookieLoginTests(unittest.TestCase):
+    def make_auth(self, tmpdir, response):
+        session = Mock()
+        session.get.return_value = response
+        auth = DoubanAuth(session)
+        auth.cookies_file = os.path.join(tmpdir, "cookies.json")
+        auth.user_info_file = os.path.join(tmpdir, "user_info.json")
+        with open(auth.cookies_file, "w", encoding="utf-8") as file_obj:
+            json.dump({"dbcl2": "token"}, file_obj)
+        return auth, session
+
+    def test_one_mine_request_verifies_login_and_saves_user_info(self):
+        response = DummyResponse(
+            "https://www.douban.com/people/demo/",
+            '<div class="info"><h1>测试用户</h1></div>',
+        )
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            auth, session = self.make_auth(tmpdir, response)
+
+            self.assertTrue(auth.login_with_cookies())
+            with open(auth.user_info_file, encoding="utf-8") as file_obj:
+                user_info = json.load(file_obj)
+
+        session.get.assert_called_once_with(
+            "https://www.douban.com/mine/", timeout=30, allow_redirects=True
+        )
+        self.assertEqual(user_info, {"id": "demo", "name": "测试用户"})
+
+    def test_redirect_to_login_page_fails(self):
+        response = DummyResponse(
+            "https://accounts.douban.com/passport/login?redir=https%3A%2F%2Fwww.douban.com%2Fmine%2F"
+        )
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            auth, session = self.make_auth(tmpdir, response)
+
+            self.assertFalse(auth.login_with_cookies())
+            self.assertFalse(os.path.exists(auth.user_info_file))
+
+        session.get.assert_called_once()
+
+
+class ParseUserInfoTests(unittest.TestCase):
+    def test_login_page_detection(self):
+        self.assertTrue(is_login_page("https://www.douban.com/accounts/login"))
+        self.assertTrue(is_login_page("https://accounts.douban.com/passport/login"))
+        self.assertFalse(is_login_page("https://www.douban.com/people/demo/"))
+
+    def test_returns_none_without_people_url(self):
+        self.assertIsNone(parse_user_info(DummyResponse("https://www.douban.com/")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from openpyxl import load_workbook
+
+import main
+from backup_diff import diff_backups, save_diff_report
+from crawl_public import save_json as public_save_json
+from item_records import MovieItem
+from storage import DataStorage
+
+
+def movie(douban_id, title, rating="", comment=""):
+    return MovieItem(douban_id=douban_id, title=title, rating=rating, comment=comment, date="2024-01-01")
+
+
+OLD = {
+    "movies": {
+        "wish": [movie("1", "花样年华"), movie("2", "阿飞正传")],
+        "collect": [movie("3", "重庆森林", "4", "好看"), movie("4", "堕落天使", "3")],
+    },
+}
+NEW = {
+    "movies": {
+        "wish": [movie("2", "阿飞正传"), movie("5", "春光乍泄")],
+        "collect": [
+            movie("1", "花样年华", "5"),
+            movie("3", "重庆森林", "5", "很好看"),
+        ],
+    },
+}
+
+
+class BackupDiffTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        storage = DataStorage(backup_dir=self.tmpdir.name)
+        with redirect_stdout(StringIO()):
+            self.old_path = storage.save_json(OLD, "douban_backup_20240101_000000")
+            self.new_path = storage.save_json(NEW, "douban_backup_20240102_000000")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reports_each_kind_of_change(self):
+        diff = diff_backups(self.old_path, self.new_path)
+
+        changes = {(change["change"], change["douban_id"]) for change in diff["changes"]}
+        self.assertEqual(
+            changes,
+            {
+                ("added", "5"),
+                ("removed", "4"),
+                ("moved", "1"),
+                ("rerated", "1"),
+                ("rerated", "3"),
+                ("comment_edited", "3"),
+            },
+        )
+        moved = next(change for change in diff["changes"] if change["change"] == "moved")
+        self.assertEqual((moved["old_value"], moved["new_value"]), ("wish", "collect"))
+        self.assertEqual(
+            diff["summary"],
+            {"added": 1, "removed": 1, "moved": 1, "rerated": 2, "comment_edited": 1},
+        )
+
+    def test_identical_backups_have_no_changes(self):
+        diff = diff_backups(self.old_path, self.old_path)
+
+        self.assertEqual(diff["changes"], [])
+
+    def test_single_category_public_files_are_compared_by_category(self):
+        with redirect_stdout(StringIO()):
+            old_path = public_save_json(
+                {"collect": [{"douban_id": "1", "title": "一一", "rating": "4"}]},
+                "movies_old",
+                metadata={"selected_categories": ["movies"]},
+                output_dir=self.tmpdir.name,
+            )
+        diff = diff_backups(old_path, self.new_path)
+
+        rerated = [change for change in diff["changes"] if change["change"] == "rerated"]
+        self.assertEqual([(change["category"], change["new_value"]) for change in rerated], [("movies", "5")])
+
+    def test_writes_json_and_excel_reports(self):
+        diff = diff_backups(self.old_path, self.new_path)
+        json_path, excel_path = save_diff_report(diff, self.tmpdir.name, "20240102_000000")
+
+        with open(json_path, "r", encoding="utf-8") as file_obj:
+            payload = json.load(file_obj)
+        workbook = load_workbook(excel_path)
+
+        self.assertEqual(payload["data"]["changes"], diff["changes"])
+        self.assertEqual(payload["metadata"]["new_backup"], os.path.abspath(self.new_path))
+        self.assertEqual(workbook.sheetnames, ["汇总", "变化明细"])
+        self.assertEqual(workbook["变化明细"].max_row, len(diff["changes"]) + 1)
+
+    def test_diff_command_compares_latest_two_backups(self):
+        with patch("main.DoubanBackup") as backup_cls, redirect_stdout(StringIO()):
+            diff = main.main(["diff", "--output", self.tmpdir.name])
+
+        backup_cls.assert_not_called()
+        self.assertEqual(diff["old"], os.path.abspath(self.old_path))
+        self.assertEqual(diff["new"], os.path.abspath(self.new_path))
+        self.assertTrue(
+            any(name.startswith("douban_diff_") for name in os.listdir(self.tmpdir.name))
+        )
+
+    def test_backup_arguments_require_diff_command(self):
+        with patch("sys.stderr"), self.assertRaises(SystemExit):
+            main.parse_args(["list", self.old_path, self.new_path])
+
+
+if __name__ == "__main__":
+    unittest.main()
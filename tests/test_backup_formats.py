@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+import main
+from backup_diff import diff_backups
+from backup_formats import (
+    BACKUP_FORMATS,
+    format_error,
+    is_format_available,
+    load_backup,
+    open_backup_reader,
+    save_backup,
+)
+from crawl_public import save_combined_json, save_json as public_save_json
+from incremental import find_latest_backup
+from item_records import MovieItem
+from storage import DataStorage
+
+METADATA = {"backup_mode": "authenticated", "user_id": "demo"}
+DATA = {
+    "movies": {
+        "collect": [MovieItem(douban_id="1", title="一一", rating="5", tags="家庭")],
+        "wish": [],
+    },
+    "books": {"collect": [{"douban_id": "9", "title": "活着", "type": "book"}]},
+}
+EXPECTED_DATA = {
+    "movies": {"collect": [DATA["movies"]["collect"][0].to_dict()], "wish": []},
+    "books": DATA["books"],
+}
+
+
+class BackupFormatTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def available_formats(self):
+        return [fmt for fmt in BACKUP_FORMATS if is_format_available(fmt)]
+
+    def test_every_available_format_round_trips(self):
+        for fmt in self.available_formats():
+            with self.subTest(fmt=fmt):
+                path = save_backup(os.path.join(self.tmpdir.name, f"backup_{fmt}"), DATA, METADATA, fmt)
+
+                self.assertEqual(load_backup(path), {"metadata": METADATA, "data": EXPECTED_DATA})
+                with open_backup_reader(path) as reader:
+                    self.assertEqual(reader.metadata, METADATA)
+                    self.assertEqual(
+                        [keys for keys, _ in reader.iter_items()],
+                        [("movies", "collect"), ("books", "collect")],
+                    )
+
+    def test_compact_and_compressed_formats_are_smaller(self):
+        sizes = {
+            fmt: os.path.getsize(
+                save_backup(os.path.join(self.tmpdir.name, f"backup_{fmt}"), DATA, METADATA, fmt)
+            )
+            for fmt in ("json", "compact", "gzip")
+        }
+
+        self.assertLess(sizes["compact"], sizes["json"])
+        self.assertLess(sizes["gzip"], sizes["json"])
+
+    def test_missing_optional_dependencies_are_reported(self):
+        with patch("backup_formats.zstandard", None), patch("backup_formats.msgpack", None):
+            self.assertIn("zstandard", format_error("zstd"))
+            self.assertIn("msgpack", format_error("msgpack"))
+            with self.assertRaises(RuntimeError):
+                save_backup(os.path.join(self.tmpdir.name, "backup"), DATA, METADATA, "zstd")
+        self.assertIsNone(format_error("gzip"))
+
+    def test_storage_lists_and_incremental_reads_other_formats(self):
+        with redirect_stdout(StringIO()):
+            storage = DataStorage(backup_dir=self.tmpdir.name, metadata=METADATA, output_format="ndjson")
+            storage.save_json(DATA, "douban_backup_20240101_000000")
+            storage.output_format = "gzip"
+            storage.save_json(DATA, "douban_backup_20240102_000000")
+
+            names = sorted(backup["name"] for backup in storage.get_backup_list())
+            latest = find_latest_backup(self.tmpdir.name, user_id="demo")
+
+        self.assertEqual(
+            names,
+            ["douban_backup_20240101_000000.ndjson", "douban_backup_20240102_000000.json.gz"],
+        )
+        self.assertEqual(latest["data"], EXPECTED_DATA)
+
+    def test_diff_compares_backups_in_different_formats(self):
+        old_path = save_backup(os.path.join(self.tmpdir.name, "old"), DATA, METADATA, "ndjson")
+        new_data = {"movies": {"collect": [MovieItem(douban_id="1", title="一一", rating="4")]}}
+        new_path = save_backup(os.path.join(self.tmpdir.name, "new"), new_data, METADATA, "gzip")
+
+        diff = diff_backups(old_path, new_path)
+
+        self.assertEqual(diff["summary"]["rerated"], 1)
+        self.assertEqual(diff["summary"]["removed"], 1)
+
+    def test_public_combined_file_uses_chosen_format(self):
+        with redirect_stdout(StringIO()):
+            category_path = public_save_json(
+                DATA["movies"], "movies_x", output_dir=self.tmpdir.name, output_format="compact"
+            )
+            combined = save_combined_json(
+                [("movies", category_path)],
+                "douban_backup_x",
+                output_dir=self.tmpdir.name,
+                output_format="gzip",
+                data={"movies": DATA["movies"]},
+            )
+
+        self.assertTrue(combined.endswith(".json.gz"))
+        self.assertEqual(load_backup(combined)["data"], {"movies": EXPECTED_DATA["movies"]})
+
+    def test_cli_refuses_unavailable_format_before_backup(self):
+        with patch("main.format_error", return_value="zstd 格式需要安装 zstandard"), patch(
+            "main.DoubanBackup"
+        ) as backup_cls, redirect_stdout(StringIO()):
+            result = main.main(["--format", "zstd"])
+
+        self.assertFalse(result)
+        backup_cls.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
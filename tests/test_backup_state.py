@@ -1,5 +1,7 @@
+import json
 import os
 import tempfile
+import threading
 import unittest
 
 
@@ -79,7 +81,151 @@ class BackupStateTests(unittest.TestCase):
             )
 
             self.assertTrue(os.path.exists(state.path))
-            self.assertFalse(os.path.exists(f"{state.path}.tmp"))
+            self.assertEqual([name for name in os.listdir(tmpdir) if name.endswith(".tmp")], [])
+
+    def test_progress_appends_only_new_items_to_journal(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            first_page = [{"title": "Movie A"}]
+            state.update_progress("movies", "collect", "page-1", "page-2", first_page)
+            both_pages = first_page + [{"title": "Movie B"}]
+            state.update_progress("movies", "collect", "page-2", "page-3", both_pages)
+
+            with open(state.journal_path, "r", encoding="utf-8") as file_obj:
+                records = [json.loads(line) for line in file_obj]
+
+            self.assertEqual(len(records), 1)
+            self.assertEqual(records[0]["items"], [{"title": "Movie B"}])
+
+            reloaded = BackupState(tmpdir, user_id="demo")
+            self.assertEqual(reloaded.get_partial_items("movies", "collect"), both_pages)
+            self.assertEqual(reloaded.get_resume_url("movies", "collect"), "page-3")
+
+    def test_journal_is_compacted_into_snapshot(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            state.COMPACT_EVERY = 3
+            items = []
+            for page in range(6):
+                items.append({"title": f"Movie {page}"})
+                state.update_progress(
+                    "movies", "collect", f"page-{page}", f"page-{page + 1}", items
+                )
+
+            self.assertLessEqual(state.journal_records, 3)
+            reloaded = BackupState(tmpdir, user_id="demo")
+            self.assertEqual(reloaded.get_partial_items("movies", "collect"), items)
+
+    def test_torn_journal_tail_is_ignored(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            state.update_progress("movies", "collect", "page-1", "page-2", [])
+            state.update_progress(
+                "movies", "collect", "page-2", "page-3", [{"title": "Movie A"}]
+            )
+            with open(state.journal_path, "a", encoding="utf-8") as file_obj:
+                file_obj.write('{"seq": 99, "category": "mov')
+
+            reloaded = BackupState(tmpdir, user_id="demo")
+            self.assertEqual(
+                reloaded.get_partial_items("movies", "collect"),
+                [{"title": "Movie A"}],
+            )
+
+    def test_checkpoints_after_resuming_from_torn_journal_survive(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            state.update_progress("movies", "collect", "page-1", "page-2", [])
+            state.update_progress(
+                "movies", "collect", "page-2", "page-3", [{"title": "Movie A"}]
+            )
+            with open(state.journal_path, "a", encoding="utf-8") as file_obj:
+                file_obj.write('{"seq": 3, "categ')
+
+            resumed = BackupState(tmpdir, user_id="demo")
+            items = [{"title": "Movie A"}, {"title": "Movie B"}]
+            resumed.update_progress("movies", "collect", "page-3", "page-4", items)
+            items = items + [{"title": "Movie C"}]
+            resumed.update_progress("movies", "collect", "page-4", "page-5", items)
+
+            reloaded = BackupState(tmpdir, user_id="demo")
+            self.assertEqual(reloaded.get_partial_items("movies", "collect"), items)
+            self.assertEqual(reloaded.get_resume_url("movies", "collect"), "page-5")
+
+    def test_journal_already_in_snapshot_is_not_replayed_twice(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            state.update_progress("movies", "collect", "page-1", "page-2", [])
+            state.update_progress(
+                "movies", "collect", "page-2", "page-3", [{"title": "Movie A"}]
+            )
+            with open(state.journal_path, "r", encoding="utf-8") as file_obj:
+                journal = file_obj.read()
+            state.compact()
+            with open(state.journal_path, "w", encoding="utf-8") as file_obj:
+                file_obj.write(journal)
+
+            reloaded = BackupState(tmpdir, user_id="demo")
+            self.assertEqual(
+                reloaded.get_partial_items("movies", "collect"),
+                [{"title": "Movie A"}],
+            )
+
+    def test_concurrent_checkpoints_from_several_categories(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            state.COMPACT_EVERY = 7
+
+            def crawl(category):
+                items = []
+                for page in range(20):
+                    items.append({"title": f"{category} {page}"})
+                    state.update_progress(
+                        category, "collect", f"page-{page}", f"page-{page + 1}", items
+                    )
+                state.mark_complete(category, "collect", items)
+
+            categories = ["movies", "books", "music", "games"]
+            threads = [
+                threading.Thread(target=crawl, args=(category,))
+                for category in categories
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            reloaded = BackupState(tmpdir, user_id="demo")
+            for category in categories:
+                self.assertTrue(reloaded.is_collection_complete(category, "collect"))
+                self.assertEqual(
+                    len(reloaded.get_partial_items(category, "collect")), 20
+                )
+
+    def test_clear_removes_journal(self):
+        from backup_state import BackupState
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            state.update_progress("movies", "collect", "page-1", "page-2", [])
+            state.update_progress("movies", "collect", "page-2", "page-3", [])
+
+            state.clear()
+
+            self.assertFalse(os.path.exists(state.path))
+            self.assertFalse(os.path.exists(state.journal_path))
 
 
 if __name__ == "__main__":
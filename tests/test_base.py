@@ -1,5 +1,7 @@
 import tempfile
 import unittest
+from contextlib import redirect_stdout
+from io import StringIO
 from unittest.mock import Mock, patch
 
 from backup_state import BackupState
@@ -7,6 +9,8 @@ from base import BaseCrawler
 from books import BookCrawler
 from config import DELAY_BETWEEN_REQUESTS
 from games import GameCrawler
+from incremental import KnownItems
+from metrics import MeteredSession, RunMetrics
 from movies import MovieCrawler
 from music import MusicCrawler
 
@@ -24,10 +28,10 @@ class DummyCrawler(BaseCrawler):
         self.items = list(items or [])
         self.next_url = next_url
 
-    def _parse_items(self, response, collection_type=None):
+    def _parse_items(self, soup, collection_type=None):
         return list(self.items)
 
-    def _get_pagination(self, response):
+    def _get_pagination(self, soup):
         return self.next_url
 
 
@@ -64,6 +68,49 @@ class BaseCrawlerTests(unittest.TestCase):
         self.assertIs(crawler._make_request("https://example.test/error"), response)
         self.assertEqual(session.get.call_count, 3)
 
+    @patch("base.time.sleep")
+    def test_metrics_record_retries_pages_and_parse_time(self, _sleep):
+        session = Mock()
+        session.get.side_effect = [DummyResponse(status_code=503), DummyResponse()]
+        metrics = RunMetrics()
+        crawler = DummyCrawler(
+            MeteredSession(session, metrics), items=[{"douban_id": "1"}]
+        )
+        crawler.metrics = metrics
+
+        with redirect_stdout(StringIO()):
+            crawler.crawl("https://example.test/page", "collect")
+
+        counters = {
+            (entry["name"], tuple(entry["labels"].items())): entry["value"]
+            for entry in metrics.to_dict()["counters"]
+        }
+        self.assertEqual(counters[("retries_total", (("code", "server_error"),))], 1)
+        self.assertEqual(counters[("pages_total", (("category", "movies"),))], 1)
+        self.assertEqual(counters[("items_total", (("category", "movies"),))], 1)
+        histogram_names = {entry["name"] for entry in metrics.to_dict()["histograms"]}
+        self.assertTrue(
+            {"request_seconds", "parse_seconds", "collection_seconds"} <= histogram_names
+        )
+
+    @patch("base.time.sleep")
+    def test_adaptive_limiter_sees_every_response_and_replaces_fixed_sleep(self, sleep):
+        session = Mock()
+        session.get.side_effect = [
+            DummyResponse(status_code=429),
+            DummyResponse(),
+        ]
+        throttle = Mock(retry_delay=0)
+        crawler = DummyCrawler(session)
+        crawler.throttle = throttle
+
+        response = crawler._make_request("https://example.test/limited")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(throttle.wait.call_count, 2)
+        self.assertEqual(throttle.record.call_count, 2)
+        sleep.assert_not_called()
+
     @patch("base.time.sleep")
     def test_full_page_without_pagination_keeps_checkpoint_incomplete(self, _sleep):
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -102,6 +149,56 @@ class BaseCrawlerTests(unittest.TestCase):
             self.assertEqual(len(result), 1)
             self.assertTrue(state.is_collection_complete("movies", "collect"))
 
+    @patch("base.time.sleep")
+    def test_each_page_is_parsed_once(self, _sleep):
+        session = Mock()
+        session.get.return_value = DummyResponse("<html><body></body></html>")
+        crawler = DummyCrawler(session, items=[{"title": "only item"}])
+
+        with patch.object(
+            crawler, "_parse_document", wraps=crawler._parse_document
+        ) as parse_document:
+            crawler.crawl("https://example.test/page", "collect")
+
+        parse_document.assert_called_once_with("<html><body></body></html>")
+
+    @patch("base.time.sleep")
+    def test_incremental_crawl_stops_at_known_page_and_merges(self, _sleep):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            known_page = [{"douban_id": str(index)} for index in range(15)]
+            older = [{"douban_id": str(index)} for index in range(15, 20)]
+            known_items = KnownItems({"movies": {"collect": known_page + older}})
+            session = Mock()
+            session.get.return_value = DummyResponse("<html><body></body></html>")
+            crawler = DummyCrawler(
+                session,
+                state_store=state,
+                items=known_page,
+                next_url="https://example.test/page?start=15",
+            )
+            crawler.known_items = known_items
+
+            result = crawler.crawl_collection("https://example.test/page", "collect")
+
+            session.get.assert_called_once()
+            self.assertEqual(result, known_page + older)
+            self.assertTrue(state.is_collection_complete("movies", "collect"))
+
+    @patch("base.time.sleep")
+    def test_item_sink_receives_each_page(self, _sleep):
+        session = Mock()
+        session.get.return_value = DummyResponse("<html><body></body></html>")
+        crawler = DummyCrawler(session, items=[{"douban_id": "1"}])
+        crawler.item_sink = Mock()
+
+        with redirect_stdout(StringIO()):
+            crawler.crawl("https://example.test/page", "collect")
+
+        crawler.item_sink.upsert.assert_called_once_with(
+            "movies", "collect", [{"douban_id": "1"}]
+        )
+
 
 class CrawlerRequestDelayTests(unittest.TestCase):
     CRAWLER_CLASSES = (MovieCrawler, BookCrawler, MusicCrawler, GameCrawler)
@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from batch import load_manifest, main, run_batch
+
+
+def write_manifest(tmpdir, payload):
+    path = os.path.join(tmpdir, "accounts.json")
+    with open(path, "w", encoding="utf-8") as file_obj:
+        json.dump(payload, file_obj)
+    return path
+
+
+class LoadManifestTests(unittest.TestCase):
+    def test_resolves_cookie_paths_names_and_categories(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = write_manifest(
+                tmpdir,
+                {
+                    "accounts": [
+                        {"public": "alice", "only": "movies,books", "skip": "books"},
+                        {"cookies": "cookies/me.json"},
+                    ]
+                },
+            )
+            accounts = load_manifest(path)
+
+        self.assertEqual(accounts[0]["name"], "alice")
+        self.assertEqual(accounts[0]["mode"], "public")
+        self.assertEqual(accounts[0]["categories"], ["movies"])
+        self.assertEqual(accounts[1]["name"], "me")
+        self.assertEqual(accounts[1]["mode"], "cookies")
+        self.assertEqual(
+            accounts[1]["cookies_file"], os.path.join(tmpdir, "cookies", "me.json")
+        )
+
+    def test_rejects_invalid_entries(self):
+        invalid = [
+            [],
+            [{"public": "a", "cookies": "a.json"}],
+            [{"public": "a"}, {"public": "a"}],
+            [{"name": "../escape", "public": "a"}],
+            [{"public": "a", "only": "photos"}],
+        ]
+        for payload in invalid:
+            with self.subTest(payload=payload), tempfile.TemporaryDirectory() as tmpdir:
+                with self.assertRaises(ValueError):
+                    load_manifest(write_manifest(tmpdir, payload))
+
+
+class RunBatchTests(unittest.TestCase):
+    accounts = [
+        {
+            "name": "alice",
+            "mode": "public",
+            "user_id": "alice",
+            "cookies_file": None,
+            "categories": ["movies"],
+        },
+        {
+            "name": "me",
+            "mode": "cookies",
+            "user_id": None,
+            "cookies_file": "/secrets/me.json",
+            "categories": ["books"],
+        },
+    ]
+
+    def test_accounts_share_budget_and_get_their_own_directories(self):
+        with tempfile.TemporaryDirectory() as tmpdir, patch(
+            "batch.run_public_backup",
+            return_value={"movies": {"collect": [{"douban_id": "1"}], "wish": []}},
+        ) as run_public, patch("batch.DoubanBackup") as backup_cls:
+            backup = backup_cls.return_value
+            backup.run.return_value = True
+            backup.user_id = "me-id"
+            backup.item_counts = {"books": 3}
+            summary = run_batch(
+                self.accounts,
+                output_dir=tmpdir,
+                workers=2,
+                global_rate=5,
+                options={"request_delay": 1, "checkpoint_enabled": False},
+            )
+            with open(summary["summary_file"], encoding="utf-8") as file_obj:
+                saved = json.load(file_obj)
+
+        public_kwargs = run_public.call_args.kwargs
+        login_kwargs = backup_cls.call_args.kwargs
+        self.assertEqual(public_kwargs["output_dir"], os.path.join(tmpdir, "alice"))
+        self.assertNotIn("checkpoint_enabled", public_kwargs)
+        self.assertEqual(login_kwargs["output_dir"], os.path.join(tmpdir, "me"))
+        self.assertEqual(login_kwargs["cookies_file"], "/secrets/me.json")
+        self.assertEqual(
+            login_kwargs["user_info_file"], os.path.join(tmpdir, "me", "user_info.json")
+        )
+        self.assertFalse(login_kwargs["interactive"])
+        self.assertFalse(login_kwargs["checkpoint_enabled"])
+        self.assertIs(public_kwargs["request_budget"], login_kwargs["request_budget"])
+        self.assertEqual(public_kwargs["request_budget"].rate, 5)
+
+        self.assertTrue(saved["ok"])
+        self.assertEqual(
+            [(entry["name"], entry["counts"]) for entry in saved["accounts"]],
+            [("alice", {"movies": 1}), ("me", {"books": 3})],
+        )
+        self.assertEqual(saved["accounts"][1]["user_id"], "me-id")
+
+    def test_failed_account_is_recorded_without_stopping_others(self):
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()), patch(
+            "batch.run_public_backup", return_value={"movies": {"collect": []}}
+        ), patch("batch.DoubanBackup", side_effect=RuntimeError("boom")):
+            summary = run_batch(self.accounts, output_dir=tmpdir, workers=1)
+
+        self.assertFalse(summary["ok"])
+        self.assertTrue(summary["accounts"][0]["ok"])
+        self.assertEqual(summary["accounts"][1]["error"], "boom")
+
+    def test_main_reports_invalid_manifest(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = write_manifest(tmpdir, {"accounts": []})
+            output = StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(main([path]), 1)
+
+        self.assertIn("[ERROR]", output.getvalue())
+
+    def test_main_rejects_async_engine_with_http_cache_before_any_backup(self):
+        with tempfile.TemporaryDirectory() as tmpdir, patch("batch.run_batch") as run, patch(
+            "main.is_async_engine_available", return_value=True
+        ):
+            path = write_manifest(tmpdir, {"accounts": [{"public": "alice"}]})
+            output = StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(main([path, "--engine", "async", "--http-cache"]), 1)
+
+        run.assert_not_called()
+        self.assertIn("--http-cache", output.getvalue())
+
+    def test_main_fails_fast_when_http2_is_unavailable(self):
+        with tempfile.TemporaryDirectory() as tmpdir, patch("batch.run_batch") as run, patch(
+            "main.is_http2_available", return_value=False
+        ), redirect_stdout(StringIO()):
+            path = write_manifest(tmpdir, {"accounts": [{"public": "alice"}]})
+            self.assertEqual(main([path, "--http2"]), 1)
+
+        run.assert_not_called()
+
+    def test_fetch_workers_reach_public_accounts_only(self):
+        with tempfile.TemporaryDirectory() as tmpdir, patch(
+            "batch.run_public_backup", return_value={"movies": {"collect": []}}
+        ) as run_public, patch("batch.DoubanBackup") as backup_cls, redirect_stdout(StringIO()):
+            backup_cls.return_value.user_id = "me-id"
+            backup_cls.return_value.item_counts = {}
+            path = write_manifest(
+                tmpdir, {"accounts": [{"public": "alice"}, {"cookies": "me.json"}]}
+            )
+            main([path, "--output", tmpdir, "--fetch-workers", "3"])
+
+        self.assertEqual(run_public.call_args.kwargs["fetch_workers"], 3)
+        self.assertNotIn("fetch_workers", backup_cls.call_args.kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from benchmark import (
+    CRAWLERS,
+    compare_results,
+    main,
+    make_pages,
+    parse_all,
+    run_benchmarks,
+)
+
+
+class SyntheticPageTests(unittest.TestCase):
+    def test_pages_hold_requested_items_and_link_to_next_page(self):
+        pages = make_pages("games", 20)
+
+        self.assertEqual(len(pages), 2)
+        self.assertIn(pages[1][0], pages[0][1])
+        self.assertNotIn("start=30", pages[1][1])
+
+    def test_every_crawler_parses_all_synthetic_items(self):
+        data = parse_all(20, "html.parser")
+
+        for category in CRAWLERS:
+            with self.subTest(category=category):
+                items = data[category]["collect"]
+                self.assertEqual(len(items), 20)
+                self.assertEqual(len({item["douban_id"] for item in items}), 20)
+                self.assertTrue(all(item["title"] for item in items))
+
+
+class RunBenchmarksTests(unittest.TestCase):
+    def test_reports_throughput_for_each_benchmark(self):
+        with redirect_stdout(StringIO()):
+            report = run_benchmarks(sizes=[20], backends=["html.parser"])
+
+        names = [result["name"] for result in report["results"]]
+        self.assertEqual(names.count("parse"), 4)
+        self.assertEqual(names.count("crawl"), 4)
+        for result in report["results"]:
+            with self.subTest(result=result):
+                expected = 80 if result["name"] in ("checkpoint", "json", "excel", "records") else 20
+                self.assertEqual(result["items"], expected)
+                self.assertGreater(result["items_per_sec"], 0)
+                self.assertIsNotNone(result["peak_memory_mb"])
+        records = next(result for result in report["results"] if result["name"] == "records")
+        self.assertGreater(records["record_bytes_per_item"], 0)
+        self.assertGreater(records["dict_bytes_per_item"], 0)
+
+    def test_main_writes_json_and_compares_with_previous_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first = os.path.join(tmpdir, "first.json")
+            second = os.path.join(tmpdir, "second.json")
+            argv = ["--sizes", "10", "--backends", "html.parser", "--only", "parse,json"]
+            with redirect_stdout(StringIO()):
+                self.assertEqual(main(argv + ["--no-memory", "--output", first]), 0)
+            output = StringIO()
+            with redirect_stdout(output):
+                main(argv + ["--no-memory", "--output", second, "--compare", first])
+
+            with open(first, encoding="utf-8") as file_obj:
+                baseline = json.load(file_obj)
+            with open(second, encoding="utf-8") as file_obj:
+                current = json.load(file_obj)
+
+        self.assertEqual(baseline["metadata"]["sizes"], [10])
+        self.assertEqual(len(compare_results(baseline, current)), 5)
+        self.assertIn("[对比]", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -46,6 +46,20 @@ class CliDispatchTests(unittest.TestCase):
             categories=["movies"],
             output_dir="D:\\exports",
             request_delay=None,
+            parser_backend=None,
+            fetch_workers=1,
+            adaptive_delay=False,
+            incremental=False,
+            enrich=False,
+            http_cache=False,
+            offline=False,
+            record_dir=None,
+            replay_dir=None,
+            metrics_textfile=None,
+            http2=False,
+            covers=False,
+            sqlite=False,
+            output_format="json",
         )
 
     def test_main_passes_custom_request_delay_to_backup(self):
@@ -58,9 +72,70 @@ class CliDispatchTests(unittest.TestCase):
             output_dir=None,
             checkpoint_enabled=True,
             request_delay=4.5,
+            parser_backend=None,
+            parallel_categories=1,
+            engine=None,
+            adaptive_delay=False,
+            incremental=False,
+            enrich=False,
+            http_cache=False,
+            offline=False,
+            record_dir=None,
+            replay_dir=None,
+            metrics_textfile=None,
+            http2=False,
+            covers=False,
+            sqlite=False,
+            snapshots=False,
+            output_format="json",
         )
         instance.run.assert_called_once()
 
+    def test_main_passes_parallel_categories(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--parallel-categories", "4"])
+
+        self.assertEqual(backup_cls.call_args.kwargs["parallel_categories"], 4)
+
+    def test_main_passes_async_engine(self):
+        with patch("main.DoubanBackup") as backup_cls, patch(
+            "main.is_async_engine_available", return_value=True
+        ):
+            main.main(["--engine", "async"])
+
+        self.assertEqual(backup_cls.call_args.kwargs["engine"], "async")
+
+    def test_main_refuses_async_engine_without_httpx(self):
+        with patch("main.DoubanBackup") as backup_cls, patch(
+            "main.is_async_engine_available", return_value=False
+        ):
+            result = main.main(["--engine", "async"])
+
+        self.assertFalse(result)
+        backup_cls.assert_not_called()
+
+    def test_main_passes_http2_when_available(self):
+        with patch("main.DoubanBackup") as backup_cls, patch(
+            "main.is_http2_available", return_value=True
+        ):
+            main.main(["--http2"])
+
+        self.assertTrue(backup_cls.call_args.kwargs["http2"])
+
+    def test_main_refuses_http2_without_h2(self):
+        with patch("main.DoubanBackup") as backup_cls, patch(
+            "main.is_http2_available", return_value=False
+        ), patch("builtins.print"):
+            result = main.main(["--http2"])
+
+        self.assertFalse(result)
+        backup_cls.assert_not_called()
+
+    def test_main_rejects_non_positive_parallel_categories(self):
+        with patch("main.DoubanBackup"), patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                main.main(["--parallel-categories", "0"])
+
     def test_main_passes_custom_request_delay_to_public_backup(self):
         with patch("main.run_public_backup") as run_public:
             main.main(["--public", "demo-user", "--delay", "3"])
@@ -70,8 +145,108 @@ class CliDispatchTests(unittest.TestCase):
             categories=["movies", "books", "music", "games"],
             output_dir=None,
             request_delay=3.0,
+            parser_backend=None,
+            fetch_workers=1,
+            adaptive_delay=False,
+            incremental=False,
+            enrich=False,
+            http_cache=False,
+            offline=False,
+            record_dir=None,
+            replay_dir=None,
+            metrics_textfile=None,
+            http2=False,
+            covers=False,
+            sqlite=False,
+            output_format="json",
         )
 
+    def test_main_passes_fetch_workers_to_public_backup(self):
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--fetch-workers", "4"])
+
+        self.assertEqual(run_public.call_args.kwargs["fetch_workers"], 4)
+
+    def test_main_passes_adaptive_delay(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--adaptive-delay"])
+
+        self.assertTrue(backup_cls.call_args.kwargs["adaptive_delay"])
+
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--adaptive-delay"])
+
+        self.assertTrue(run_public.call_args.kwargs["adaptive_delay"])
+
+    def test_main_passes_incremental(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--incremental"])
+
+        self.assertTrue(backup_cls.call_args.kwargs["incremental"])
+
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--incremental"])
+
+        self.assertTrue(run_public.call_args.kwargs["incremental"])
+
+    def test_main_passes_enrich(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--enrich"])
+
+        self.assertTrue(backup_cls.call_args.kwargs["enrich"])
+
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--enrich"])
+
+        self.assertTrue(run_public.call_args.kwargs["enrich"])
+
+    def test_main_passes_http_cache_and_offline(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--http-cache"])
+
+        self.assertTrue(backup_cls.call_args.kwargs["http_cache"])
+
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--offline"])
+
+        self.assertTrue(run_public.call_args.kwargs["offline"])
+
+    def test_main_refuses_async_engine_with_http_cache(self):
+        with patch("main.DoubanBackup") as backup_cls, patch(
+            "main.is_async_engine_available", return_value=True
+        ):
+            result = main.main(["--engine", "async", "--offline"])
+
+        self.assertFalse(result)
+        backup_cls.assert_not_called()
+
+    def test_main_passes_record_and_replay_dirs(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--record", "archive"])
+
+        self.assertEqual(backup_cls.call_args.kwargs["record_dir"], "archive")
+
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--replay", "archive"])
+
+        self.assertEqual(run_public.call_args.kwargs["replay_dir"], "archive")
+
+    def test_main_rejects_record_with_replay(self):
+        with patch("main.DoubanBackup"), patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                main.main(["--record", "a", "--replay", "b"])
+
+    def test_main_passes_parser_backend(self):
+        with patch("main.DoubanBackup") as backup_cls:
+            main.main(["--parser", "lxml"])
+
+        self.assertEqual(backup_cls.call_args.kwargs["parser_backend"], "lxml")
+
+        with patch("main.run_public_backup") as run_public:
+            main.main(["--public", "demo-user", "--parser", "lxml"])
+
+        self.assertEqual(run_public.call_args.kwargs["parser_backend"], "lxml")
+
 
 if __name__ == "__main__":
     unittest.main()
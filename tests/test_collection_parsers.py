@@ -1,26 +1,45 @@
 import unittest
 from pathlib import Path
 
-from bs4 import BeautifulSoup
-
 from books import BookCrawler
 from games import GameCrawler
+from html_parsing import PARSER_BACKENDS, is_parser_backend_available
 from movies import MovieCrawler
 from music import MusicCrawler
 
 
-class DummyResponse:
-    def __init__(self, text):
-        self.text = text
-
-
 class CollectionParserTests(unittest.TestCase):
     FIXTURE_DIR = Path(__file__).parent / "fixtures"
 
-    def parse_fixture(self, crawler_class, filename, collection="collect"):
+    FIXTURES = (
+        (MovieCrawler, "movie_collection_item.html"),
+        (BookCrawler, "book_collection_item.html"),
+        (MusicCrawler, "music_collection_item.html"),
+        (GameCrawler, "game_collection_item.html"),
+    )
+
+    def parse_fixture(
+        self, crawler_class, filename, collection="collect", parser_backend=None
+    ):
         html = (self.FIXTURE_DIR / filename).read_text(encoding="utf-8")
-        crawler = crawler_class(session=None)
-        return crawler._parse_items(DummyResponse(html), collection)[0]
+        crawler = crawler_class(session=None, parser_backend=parser_backend)
+        soup = crawler._parse_document(html)
+        return crawler._parse_items(soup, collection)[0]
+
+    def test_fixtures_parse_identically_on_every_backend(self):
+        for backend in PARSER_BACKENDS:
+            if not is_parser_backend_available(backend):
+                continue
+            for crawler_class, filename in self.FIXTURES:
+                with self.subTest(backend=backend, fixture=filename):
+                    self.assertEqual(
+                        self.parse_fixture(
+                            crawler_class, filename, parser_backend=backend
+                        ),
+                        self.parse_fixture(
+                            crawler_class, filename, parser_backend="html.parser"
+                        ),
+                    )
 
     def test_movie_comment_fixture(self):
         item = self.parse_fixture(MovieCrawler, "movie_collection_item.html")
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+import crawl_public
+import main
+from config import COVER_WORKERS
+from covers import CoverArchiver, CoverStore, cover_key
+from item_records import MovieItem
+
+PNG = b"\x89PNG\r\n\x1a\nfake-cover"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=PNG, content_type="image/png"):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"Content-Type": content_type}
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self.lock:
+            self.requested.append(url)
+        return self.responses.get(url, FakeResponse(404, b"", "text/html"))
+
+
+class CoverStoreTests(unittest.TestCase):
+    def test_mirror_hosts_share_a_key(self):
+        self.assertEqual(
+            cover_key("https://img1.doubanio.com/view/subject/s/public/s1.jpg"),
+            cover_key("https://img9.doubanio.com/view/subject/s/public/s1.jpg"),
+        )
+
+    def test_identical_content_is_stored_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = CoverStore(tmpdir)
+            first = store.put("https://img1.doubanio.com/a.jpg", PNG, "image/png")
+            second = store.put("https://img1.doubanio.com/b.jpg", PNG, "image/png")
+            store.save_index()
+            reloaded = CoverStore(tmpdir)
+
+            self.assertEqual(first, second)
+            self.assertTrue(first.endswith(".png"))
+            self.assertEqual(reloaded.lookup("https://img3.doubanio.com/b.jpg"), first)
+            self.assertIsNone(reloaded.lookup("https://img1.doubanio.com/c.jpg"))
+
+
+class CoverArchiverTests(unittest.TestCase):
+    def test_downloads_once_and_writes_local_paths(self):
+        first_url = "https://img1.doubanio.com/view/photo/p1.jpg"
+        gone_url = "https://img1.doubanio.com/view/photo/gone.jpg"
+        data = {
+            "movies": {
+                "collect": [
+                    MovieItem(douban_id="1", cover=first_url, collection="看过"),
+                    MovieItem(douban_id="2", cover=gone_url, collection="看过"),
+                ],
+                "wish": [{"douban_id": "3", "cover": first_url}],
+            }
+        }
+        session = FakeSession({first_url: FakeResponse()})
+
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            backup_dir = os.path.join(tmpdir, "backup")
+            os.makedirs(backup_dir)
+            store = CoverStore(os.path.join(tmpdir, "covers"))
+            archiver = CoverArchiver(session, store=store, rate=None)
+            result = archiver.archive(data, backup_dir)
+            again = CoverArchiver(session, store=CoverStore(store.root), rate=None)
+            second_result = again.archive(data, backup_dir)
+
+            local_path = data["movies"]["collect"][0]["cover_local"]
+            with open(os.path.join(backup_dir, local_path), "rb") as file_obj:
+                self.assertEqual(file_obj.read(), PNG)
+            with open(store.index_path, encoding="utf-8") as file_obj:
+                index = json.load(file_obj)
+
+        self.assertEqual(result, (0, 1, 1))
+        self.assertEqual(second_result, (1, 0, 1))
+        self.assertEqual(session.requested, [first_url, gone_url])
+        self.assertTrue(local_path.startswith("../covers/objects/"))
+        self.assertEqual(data["movies"]["wish"][0]["cover_local"], local_path)
+        self.assertNotIn("cover_local", data["movies"]["collect"][1])
+        self.assertTrue(index[cover_key(gone_url)]["missing"])
+        self.assertEqual(
+            list(data["movies"]["collect"][0])[-1], "cover_local"
+        )
+
+    def test_refused_requests_stop_the_stage(self):
+        urls = [f"https://img1.doubanio.com/view/photo/p{index}.jpg" for index in range(5)]
+        session = FakeSession({url: FakeResponse(403, b"", "text/html") for url in urls})
+        data = {"movies": {"collect": [{"douban_id": str(i), "cover": url} for i, url in enumerate(urls)]}}
+
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            archiver = CoverArchiver(session, store=CoverStore(tmpdir), workers=1, rate=None)
+            stored, fetched, failed = archiver.archive(data, tmpdir)
+            self.assertIsNone(archiver.store.lookup(urls[0]))
+
+        self.assertEqual((stored, fetched, failed), (0, 0, 5))
+        self.assertEqual(len(session.requested), 1)
+
+
+class CoverSessionPoolTests(unittest.TestCase):
+    def test_login_session_keeps_a_connection_per_cover_worker(self):
+        with patch("main.create_session") as create_session:
+            main.DoubanBackup(covers=True)
+
+        self.assertEqual(create_session.call_args.args[0], COVER_WORKERS)
+
+    def test_public_session_keeps_a_connection_per_cover_worker(self):
+        with tempfile.TemporaryDirectory() as tmpdir, patch(
+            "crawl_public.create_session", side_effect=RuntimeError("stop")
+        ) as create_session, redirect_stdout(StringIO()):
+            crawl_public.run_public_backup("demo", output_dir=tmpdir, covers=True)
+
+        self.assertEqual(create_session.call_args.args[0], COVER_WORKERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import Mock
+
+import crawl_public
+from crawl_archive import (
+    INDEX_FILE,
+    ArchiveReader,
+    ArchiveWriter,
+    RecordingSession,
+    ReplaySession,
+)
+
+
+class DummyResponse:
+    def __init__(self, text="", status_code=200, url="https://example.test/page", headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers or {}
+
+
+def movie_page(start, count):
+    items = "".join(
+        f'<div class="item"><div class="info"><ul><li class="title">'
+        f'<a href="https://movie.douban.com/subject/{start + index}/" '
+        f'title="电影 {start + index}">Movie</a></li></ul></div></div>'
+        for index in range(count)
+    )
+    return f"<html><body>{items}</body></html>"
+
+
+class CrawlArchiveTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.archive_dir = os.path.join(self.tmpdir.name, "archive")
+
+    def test_replay_returns_recorded_responses_in_order(self):
+        session = Mock()
+        session.get.side_effect = [
+            DummyResponse("", status_code=503),
+            DummyResponse("<html>正文</html>", headers={"ETag": '"v1"', "Set-Cookie": "x"}),
+        ]
+        recorder = RecordingSession(session, ArchiveWriter(self.archive_dir, user_id="demo"))
+        recorder.get("https://example.test/page", timeout=30)
+        recorder.get("https://example.test/page", timeout=30)
+
+        reader = ArchiveReader(self.archive_dir)
+        replay = ReplaySession(reader)
+
+        self.assertEqual(reader.user_id, "demo")
+        self.assertEqual(len(reader), 2)
+        self.assertEqual(replay.get("https://example.test/page").status_code, 503)
+        second = replay.get("https://example.test/page")
+        self.assertEqual(second.text, "<html>正文</html>")
+        self.assertEqual(second.headers, {"ETag": '"v1"'})
+        # 录制的响应用完后重复最后一条
+        self.assertEqual(replay.get("https://example.test/page").status_code, 200)
+
+    def test_unknown_url_is_not_found_during_replay(self):
+        ArchiveWriter(self.archive_dir)
+        replay = ReplaySession(ArchiveReader(self.archive_dir))
+
+        with redirect_stdout(StringIO()):
+            response = replay.get("https://example.test/missing")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_reader_ignores_torn_index_tail(self):
+        writer = ArchiveWriter(self.archive_dir)
+        writer.record("https://example.test/a", DummyResponse("a"))
+        with open(os.path.join(self.archive_dir, INDEX_FILE), "a", encoding="utf-8") as file_obj:
+            file_obj.write('{"url": "https://exa')
+
+        reader = ArchiveReader(self.archive_dir)
+
+        self.assertEqual(reader.urls(), ["https://example.test/a"])
+
+    def test_recording_refuses_existing_archive(self):
+        ArchiveWriter(self.archive_dir).record("https://example.test/a", DummyResponse("a"))
+
+        with self.assertRaises(FileExistsError):
+            ArchiveWriter(self.archive_dir)
+
+    def test_replayed_crawl_matches_recorded_crawl(self):
+        pages = {0: movie_page(0, 15), 15: movie_page(15, 4)}
+        session = Mock()
+        session.get.side_effect = lambda url, timeout=30: DummyResponse(
+            pages[int(url.rsplit("=", 1)[1])], url=url
+        )
+
+        def crawl(current_session):
+            return crawl_public.crawl_collection_pages(
+                lambda start: f"https://movie.douban.com/people/demo/collect?start={start}",
+                crawl_public.find_movie_items,
+                crawl_public.parse_movie_item,
+                request_delay=0,
+                session=current_session,
+            )
+
+        recorded = crawl(RecordingSession(session, ArchiveWriter(self.archive_dir)))
+        replayed = crawl(ReplaySession(ArchiveReader(self.archive_dir)))
+
+        self.assertEqual(len(recorded), 19)
+        self.assertEqual(replayed, recorded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,12 @@
+import re
+import time
 import unittest
 from pathlib import Path
-from unittest.mock import patch
-
-from bs4 import BeautifulSoup
+from unittest.mock import Mock, patch
 
 import crawl_public
+from html_parsing import PARSER_BACKENDS, is_parser_backend_available, make_soup
+from incremental import KnownCollection
 
 
 class DummyResponse:
@@ -16,9 +18,26 @@ class DummyResponse:
 class CrawlPublicTests(unittest.TestCase):
     FIXTURE_DIR = Path(__file__).parent / "fixtures"
 
-    def fixture_item(self, filename, selector):
+    def fixture_item(self, filename, selector, parser_backend="html.parser"):
         html = (self.FIXTURE_DIR / filename).read_text(encoding="utf-8")
-        return BeautifulSoup(html, "html.parser").select_one(selector)
+        return make_soup(html, parser_backend).select_one(selector)
+
+    def test_item_parsers_match_on_every_backend(self):
+        fixtures = (
+            (crawl_public.parse_movie_item, "movie_collection_item.html", ".item"),
+            (crawl_public.parse_book_item, "book_collection_item.html", ".subject-item"),
+            (crawl_public.parse_music_item, "music_collection_item.html", ".item"),
+            (crawl_public.parse_game_item, "game_collection_item.html", ".common-item"),
+        )
+        for backend in PARSER_BACKENDS:
+            if not is_parser_backend_available(backend):
+                continue
+            for parse_item, filename, selector in fixtures:
+                with self.subTest(backend=backend, fixture=filename):
+                    self.assertEqual(
+                        parse_item(self.fixture_item(filename, selector, backend)),
+                        parse_item(self.fixture_item(filename, selector)),
+                    )
 
     def test_parse_book_item_reads_comment_from_any_comment_element(self):
         item = self.fixture_item("book_collection_item.html", ".subject-item")
@@ -45,10 +64,8 @@ class CrawlPublicTests(unittest.TestCase):
             urls.append(url)
             return DummyResponse("<html></html>")
 
-        with patch.object(crawl_public, "USER_ID", "demo"), patch.object(
-            crawl_public.SESSION, "get", side_effect=fake_get
-        ):
-            data = crawl_public.crawl_books()
+        with patch.object(crawl_public.SESSION, "get", side_effect=fake_get):
+            data = crawl_public.crawl_books("demo")
 
         self.assertEqual(
             data, {"wish": [], "collect": [], "reading": []}
@@ -70,11 +87,166 @@ class CrawlPublicTests(unittest.TestCase):
             urls,
         )
 
+    @staticmethod
+    def movie_page(start, count, total):
+        items = "".join(
+            f'<div class="item"><div class="info"><ul><li class="title">'
+            f'<a href="https://movie.douban.com/subject/{start + index}/" '
+            f'title="Movie {start + index}">Movie</a></li></ul></div></div>'
+            for index in range(count)
+        )
+        return (
+            f'<html><body><span class="subject-num">{start + 1}-{start + count}'
+            f" / {total}</span>{items}</body></html>"
+        )
+
+    def test_read_page_count_from_subject_num(self):
+        soup = make_soup(self.movie_page(0, 15, 31))
+
+        self.assertEqual(crawl_public.read_page_count(soup), 3)
+
+    def test_parallel_fetch_reassembles_pages_in_order(self):
+        total = 40
+
+        def fake_get(url, timeout=30):
+            start = int(re.search(r"start=(\d+)", url).group(1))
+            # 让后面的页先返回，验证结果仍按页码顺序拼接。
+            time.sleep(0.01 * (total - start) / 15)
+            return DummyResponse(self.movie_page(start, min(15, total - start), total))
+
+        with patch.object(crawl_public.SESSION, "get", side_effect=fake_get) as get:
+            items = crawl_public.crawl_collection_pages(
+                lambda start: f"https://movie.douban.com/people/demo/collect?start={start}",
+                crawl_public.find_movie_items,
+                crawl_public.parse_movie_item,
+                request_delay=0,
+                fetch_workers=3,
+            )
+
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(
+            [item["douban_id"] for item in items],
+            [str(index) for index in range(total)],
+        )
+
+    def test_parallel_fetch_waits_delay_after_first_page(self):
+        total = 40
+        pauses = []
+
+        def fake_get(url, timeout=30):
+            start = int(re.search(r"start=(\d+)", url).group(1))
+            return DummyResponse(self.movie_page(start, min(15, total - start), total))
+
+        with patch.object(crawl_public.SESSION, "get", side_effect=fake_get), patch(
+            "rate_limit.time.sleep", side_effect=pauses.append
+        ):
+            items = crawl_public.crawl_collection_pages(
+                lambda start: f"https://movie.douban.com/people/demo/collect?start={start}",
+                crawl_public.find_movie_items,
+                crawl_public.parse_movie_item,
+                request_delay=1,
+                fetch_workers=2,
+            )
+
+        self.assertEqual(len(items), total)
+        # 第二页和第三页都要在前一次请求之后等待约 1 秒
+        self.assertEqual(len(pauses), 2)
+        self.assertGreater(min(pauses), 0.9)
+
+    def test_parallel_fetch_keeps_pages_before_first_failure(self):
+        def fake_get(url, timeout=30):
+            start = int(re.search(r"start=(\d+)", url).group(1))
+            if start == 30:
+                return DummyResponse("", status_code=503)
+            return DummyResponse(self.movie_page(start, 15, 60))
+
+        with patch.object(crawl_public.SESSION, "get", side_effect=fake_get):
+            items = crawl_public.crawl_collection_pages(
+                lambda start: f"https://movie.douban.com/people/demo/collect?start={start}",
+                crawl_public.find_movie_items,
+                crawl_public.parse_movie_item,
+                request_delay=0,
+                fetch_workers=4,
+            )
+
+        self.assertEqual(len(items), 30)
+
+    def test_incremental_crawl_stops_at_first_known_page(self):
+        def fake_get(url, timeout=30):
+            start = int(re.search(r"start=(\d+)", url).group(1))
+            return DummyResponse(self.movie_page(start, 15, 60))
+
+        def parse_page(start):
+            soup = make_soup(self.movie_page(start, 15, 60))
+            return [
+                crawl_public.parse_movie_item(item)
+                for item in crawl_public.find_movie_items(soup)
+            ]
+
+        # 上次备份时第一页的条目尚未标记，其余页与本次一致。
+        previous = parse_page(15) + parse_page(30) + parse_page(45)
+        known = KnownCollection(previous)
+
+        for fetch_workers in (1, 4):
+            with self.subTest(fetch_workers=fetch_workers), patch.object(
+                crawl_public.SESSION, "get", side_effect=fake_get
+            ) as get:
+                items = crawl_public.crawl_collection_pages(
+                    lambda start: f"https://movie.douban.com/people/demo/collect?start={start}",
+                    crawl_public.find_movie_items,
+                    crawl_public.parse_movie_item,
+                    request_delay=0,
+                    fetch_workers=fetch_workers,
+                    known=known,
+                )
+
+                self.assertEqual(
+                    [item["douban_id"] for item in items],
+                    [str(index) for index in range(60)],
+                )
+                if fetch_workers == 1:
+                    self.assertEqual(get.call_count, 2)
+
+    def test_rate_limited_page_is_retried_through_limiter(self):
+        responses = [
+            DummyResponse("", status_code=429),
+            DummyResponse(self.movie_page(0, 3, 3)),
+        ]
+        limiter = Mock()
+
+        with patch.object(crawl_public.SESSION, "get", side_effect=responses):
+            items = crawl_public.crawl_collection_pages(
+                lambda start: f"https://movie.douban.com/people/demo/collect?start={start}",
+                crawl_public.find_movie_items,
+                crawl_public.parse_movie_item,
+                limiter=limiter,
+            )
+
+        self.assertEqual(len(items), 3)
+        self.assertEqual(limiter.wait.call_count, 2)
+        self.assertEqual(limiter.record.call_count, 2)
+
     def test_standalone_cli_passes_request_delay(self):
         with patch.object(crawl_public, "run_public_backup") as run_public:
             crawl_public.main(["demo-user", "--delay", "2.5"])
 
-        run_public.assert_called_once_with("demo-user", request_delay=2.5)
+        run_public.assert_called_once_with(
+            "demo-user",
+            request_delay=2.5,
+            fetch_workers=1,
+            adaptive_delay=False,
+            incremental=False,
+            enrich=False,
+            http_cache=False,
+            offline=False,
+            record_dir=None,
+            replay_dir=None,
+            metrics_textfile=None,
+            http2=False,
+            covers=False,
+            sqlite=False,
+            output_format="json",
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from enrich import DetailEnricher, SubjectCache, summarize_json_ld
+from html_parsing import extract_json_ld
+
+
+MOVIE_PAGE = """
+<html><head>
+<script type="application/ld+json">
+{
+  "@context": "http://schema.org",
+  "name": "肖申克的救赎",
+  "director": [{"@type": "Person", "name": "弗兰克·德拉邦特 Frank Darabont"}],
+  "genre": ["剧情", "犯罪"],
+  "duration": "PT2H22M",
+  "description": "第一行
+第二行",
+  "@type": "Movie",
+  "aggregateRating": {"@type": "AggregateRating", "ratingCount": "3000000", "ratingValue": "9.7"}
+}
+</script>
+</head><body></body></html>
+"""
+
+
+class DummyResponse:
+    def __init__(self, text="", status_code=200, url="https://movie.douban.com/subject/1/"):
+        self.text = text
+        self.status_code = status_code
+        self.url = url
+
+
+def make_throttle():
+    return Mock(retry_delay=0)
+
+
+class JsonLdTests(unittest.TestCase):
+    def test_extracts_json_ld_with_raw_newlines(self):
+        documents = extract_json_ld(MOVIE_PAGE)
+
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(documents[0]["name"], "肖申克的救赎")
+
+    def test_summary_keeps_detail_fields(self):
+        detail = summarize_json_ld(extract_json_ld(MOVIE_PAGE))
+
+        self.assertEqual(detail["genres"], ["剧情", "犯罪"])
+        self.assertEqual(detail["directors"], ["弗兰克·德拉邦特 Frank Darabont"])
+        self.assertEqual(detail["duration"], "PT2H22M")
+        self.assertEqual(detail["community_rating"], "9.7")
+        self.assertEqual(detail["schema_type"], "Movie")
+
+
+class SubjectCacheTests(unittest.TestCase):
+    def test_entries_expire_after_ttl(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SubjectCache(tmpdir, ttl_days=1)
+            cache.put("movie", "1", [{"name": "A"}])
+
+            self.assertEqual(cache.get("movie", "1"), [{"name": "A"}])
+            self.assertIsNone(cache.get("book", "1"))
+            with patch("enrich.time.time", return_value=time.time() + 2 * 86400):
+                self.assertIsNone(cache.get("movie", "1"))
+
+
+class DetailEnricherTests(unittest.TestCase):
+    def test_fetches_each_subject_once_and_reuses_cache(self):
+        data = {
+            "movies": {
+                "collect": [{"douban_id": "1", "title": "A"}],
+                "wish": [{"douban_id": "1", "title": "A"}, {"title": "no id"}],
+            }
+        }
+        session = Mock()
+        session.get.return_value = DummyResponse(MOVIE_PAGE)
+
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            cache = SubjectCache(tmpdir)
+            throttle = make_throttle()
+            result = DetailEnricher(session, throttle, cache=cache).enrich(data)
+
+            self.assertEqual(result, (0, 1, 0))
+            session.get.assert_called_once_with(
+                "https://movie.douban.com/subject/1/", timeout=30
+            )
+            throttle.wait.assert_called_once_with("https://movie.douban.com/subject/1/")
+            self.assertEqual(data["movies"]["collect"][0]["detail"]["genres"], ["剧情", "犯罪"])
+            self.assertIs(data["movies"]["wish"][0]["detail"], data["movies"]["collect"][0]["detail"])
+            self.assertNotIn("detail", data["movies"]["wish"][1])
+
+            again = {"movies": {"collect": [{"douban_id": "1"}]}}
+            result = DetailEnricher(session, make_throttle(), cache=cache).enrich(again)
+
+        self.assertEqual(result, (1, 0, 0))
+        session.get.assert_called_once()
+        self.assertEqual(again["movies"]["collect"][0]["detail"]["duration"], "PT2H22M")
+
+    def test_rate_limit_stops_remaining_fetches(self):
+        data = {"books": {"collect": [{"douban_id": str(index)} for index in range(5)]}}
+        session = Mock()
+        session.get.return_value = DummyResponse(status_code=403)
+
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            enricher = DetailEnricher(
+                session, make_throttle(), cache=SubjectCache(tmpdir), workers=1
+            )
+            result = enricher.enrich(data)
+
+        self.assertEqual(result, (0, 0, 5))
+        self.assertEqual(session.get.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
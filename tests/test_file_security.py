@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -29,5 +31,37 @@ class FileSecurityTests(unittest.TestCase):
         self.assertIn("tester:(R,W)", second_call.args[0])
 
 
+class WriteAtomicTests(unittest.TestCase):
+    def test_writes_text_bytes_and_callables(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            text_path = file_security.write_atomic(os.path.join(tmpdir, "a.json"), "{}")
+            binary_path = file_security.write_atomic(os.path.join(tmpdir, "b.bin"), b"\x00", "wb")
+            streamed_path = file_security.write_atomic(
+                os.path.join(tmpdir, "c.txt"), lambda file_obj: file_obj.write("豆瓣"), fsync=True
+            )
+
+            with open(text_path, encoding="utf-8") as file_obj:
+                self.assertEqual(file_obj.read(), "{}")
+            with open(binary_path, "rb") as file_obj:
+                self.assertEqual(file_obj.read(), b"\x00")
+            with open(streamed_path, encoding="utf-8") as file_obj:
+                self.assertEqual(file_obj.read(), "豆瓣")
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["a.json", "b.bin", "c.txt"])
+
+    def test_failed_write_keeps_old_file_and_removes_temp_file(self):
+        def fail(file_obj):
+            file_obj.write("partial")
+            raise RuntimeError("boom")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = file_security.write_atomic(os.path.join(tmpdir, "state.json"), "old")
+            with self.assertRaises(RuntimeError):
+                file_security.write_atomic(path, fail)
+
+            with open(path, encoding="utf-8") as file_obj:
+                self.assertEqual(file_obj.read(), "old")
+            self.assertEqual(os.listdir(tmpdir), ["state.json"])
+
+
 if __name__ == "__main__":
     unittest.main()
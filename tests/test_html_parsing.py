@@ -0,0 +1,25 @@
+import unittest
+from unittest.mock import patch
+
+import html_parsing
+
+
+class ParserBackendTests(unittest.TestCase):
+    def test_default_backend_is_html_parser(self):
+        self.assertEqual(html_parsing.resolve_parser_backend(), "html.parser")
+
+    def test_missing_lxml_falls_back_to_html_parser(self):
+        with patch.object(
+            html_parsing, "is_parser_backend_available", return_value=False
+        ):
+            backend = html_parsing.resolve_parser_backend("lxml")
+
+        self.assertEqual(backend, "html.parser")
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            html_parsing.resolve_parser_backend("regex")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import Mock
+
+from http_cache import CachedSession, HttpCache
+
+
+class DummyResponse:
+    def __init__(self, text="", status_code=200, url="https://example.test/page", headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers or {}
+
+
+URL = "https://movie.douban.com/people/demo/collect"
+
+
+class CachedSessionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = HttpCache(self.tmpdir.name, user_key="demo")
+
+    def test_not_modified_response_is_served_from_cache(self):
+        session = Mock()
+        session.get.side_effect = [
+            DummyResponse(
+                "<html>v1</html>",
+                url=URL,
+                headers={"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+            ),
+            DummyResponse("", status_code=304, url=URL),
+        ]
+        cached = CachedSession(session, self.cache)
+
+        first = cached.get(URL, timeout=30)
+        second = cached.get(URL, timeout=30)
+
+        self.assertEqual(first.text, "<html>v1</html>")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.text, "<html>v1</html>")
+        self.assertTrue(second.from_cache)
+        self.assertEqual(
+            session.get.call_args.kwargs["headers"],
+            {
+                "If-None-Match": '"abc"',
+                "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+            },
+        )
+
+    def test_error_pages_are_not_cached(self):
+        session = Mock()
+        session.get.return_value = DummyResponse("异常请求", status_code=403, url=URL)
+
+        CachedSession(session, self.cache).get(URL, timeout=30)
+
+        self.assertIsNone(self.cache.load(URL))
+
+    def test_cache_is_keyed_by_user(self):
+        self.cache.store(URL, DummyResponse("mine", url=URL))
+
+        self.assertIsNone(HttpCache(self.tmpdir.name, user_key="other").load(URL))
+
+    def test_offline_mode_replays_cache_without_network(self):
+        self.cache.store(URL, DummyResponse("<html>cached</html>", url=URL))
+        session = Mock()
+        cached = CachedSession(session, self.cache, offline=True)
+
+        with redirect_stdout(StringIO()):
+            hit = cached.get(URL, timeout=30)
+            miss = cached.get(URL + "?start=15", timeout=30)
+
+        session.get.assert_not_called()
+        self.assertEqual(hit.text, "<html>cached</html>")
+        self.assertEqual(miss.status_code, 404)
+
+    def test_other_attributes_are_forwarded_to_session(self):
+        session = Mock()
+        session.headers = {"User-Agent": "test"}
+
+        self.assertEqual(CachedSession(session, self.cache).headers, {"User-Agent": "test"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from incremental import KnownCollection, KnownItems, find_latest_backup
+
+
+def write_backup(directory, name, data, user_id="demo", backup_mode="authenticated"):
+    payload = {
+        "metadata": {"user_id": user_id, "backup_mode": backup_mode},
+        "data": data,
+    }
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as file_obj:
+        json.dump(payload, file_obj)
+
+
+class FindLatestBackupTests(unittest.TestCase):
+    def test_picks_newest_backup_of_same_user_and_mode(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_backup(tmpdir, "douban_backup_20240101_000000.json", {"v": 1})
+            write_backup(tmpdir, "douban_backup_20240201_000000.json", {"v": 2})
+            write_backup(
+                tmpdir, "douban_backup_20240301_000000.json", {"v": 3}, user_id="other"
+            )
+            write_backup(
+                tmpdir, "douban_backup_20240401_000000.json", {"v": 4}, backup_mode="public"
+            )
+            write_backup(tmpdir, "douban_backup_interrupted_20240501_000000.json", {"v": 5})
+
+            with redirect_stdout(StringIO()):
+                payload = find_latest_backup(
+                    tmpdir, user_id="demo", backup_mode="authenticated"
+                )
+
+            self.assertEqual(payload["data"], {"v": 2})
+
+    def test_returns_none_without_backups(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertIsNone(find_latest_backup(tmpdir))
+            self.assertIsNone(find_latest_backup(os.path.join(tmpdir, "missing")))
+
+
+class KnownCollectionTests(unittest.TestCase):
+    def test_page_is_known_requires_unchanged_items(self):
+        known = KnownCollection([{"douban_id": "1", "rating": "4"}, {"douban_id": "2"}])
+
+        self.assertTrue(known.page_is_known([{"douban_id": "1", "rating": "4"}]))
+        self.assertFalse(known.page_is_known([{"douban_id": "1", "rating": "5"}]))
+        self.assertFalse(known.page_is_known([{"douban_id": "3"}]))
+        self.assertFalse(known.page_is_known([]))
+
+    def test_page_is_known_ignores_fields_added_after_listing(self):
+        known = KnownCollection(
+            [{"douban_id": "1", "rating": "4", "detail": {"genres": ["剧情"]}}]
+        )
+
+        self.assertTrue(known.page_is_known([{"douban_id": "1", "rating": "4"}]))
+
+    def test_merge_appends_items_not_fetched_again(self):
+        known = KnownCollection([{"douban_id": "1"}, {"douban_id": "2"}, {"douban_id": "3"}])
+
+        merged = known.merge([{"douban_id": "0"}, {"douban_id": "1"}])
+
+        self.assertEqual(
+            [item["douban_id"] for item in merged], ["0", "1", "2", "3"]
+        )
+
+
+class KnownItemsTests(unittest.TestCase):
+    def test_drop_moved_removes_stale_copy_in_previous_collection(self):
+        known = KnownItems(
+            {"movies": {"wish": [{"douban_id": "1"}, {"douban_id": "2"}], "collect": []}}
+        )
+        all_data = {
+            "movies": {
+                "wish": [{"douban_id": "1"}, {"douban_id": "2"}],
+                "collect": [{"douban_id": "1", "rating": "5"}],
+            }
+        }
+
+        known.drop_moved(all_data)
+
+        self.assertEqual(all_data["movies"]["wish"], [{"douban_id": "2"}])
+        self.assertEqual(all_data["movies"]["collect"], [{"douban_id": "1", "rating": "5"}])
+
+    def test_from_backup_returns_none_without_previous_backup(self):
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            self.assertIsNone(KnownItems.from_backup(tmpdir, user_id="demo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
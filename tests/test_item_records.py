@@ -0,0 +1,122 @@
+import json
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from backup_state import BackupState
+from item_records import (
+    BookItem,
+    GameItem,
+    MovieItem,
+    MusicItem,
+    record_from_dict,
+    to_json_default,
+)
+from json_stream import save_backup_json
+
+MOVIE = {
+    "douban_id": "1292052",
+    "cover": "https://img.example/1292052.jpg",
+    "title": "肖申克的救赎",
+    "rating": "5",
+    "date": "2026-01-01",
+    "comment": "",
+    "tags": "经典",
+    "type": "movie",
+    "collection": "看过",
+}
+
+
+class ItemRecordTests(unittest.TestCase):
+    def test_round_trip_keeps_json_shape_and_key_order(self):
+        samples = [
+            MOVIE,
+            {"douban_id": "1", "cover": "", "title": "书", "author": "作者", "rating": "",
+             "comment": "", "date": "", "type": "book", "collection": "想读"},
+            {"douban_id": "2", "title": "专辑", "artist": "歌手", "cover": "", "rating": "3",
+             "info": "", "comment": "", "type": "music", "collection": "听过"},
+            {"douban_id": "3", "title": "游戏", "cover": "", "rating": "4", "date": "",
+             "info": "", "comment": "", "type": "game", "collection": "玩过"},
+        ]
+        for data, record_type in zip(samples, (MovieItem, BookItem, MusicItem, GameItem)):
+            with self.subTest(type=data["type"]):
+                record = record_from_dict(dict(data))
+                self.assertIsInstance(record, record_type)
+                self.assertEqual(list(record.to_dict().items()), list(data.items()))
+                self.assertEqual(record, data)
+                self.assertEqual(pickle.loads(pickle.dumps(record)), data)
+
+    def test_rating_is_a_small_int_and_collection_is_interned(self):
+        record = record_from_dict(dict(MOVIE, collection="".join(["看", "过"])))
+        unrated = MovieItem(rating="", collection="看过")
+
+        self.assertEqual(record.rating, 5)
+        self.assertEqual(record["rating"], "5")
+        self.assertEqual(unrated.rating, 0)
+        self.assertEqual(unrated.get("rating"), "")
+        for rating in ("0", "10", "4.5"):
+            with self.subTest(rating=rating):
+                self.assertEqual(MovieItem(rating=rating)["rating"], rating)
+        self.assertIs(record.collection, sys.intern("看过"))
+
+    def test_missing_and_extra_fields(self):
+        record = MovieItem(douban_id="1", title="T", rating="4", collection="看过")
+        record["detail"] = {"genres": ["剧情"]}
+        record["source"] = "import"
+
+        self.assertNotIn("date", record)
+        self.assertIsNone(record.get("date"))
+        self.assertEqual(
+            list(record),
+            ["douban_id", "title", "rating", "type", "collection", "detail", "source"],
+        )
+        with self.assertRaises(ValueError):
+            record["type"] = "book"
+
+    def test_unknown_types_are_left_as_dicts(self):
+        data = {"douban_id": "1", "type": "drama"}
+
+        self.assertIs(record_from_dict(data), data)
+        with self.assertRaises(TypeError):
+            to_json_default(object())
+
+
+class SerializationTests(unittest.TestCase):
+    def test_backup_json_is_identical_for_records_and_dicts(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from_dicts = save_backup_json(
+                os.path.join(tmpdir, "dicts.json"), {"movies": {"collect": [MOVIE]}}, {}
+            )
+            from_records = save_backup_json(
+                os.path.join(tmpdir, "records.json"),
+                {"movies": {"collect": [record_from_dict(MOVIE)]}},
+                {},
+            )
+            with open(from_dicts, encoding="utf-8") as first, open(
+                from_records, encoding="utf-8"
+            ) as second:
+                self.assertEqual(first.read(), second.read())
+
+    def test_checkpoint_reloads_items_as_records(self):
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            state = BackupState(tmpdir, "demo")
+            state.update_progress("movies", "collect", "a", "b", [record_from_dict(MOVIE)])
+            state.update_progress(
+                "movies", "collect", "b", "c", [record_from_dict(MOVIE), MovieItem(douban_id="2")]
+            )
+            with open(state.journal_path, encoding="utf-8") as file_obj:
+                journal = [json.loads(line) for line in file_obj]
+
+            items = BackupState(tmpdir, "demo").get_partial_items("movies", "collect")
+
+        self.assertEqual(journal[0]["items"], [{"douban_id": "2", "type": "movie"}])
+        self.assertIsInstance(items[0], MovieItem)
+        self.assertEqual(items, [MOVIE, {"douban_id": "2", "type": "movie"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+
+from json_stream import BackupJsonReader, BackupJsonWriter, save_backup_json
+
+
+METADATA = {"backup_mode": "public", "selected_categories": ["movies", "books"]}
+DATA = {
+    "movies": {
+        "collect": [{"douban_id": "1", "title": "片\n名", "tags": ["a", "b"]}],
+        "do": [],
+        "wish": [{"douban_id": "2", "title": "Movie", "extra": {}}],
+    },
+    "books": {},
+}
+
+
+def expected_text(data, metadata=METADATA):
+    return json.dumps(
+        {"metadata": metadata, "data": data}, ensure_ascii=False, indent=2
+    )
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as file_obj:
+        return file_obj.read()
+
+
+class BackupJsonWriterTests(unittest.TestCase):
+    def test_output_matches_json_dump(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for data in (DATA, {}, [], None, {"movies": {"collect": [1, "two"]}}):
+                with self.subTest(data=data):
+                    path = save_backup_json(
+                        os.path.join(tmpdir, "backup.json"), data, METADATA
+                    )
+
+                    self.assertEqual(read_text(path), expected_text(data))
+
+    def test_combined_file_is_assembled_from_category_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sources = []
+            for category, category_data in DATA.items():
+                path = os.path.join(tmpdir, f"{category}.json")
+                save_backup_json(path, category_data, {"selected_categories": [category]})
+                sources.append((category, path))
+
+            combined = os.path.join(tmpdir, "combined.json")
+            with BackupJsonWriter(combined, METADATA) as writer:
+                writer.write_data_from_files(sources)
+
+            self.assertEqual(read_text(combined), expected_text(DATA))
+
+    def test_failed_write_keeps_previous_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = save_backup_json(os.path.join(tmpdir, "backup.json"), DATA, METADATA)
+
+            with self.assertRaises(RuntimeError):
+                with BackupJsonWriter(path, METADATA) as writer:
+                    writer.write_data({"movies": {}})
+                    raise RuntimeError("interrupted")
+
+            self.assertEqual(read_text(path), expected_text(DATA))
+            self.assertEqual(os.listdir(tmpdir), ["backup.json"])
+
+
+class BackupJsonReaderTests(unittest.TestCase):
+    def read_all(self, path):
+        with BackupJsonReader(path) as reader:
+            return reader.metadata, list(reader.iter_items())
+
+    def test_streams_items_with_their_key_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = save_backup_json(os.path.join(tmpdir, "backup.json"), DATA, METADATA)
+
+            metadata, items = self.read_all(path)
+
+        self.assertEqual(metadata, METADATA)
+        self.assertEqual(
+            items,
+            [
+                (("movies", "collect"), DATA["movies"]["collect"][0]),
+                (("movies", "wish"), DATA["movies"]["wish"][0]),
+            ],
+        )
+
+    def test_falls_back_to_json_load_for_other_layouts(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            compact = os.path.join(tmpdir, "compact.json")
+            with open(compact, "w", encoding="utf-8") as file_obj:
+                json.dump({"metadata": METADATA, "data": DATA}, file_obj, ensure_ascii=False)
+            streamed = save_backup_json(os.path.join(tmpdir, "backup.json"), DATA, METADATA)
+
+            self.assertEqual(self.read_all(compact), self.read_all(streamed))
+
+    def test_empty_metadata_and_data(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = save_backup_json(os.path.join(tmpdir, "backup.json"), {}, {})
+
+            self.assertEqual(self.read_all(path), ({}, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
 
 from books import BookCrawler
 from games import GameCrawler
+from http_cache import CachedSession
 from main import DoubanBackup
 from movies import MovieCrawler
 from music import MusicCrawler
@@ -40,6 +44,18 @@ class BackupLoginTests(unittest.TestCase):
         self.assertFalse(result)
         self.assertIsNone(backup.user_id)
 
+    def test_non_interactive_login_never_prompts_for_password(self):
+        backup = DoubanBackup(cookies_file="/accounts/me.json", interactive=False)
+        backup.auth = Mock(cookies_file="/accounts/me.json")
+        backup.auth.login_with_cookies.return_value = False
+
+        with patch("builtins.input") as prompt, patch("builtins.print"):
+            result = backup._login()
+
+        self.assertFalse(result)
+        prompt.assert_not_called()
+        backup.auth.login.assert_not_called()
+
     def test_login_succeeds_after_loading_user_id(self):
         backup = DoubanBackup()
         backup.auth = Mock()
@@ -57,6 +73,28 @@ class BackupLoginTests(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual("demo-user", backup.user_id)
 
+    def test_offline_login_skips_network_and_replays_cache(self):
+        backup = DoubanBackup(offline=True)
+        backup.auth = Mock()
+        backup.auth.get_session.return_value = Mock()
+
+        def load_user_info(instance):
+            instance.user_id = "demo-user"
+
+        with tempfile.TemporaryDirectory() as tmpdir, patch(
+            "http_cache.DEFAULT_HTTP_CACHE_DIR", tmpdir
+        ), patch.object(
+            DoubanBackup, "_load_user_info", autospec=True, side_effect=load_user_info
+        ):
+            result = backup._login()
+
+        self.assertTrue(result)
+        backup.auth.login_with_cookies.assert_not_called()
+        self.assertIsInstance(backup.session, CachedSession)
+        self.assertTrue(backup.session.offline)
+        self.assertEqual(backup.request_delay, 0)
+        self.assertIsNone(backup.state_store)
+
     def test_backup_all_respects_selected_items(self):
         backup = DoubanBackup(selected_items=["movies", "music"])
         backup.session = object()
@@ -107,6 +145,36 @@ class BackupLoginTests(unittest.TestCase):
         for crawler in crawlers:
             self.assertEqual(crawler.request_delay, 4.5)
 
+    def test_parallel_backup_runs_categories_concurrently_with_host_throttle(self):
+        backup = DoubanBackup(request_delay=4.5, parallel_categories=4)
+        backup.session = object()
+        backup.user_id = "demo"
+        crawlers = []
+        barrier = threading.Barrier(4, timeout=5)
+
+        def crawl(self):
+            crawlers.append(self)
+            barrier.wait()
+            return {"collect": [{"title": self.category_key}]}
+
+        with patch.object(
+            MovieCrawler, "crawl_all_movies", autospec=True, side_effect=crawl
+        ), patch.object(
+            BookCrawler, "crawl_all_books", autospec=True, side_effect=crawl
+        ), patch.object(
+            MusicCrawler, "crawl_all_music", autospec=True, side_effect=crawl
+        ), patch.object(
+            GameCrawler, "crawl_all_games", autospec=True, side_effect=crawl
+        ):
+            data = backup._backup_all()
+
+        self.assertEqual(list(data), ["movies", "books", "music", "games"])
+        self.assertEqual(data["books"], {"collect": [{"title": "books"}]})
+        self.assertEqual(len(crawlers), 4)
+        for crawler in crawlers:
+            self.assertIs(crawler.throttle, backup.throttle)
+        self.assertEqual(backup.throttle.delay, 4.5)
+
     def test_verify_reports_login_failure(self):
         backup = DoubanBackup()
         backup.auth = Mock()
@@ -134,10 +202,12 @@ class BackupLoginTests(unittest.TestCase):
             instance.user_id = "demo-user"
             return {"id": "demo-user", "name": "Tester"}
 
-        session.get.side_effect = [
-            Response("https://movie.douban.com/people/demo-user/collect", 200, "ok"),
-            Response("https://book.douban.com/people/demo-user/collect?start=0&type=book", 404, "页面不存在"),
-        ]
+        # 各分类并发探测，按 URL 返回响应
+        responses = {
+            "https://movie.douban.com/people/demo-user/collect": (200, "ok"),
+            "https://book.douban.com/people/demo-user/collect?start=0&type=book": (404, "页面不存在"),
+        }
+        session.get.side_effect = lambda url, **kwargs: Response(url, *responses[url])
 
         with patch.object(
             DoubanBackup, "_load_user_info", autospec=True, side_effect=load_user_info
@@ -151,6 +221,47 @@ class BackupLoginTests(unittest.TestCase):
         self.assertEqual(report["checks"][1]["category"], "books")
         self.assertEqual(report["checks"][1]["status"], "error")
 
+    def test_verify_marks_probes_over_budget_as_timeout(self):
+        backup = DoubanBackup(selected_items=["movies", "books"])
+        release = threading.Event()
+        session = Mock()
+
+        class Response:
+            status_code = 200
+            text = "ok"
+
+            def __init__(self, url):
+                self.url = url
+
+        probe_threads = []
+
+        def get(url, **kwargs):
+            probe_threads.append(threading.current_thread())
+            if "book.douban.com" in url:
+                release.wait(5)
+            return Response(url)
+
+        session.get.side_effect = get
+        backup.session = session
+        backup.user_id = "demo-user"
+
+        try:
+            started = time.monotonic()
+            checks = backup._probe_categories(backup._build_category_urls(), budget=0.2)
+            elapsed = time.monotonic() - started
+        finally:
+            release.set()
+
+        self.assertLess(elapsed, 2)
+        # 超时的探测不能阻止解释器退出
+        self.assertTrue(all(thread.daemon for thread in probe_threads))
+
+        self.assertEqual([check["category"] for check in checks], ["movies", "books"])
+        self.assertEqual(checks[0]["status"], "ok")
+        self.assertEqual(checks[1]["code"], "timeout")
+        for call in session.get.call_args_list:
+            self.assertEqual(call.kwargs["timeout"], 0.2)
+
 
 if __name__ == "__main__":
     unittest.main()
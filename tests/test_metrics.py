@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import Mock
+
+from backup_state import BackupState
+from metrics import NULL_METRICS, Histogram, MeteredSession, RunMetrics
+from storage import DataStorage
+
+
+class DummyResponse:
+    def __init__(self, text="", status_code=200, url="https://movie.douban.com/people/demo/collect"):
+        self.text = text
+        self.status_code = status_code
+        self.url = url
+
+
+def counter(metrics, name, **labels):
+    for entry in metrics.to_dict()["counters"]:
+        if entry["name"] == name and entry["labels"] == labels:
+            return entry["value"]
+    return 0
+
+
+def histograms(metrics, name):
+    return [entry for entry in metrics.to_dict()["histograms"] if entry["name"] == name]
+
+
+class HistogramTests(unittest.TestCase):
+    def test_buckets_are_cumulative_and_quantiles_use_bucket_bounds(self):
+        histogram = Histogram(buckets=(0.1, 1, 10))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value)
+
+        summary = histogram.to_dict()
+
+        self.assertEqual(summary["buckets"], {"0.1": 1, "1": 3, "10": 4})
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["p50"], 1)
+        self.assertEqual(summary["p95"], 5)
+
+
+class MeteredSessionTests(unittest.TestCase):
+    def test_records_latency_bytes_and_retries_by_previous_code(self):
+        url = "https://movie.douban.com/people/demo/collect"
+        session = Mock()
+        session.get.side_effect = [
+            DummyResponse(status_code=429, url=url),
+            DummyResponse("页面内容", url=url),
+        ]
+        metrics = RunMetrics()
+        metered = MeteredSession(session, metrics)
+
+        metered.get(url, timeout=30)
+        metered.get(url, timeout=30)
+
+        session.get.assert_called_with(url, timeout=30)
+        self.assertEqual(counter(metrics, "retries_total", code="rate_limited"), 1)
+        self.assertEqual(
+            counter(metrics, "responses_total", code="ok", host="movie.douban.com"), 1
+        )
+        self.assertEqual(
+            counter(
+                metrics,
+                "response_bytes_total",
+                host="movie.douban.com",
+                source="network",
+            ),
+            len("页面内容".encode("utf-8")),
+        )
+        self.assertEqual(histograms(metrics, "request_seconds")[0]["count"], 2)
+
+    def test_request_exception_is_counted_and_reraised(self):
+        session = Mock()
+        session.get.side_effect = OSError("boom")
+        metrics = RunMetrics()
+
+        with self.assertRaises(OSError):
+            MeteredSession(session, metrics).get("https://book.douban.com/x")
+
+        self.assertEqual(
+            counter(metrics, "request_errors_total", host="book.douban.com"), 1
+        )
+
+
+class InstrumentationTests(unittest.TestCase):
+    def test_checkpoint_and_export_times_are_recorded(self):
+        metrics = RunMetrics()
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            state = BackupState(tmpdir, "demo", metrics=metrics)
+            state.update_progress("movies", "collect", "a", "b", [{"douban_id": "1"}])
+            state.update_progress("movies", "collect", "b", "c", [{"douban_id": "1"}])
+            storage = DataStorage(backup_dir=tmpdir, metrics=metrics)
+            storage.save_json({"movies": {}}, "demo")
+
+        kinds = {entry["labels"]["kind"] for entry in histograms(metrics, "checkpoint_write_seconds")}
+        self.assertEqual(kinds, {"snapshot", "journal"})
+        self.assertEqual(
+            [entry["labels"] for entry in histograms(metrics, "export_seconds")],
+            [{"format": "json"}],
+        )
+
+    def test_null_metrics_accepts_every_call(self):
+        with NULL_METRICS.timer("parse_seconds", category="movies"):
+            NULL_METRICS.inc("pages_total")
+        NULL_METRICS.record_response("https://example.test", DummyResponse(), 0.1)
+
+
+class ReportTests(unittest.TestCase):
+    def test_report_and_prometheus_textfile(self):
+        metrics = RunMetrics()
+        with metrics.phase("crawl", category="movies"):
+            metrics.inc("pages_total", category="movies")
+        metrics.observe("parse_seconds", 0.02, category="movies")
+
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            report_file = metrics.save_report(
+                os.path.join(tmpdir, "report.json"), {"backup_mode": "public"}
+            )
+            textfile = metrics.write_prometheus(os.path.join(tmpdir, "douban.prom"))
+            with open(report_file, encoding="utf-8") as file_obj:
+                report = json.load(file_obj)
+            with open(textfile, encoding="utf-8") as file_obj:
+                exposition = file_obj.read()
+
+        self.assertEqual(report["metadata"], {"backup_mode": "public"})
+        self.assertEqual(report["phases"][0]["phase"], "crawl")
+        self.assertEqual(report["phases"][0]["category"], "movies")
+        self.assertIn('douban_backup_pages_total{category="movies"} 1', exposition)
+        self.assertIn("# TYPE douban_backup_parse_seconds histogram", exposition)
+        self.assertIn(
+            'douban_backup_parse_seconds_bucket{category="movies",le="+Inf"} 1',
+            exposition,
+        )
+        self.assertIn('douban_backup_parse_seconds_count{category="movies"} 1', exposition)
+
+
+if __name__ == "__main__":
+    unittest.main()
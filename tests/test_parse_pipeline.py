@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import parse_pipeline
+from backup_state import BackupState
+from movies import MovieCrawler
+
+
+def movie_page(start, next_start=None, count=15):
+    items = "".join(
+        f'<div class="item"><div class="info"><ul><li class="title">'
+        f'<a href="https://movie.douban.com/subject/{start + index}/">'
+        f"Movie {start + index}</a></li></ul></div></div>"
+        for index in range(count)
+    )
+    if next_start is None:
+        paginator = '<span class="next">后页</span>'
+    else:
+        paginator = (
+            f'<span class="next"><a href="/people/demo/collect?start={next_start}'
+            f'&amp;sort=time">后页</a></span>'
+        )
+    return f"<html><body>{items}{paginator}</body></html>"
+
+
+class FakeResponse:
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.headers = {}
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        start = 0
+        if "start=" in url:
+            start = int(url.split("start=")[1].split("&")[0])
+        if start not in self.pages:
+            return FakeResponse(url, "", status_code=404)
+        return FakeResponse(url, self.pages[start])
+
+
+class PipelineEngineTests(unittest.TestCase):
+    url = "https://movie.douban.com/people/demo/collect"
+
+    def crawl(self, session, executor, state_store=None):
+        crawler = MovieCrawler(
+            session, state_store=state_store, request_delay=0, engine="pipeline"
+        )
+        data = parse_pipeline.crawl_pipeline(crawler, self.url, "collect", executor=executor)
+        return crawler, data
+
+    def test_pages_parsed_in_worker_processes_are_merged_in_page_order(self):
+        pages = {start: movie_page(start, start + 15) for start in range(0, 90, 15)}
+        pages[90] = movie_page(90)
+        session = FakeSession(pages)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            state = BackupState(tmpdir, user_id="demo")
+            crawler, data = self.crawl(
+                session, parse_pipeline.get_parse_pool(2), state_store=state
+            )
+            self.assertTrue(state.is_collection_complete("movies", "collect"))
+            self.assertEqual(len(state.get_partial_items("movies", "collect")), 105)
+
+        self.assertFalse(crawler.incomplete)
+        self.assertEqual(
+            [item["douban_id"] for item in data], [str(index) for index in range(105)]
+        )
+
+    def test_parse_pool_does_not_fork_from_worker_threads(self):
+        pool = parse_pipeline.get_parse_pool(2)
+
+        self.assertNotEqual(pool._mp_context.get_start_method(), "fork")
+
+    def test_wrong_prediction_restarts_from_the_real_next_link(self):
+        # 第二页的分页链接跳过了 start=30，预取的页面应被丢弃
+        pages = {0: movie_page(0, 15), 15: movie_page(15, 45), 30: movie_page(30, 45)}
+        pages[45] = movie_page(45, count=3)
+        session = FakeSession(pages)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            crawler, data = self.crawl(session, executor)
+
+        ids = [item["douban_id"] for item in data]
+        self.assertFalse(crawler.incomplete)
+        self.assertEqual(ids, [str(index) for index in range(30)] + ["45", "46", "47"])
+
+    def test_failed_page_stops_and_marks_incomplete(self):
+        session = FakeSession({0: movie_page(0, 15)})
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            crawler, data = self.crawl(session, executor)
+
+        self.assertTrue(crawler.incomplete)
+        self.assertEqual(len(data), 15)
+        self.assertEqual(
+            len([url for url in session.requested if "start=15" in url]), 1
+        )
+
+    def test_parse_page_matches_in_process_parsing(self):
+        html = movie_page(0, 15)
+        crawler = MovieCrawler(None, request_delay=0)
+
+        items, next_url, last_page, seconds = parse_pipeline.parse_page(
+            MovieCrawler, crawler.parser_backend, html, "collect"
+        )
+
+        self.assertEqual((items, next_url, last_page), crawler._parse_page(html, "collect"))
+        self.assertGreaterEqual(seconds, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from rate_limit import (
+    AdaptiveRateLimiter,
+    BudgetedSession,
+    HostThrottle,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+class DummyResponse:
+    def __init__(self, status_code=200, url="https://movie.douban.com/", headers=None):
+        self.status_code = status_code
+        self.url = url
+        self.text = ""
+        self.headers = headers or {}
+
+
+class HostThrottleTests(unittest.TestCase):
+    @patch("rate_limit.time.sleep")
+    @patch("rate_limit.time.monotonic", return_value=100.0)
+    def test_same_host_waits_for_delay(self, _monotonic, sleep):
+        throttle = HostThrottle(2)
+
+        throttle.wait("https://movie.douban.com/people/demo/collect")
+        throttle.wait("https://movie.douban.com/people/demo/wish")
+
+        sleep.assert_called_once_with(2.0)
+
+    @patch("rate_limit.time.sleep")
+    @patch("rate_limit.time.monotonic", return_value=100.0)
+    def test_different_hosts_do_not_block_each_other(self, _monotonic, sleep):
+        throttle = HostThrottle(2)
+
+        throttle.wait("https://movie.douban.com/people/demo/collect")
+        throttle.wait("https://book.douban.com/people/demo/collect")
+
+        sleep.assert_not_called()
+
+
+class TokenBucketTests(unittest.TestCase):
+    @patch("rate_limit.time.sleep")
+    @patch("rate_limit.time.monotonic", return_value=100.0)
+    def test_requests_beyond_capacity_wait_for_refill(self, _monotonic, sleep):
+        bucket = TokenBucket(rate=2, capacity=1)
+
+        bucket.acquire()
+        bucket.acquire()
+        bucket.acquire()
+
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [0.5, 1.0]
+        )
+
+    @patch("rate_limit.time.sleep")
+    def test_unlimited_bucket_never_waits(self, sleep):
+        bucket = TokenBucket(rate=None)
+
+        for _ in range(5):
+            bucket.acquire()
+
+        sleep.assert_not_called()
+
+
+class BudgetedSessionTests(unittest.TestCase):
+    def test_each_get_takes_a_token_from_the_shared_bucket(self):
+        bucket = Mock()
+        first = BudgetedSession(Mock(), bucket)
+        second = BudgetedSession(Mock(), bucket)
+
+        first.get("https://movie.douban.com/people/a/collect", timeout=30)
+        second.get("https://movie.douban.com/people/b/collect", timeout=30)
+
+        self.assertEqual(bucket.acquire.call_count, 2)
+        first.session.get.assert_called_once_with(
+            "https://movie.douban.com/people/a/collect", timeout=30
+        )
+        self.assertIs(first.cookies, first.session.cookies)
+
+
+class AdaptiveRateLimiterTests(unittest.TestCase):
+    URL = "https://movie.douban.com/people/demo/collect"
+
+    def test_healthy_responses_shorten_delay_down_to_minimum(self):
+        limiter = AdaptiveRateLimiter(2, min_delay=1)
+
+        for _ in range(50):
+            limiter.record(self.URL, DummyResponse())
+
+        self.assertEqual(limiter.current_delay(self.URL), 1)
+
+    @patch("rate_limit.random.uniform", return_value=0)
+    def test_rate_limited_response_backs_off_exponentially(self, _uniform):
+        limiter = AdaptiveRateLimiter(2)
+
+        limiter.record(self.URL, DummyResponse(status_code=429))
+        first = limiter.current_delay(self.URL)
+        limiter.record(self.URL, DummyResponse(status_code=429))
+
+        self.assertEqual(first, 4)
+        self.assertEqual(limiter.current_delay(self.URL), 8)
+        self.assertEqual(
+            limiter.current_delay("https://book.douban.com/people/demo/collect"), 2
+        )
+
+    @patch("rate_limit.time.sleep")
+    @patch("rate_limit.time.monotonic", return_value=100.0)
+    @patch("rate_limit.random.uniform", return_value=0)
+    def test_retry_after_is_honoured(self, _uniform, _monotonic, sleep):
+        limiter = AdaptiveRateLimiter(1)
+
+        limiter.record(
+            self.URL, DummyResponse(status_code=429, headers={"Retry-After": "30"})
+        )
+        limiter.wait(self.URL)
+
+        sleep.assert_called_once_with(30.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("12"), 12.0)
+        self.assertEqual(parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+import main
+from incremental import find_latest_backup
+from item_records import MovieItem
+from snapshots import SnapshotRepository
+from storage import DataStorage
+
+METADATA = {"backup_mode": "authenticated", "user_id": "demo"}
+
+
+def movie(douban_id, title, rating=""):
+    return MovieItem(douban_id=douban_id, title=title, rating=rating, date="2024-01-01", comment="")
+
+
+def count_objects(repository):
+    return sum(len(names) for _, _, names in os.walk(repository.objects_dir))
+
+
+class SnapshotRepositoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.repository = SnapshotRepository(os.path.join(self.tmpdir.name, "snapshots"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_unchanged_items_and_lists_are_stored_once(self):
+        data = {"movies": {"collect": [movie("1", "一一"), movie("2", "牯岭街少年杀人事件")]}}
+        _, created, _ = self.repository.commit("douban_backup_20240101_000000", data, METADATA)
+        _, created_again, reused = self.repository.commit("douban_backup_20240102_000000", data, METADATA)
+
+        self.assertEqual(created, 3)
+        self.assertEqual((created_again, reused), (0, 3))
+        self.assertEqual(count_objects(self.repository), 3)
+
+    def test_restore_rebuilds_the_backup_file_byte_for_byte(self):
+        data = {
+            "movies": {"collect": [movie("1", "一一", "5")], "wish": []},
+            "books": {"collect": [{"douban_id": "9", "title": "活着", "type": "book"}]},
+        }
+        storage = DataStorage(backup_dir=self.tmpdir.name, metadata=METADATA)
+        with redirect_stdout(StringIO()):
+            original = storage.save_json(data, "original")
+        with open(original, "r", encoding="utf-8") as file_obj:
+            metadata = json.load(file_obj)["metadata"]
+        self.repository.commit("douban_backup_20240101_000000", data, metadata)
+
+        restored, _ = self.repository.restore("douban_backup_20240101_000000", self.tmpdir.name)
+
+        with open(original, "rb") as expected, open(restored, "rb") as actual:
+            self.assertEqual(actual.read(), expected.read())
+
+    def test_gc_removes_objects_only_referenced_by_dropped_snapshots(self):
+        old = {"movies": {"collect": [movie("1", "一一", "4"), movie("2", "恐怖分子")]}}
+        new = {"movies": {"collect": [movie("1", "一一", "5"), movie("2", "恐怖分子")]}}
+        self.repository.commit("douban_backup_20240101_000000", old, METADATA)
+        self.repository.commit("douban_backup_20240102_000000", new, METADATA)
+
+        self.assertEqual(self.repository.gc(), ([], 0, 0))
+        removed, removed_objects, freed = self.repository.gc(keep=1)
+
+        self.assertEqual(removed, ["douban_backup_20240101_000000"])
+        # 旧评分的条目和旧的收藏列表
+        self.assertEqual(removed_objects, 2)
+        self.assertGreater(freed, 0)
+        self.assertEqual(
+            self.repository.load("douban_backup_20240102_000000")["data"]["movies"]["collect"][0]["rating"],
+            "5",
+        )
+
+
+class SnapshotStorageTests(unittest.TestCase):
+    def test_snapshot_mode_replaces_full_json_and_excel(self):
+        data = {"movies": {"collect": [movie("1", "一一")]}}
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            storage = DataStorage(backup_dir=tmpdir, metadata=METADATA, snapshots=True)
+            storage.save_all_json(data)
+            self.assertIsNone(storage.save_all_excel(data))
+
+            backups = storage.get_backup_list()
+            latest = find_latest_backup(tmpdir, user_id="demo", backup_mode="authenticated")
+
+        self.assertEqual([backup["name"].endswith("(快照)") for backup in backups], [True])
+        self.assertEqual(latest["data"]["movies"]["collect"][0]["title"], "一一")
+
+    def test_restore_and_gc_commands(self):
+        data = {"movies": {"collect": [movie("1", "一一")]}}
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            storage = DataStorage(backup_dir=tmpdir, metadata=METADATA, snapshots=True)
+            storage.save_snapshot(data, "douban_backup_20240101_000000")
+
+            with patch("main.DoubanBackup") as backup_cls:
+                paths = main.main(["restore", "douban_backup_20240101_000000", "--output", tmpdir])
+                removed = main.main(["gc", "--output", tmpdir])
+
+            backup_cls.assert_not_called()
+            self.assertEqual(
+                [os.path.basename(path) for path in paths],
+                ["douban_backup_20240101_000000.json", "douban_backup_20240101_000000.xlsx"],
+            )
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+            self.assertEqual(removed, ([], 0, 0))
+
+    def test_public_mode_rejects_snapshots(self):
+        with patch("main.run_public_backup") as run_public, redirect_stdout(StringIO()):
+            result = main.main(["--public", "demo-user", "--snapshots"])
+
+        self.assertFalse(result)
+        run_public.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+import main
+from item_records import BookItem, MovieItem
+from sqlite_store import SQLITE_FILENAME, SqliteStore
+from storage import DataStorage
+
+
+def movie(douban_id, title, rating="", date="2024-01-01", collection="看过"):
+    return MovieItem(
+        douban_id=douban_id,
+        title=title,
+        rating=rating,
+        date=date,
+        comment="",
+        collection=collection,
+    )
+
+
+class SqliteStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, SQLITE_FILENAME)
+        self.store = SqliteStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_upsert_updates_existing_rows_and_keeps_first_seen(self):
+        self.store.upsert("movies", "collect", [movie("1", "霸王别姬", "4")])
+        first_seen = self.store.connection.execute("SELECT first_seen FROM items").fetchone()[0]
+        self.store.upsert("movies", "collect", [movie("1", "霸王别姬", "5")])
+
+        rows = self.store.query(douban_id="1")
+        self.assertEqual(self.store.count(), 1)
+        self.assertEqual(rows[0]["rating"], 5)
+        self.assertEqual(
+            self.store.connection.execute("SELECT first_seen FROM items").fetchone()[0],
+            first_seen,
+        )
+
+    def test_sync_prunes_items_that_left_a_collection(self):
+        self.store.sync({"movies": {"wish": [movie("1", "花样年华"), movie("2", "阿飞正传")]}})
+        self.store.sync(
+            {
+                "movies": {
+                    "wish": [movie("2", "阿飞正传")],
+                    "collect": [movie("1", "花样年华", "5")],
+                }
+            }
+        )
+
+        rows = self.store.query(douban_id="1")
+        self.assertEqual([(row["collection"], row["rating"]) for row in rows], [("collect", 5)])
+        self.assertEqual(self.store.count(), 2)
+
+    def test_sync_without_prune_keeps_missing_items(self):
+        self.store.sync({"movies": {"wish": [movie("1", "花样年华"), movie("2", "阿飞正传")]}})
+        self.store.sync({"movies": {"wish": [movie("2", "阿飞正传")]}}, prune=False)
+
+        self.assertEqual(self.store.count(), 2)
+
+    def test_query_filters_by_rating_title_prefix_date_and_category(self):
+        self.store.sync(
+            {
+                "movies": {
+                    "collect": [
+                        movie("1", "大话西游之月光宝盒", "5", "2023-05-01"),
+                        movie("2", "大话西游之大圣娶亲", "4", "2024-02-01"),
+                        movie("3", "东邪西毒", "5", "2024-03-01"),
+                    ]
+                },
+                "books": {
+                    "collect": [
+                        BookItem(douban_id="9", title="大话西游", rating="5", date="2024-04-01")
+                    ]
+                },
+            }
+        )
+
+        five_star = self.store.query(categories=["movies"], rating=5)
+        by_title = self.store.query(title="大话西游", since="2024-01-01")
+
+        self.assertEqual([row["douban_id"] for row in five_star], ["3", "1"])
+        self.assertEqual([row["douban_id"] for row in by_title], ["9", "2"])
+
+    def test_title_query_uses_index(self):
+        plan = self.store.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM items WHERE title >= ? AND title < ?",
+            ("a", "b"),
+        ).fetchall()
+
+        self.assertIn("idx_items_title", " ".join(str(row) for row in plan))
+
+
+class DataStorageSqliteTests(unittest.TestCase):
+    def test_save_sqlite_writes_database_listed_with_backups(self):
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()):
+            storage = DataStorage(backup_dir=tmpdir)
+            path = storage.save_sqlite({"movies": {"collect": [movie("1", "一一", "5")]}})
+            storage.close_sqlite()
+
+            names = [backup["name"] for backup in storage.get_backup_list()]
+
+        self.assertEqual(path, os.path.join(tmpdir, SQLITE_FILENAME))
+        self.assertIn(SQLITE_FILENAME, names)
+
+
+class QueryCommandTests(unittest.TestCase):
+    def test_query_command_reads_output_directory_without_login(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SqliteStore(os.path.join(tmpdir, SQLITE_FILENAME))
+            store.sync({"movies": {"collect": [movie("1", "一一", "5"), movie("2", "海角七号", "3")]}})
+            store.close()
+
+            with patch("main.DoubanBackup") as backup_cls, redirect_stdout(StringIO()):
+                rows = main.main(["query", "--output", tmpdir, "--rating", "5", "--only", "movies"])
+
+        backup_cls.assert_not_called()
+        self.assertEqual([row["title"] for row in rows], ["一一"])
+
+    def test_query_command_reports_missing_database(self):
+        with tempfile.TemporaryDirectory() as tmpdir, redirect_stdout(StringIO()) as output:
+            rows = main.main(["query", "--output", tmpdir])
+
+        self.assertEqual(rows, [])
+        self.assertIn("未找到备份库", output.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(tmpdir, SQLITE_FILENAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -108,10 +108,8 @@ class ExcelSafetyTests(unittest.TestCase):
             }
         }
 
-        with tempfile.TemporaryDirectory() as tmpdir, patch.object(
-            crawl_public, "OUTPUT_DIR", tmpdir
-        ):
-            path = crawl_public.save_excel(data, "public_formula_safe")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = crawl_public.save_excel(data, "public_formula_safe", output_dir=tmpdir)
             workbook = load_workbook(path)
             worksheet = workbook.active
 
@@ -123,12 +121,11 @@ class ExcelSafetyTests(unittest.TestCase):
     def test_public_save_json_wraps_data_with_metadata(self):
         data = {"movies": {"collect": []}}
 
-        with tempfile.TemporaryDirectory() as tmpdir, patch.object(
-            crawl_public, "OUTPUT_DIR", tmpdir
-        ):
+        with tempfile.TemporaryDirectory() as tmpdir:
             path = crawl_public.save_json(
                 data,
                 "public_with_metadata",
+                output_dir=tmpdir,
                 metadata={
                     "backup_mode": "public",
                     "selected_categories": ["movies"],
@@ -208,6 +205,30 @@ class CategorySheetTests(unittest.TestCase):
         self.assertEqual(worksheet["A2"].value, "序号")
         self.assertEqual(worksheet.freeze_panes, "A3")
 
+    def test_streamed_sheet_keeps_group_rows_links_and_zebra_fills(self):
+        items = [
+            {"title": f"片{index}", "douban_id": str(index), "rating": "4"}
+            for index in range(3)
+        ]
+        worksheet = self._category_sheet(
+            {"movies": {"collect": items, "wish": items[:1]}},
+            "电影",
+        )
+
+        self.assertEqual(
+            sorted(str(cell_range) for cell_range in worksheet.merged_cells.ranges),
+            ["A1:G1", "A7:G7"],
+        )
+        self.assertEqual(worksheet["A1"].value, "  看过 (3部)")
+        self.assertEqual(worksheet["A1"].fill.fgColor.rgb, "004CAF50")
+        self.assertEqual(worksheet["A7"].value, "  想看 (1部)")
+        self.assertEqual(worksheet["C3"].value, "★★★★☆")
+        self.assertEqual(
+            worksheet["G3"].hyperlink.target, "https://movie.douban.com/subject/0/"
+        )
+        self.assertEqual(worksheet["B3"].fill.fgColor.rgb, "00FFFFFF")
+        self.assertEqual(worksheet["B4"].fill.fgColor.rgb, "00F5F5F5")
+
 
 if __name__ == "__main__":
     unittest.main()
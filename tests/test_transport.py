@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+import transport
+from auth import DoubanAuth
+from transport import (
+    CONNECT_RETRIES,
+    DOUBAN_HOSTS,
+    Http2Session,
+    accept_encoding,
+    create_session,
+)
+
+
+class CreateSessionTests(unittest.TestCase):
+    def test_pools_are_sized_to_concurrency_and_retry_only_connects(self):
+        session = create_session(concurrency=4)
+        adapter = session.get_adapter("https://movie.douban.com/")
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertGreaterEqual(adapter._pool_connections, len(DOUBAN_HOSTS))
+        self.assertEqual(adapter.max_retries.connect, CONNECT_RETRIES)
+        self.assertEqual(adapter.max_retries.read, 0)
+        self.assertEqual(adapter.max_retries.status, 0)
+        self.assertEqual(session.headers["Connection"], "keep-alive")
+        self.assertIn("gzip", session.headers["Accept-Encoding"])
+
+    def test_brotli_is_only_advertised_when_decoder_is_installed(self):
+        with patch("transport.importlib.util.find_spec", return_value=None):
+            self.assertEqual(accept_encoding(), "gzip, deflate")
+        with patch("transport.importlib.util.find_spec", return_value=object()):
+            self.assertIn("br", accept_encoding())
+
+    def test_http2_requires_h2(self):
+        with patch.object(transport, "is_http2_available", return_value=False):
+            with self.assertRaises(RuntimeError):
+                create_session(http2=True)
+
+    def test_auth_uses_the_given_session(self):
+        session = create_session()
+
+        self.assertIs(DoubanAuth(session).get_session(), session)
+
+
+class Http2SessionTests(unittest.TestCase):
+    def make_session(self, handler):
+        return Http2Session(transport=httpx.MockTransport(handler))
+
+    def test_get_maps_requests_arguments_and_response(self):
+        seen = {}
+
+        def handler(request):
+            seen["cookie"] = request.headers.get("Cookie")
+            seen["encoding"] = request.headers.get("Accept-Encoding")
+            if request.url.path == "/mine/":
+                return httpx.Response(
+                    302, headers={"Location": "https://www.douban.com/people/demo/"}
+                )
+            return httpx.Response(200, text="<h1>demo</h1>")
+
+        session = self.make_session(handler)
+        session.cookies.update({"dbcl2": "token"})
+
+        redirected = session.get("https://www.douban.com/mine/", timeout=10)
+        not_followed = session.get("https://www.douban.com/mine/", allow_redirects=False)
+
+        self.assertEqual(redirected.url, "https://www.douban.com/people/demo/")
+        self.assertEqual(redirected.text, "<h1>demo</h1>")
+        self.assertEqual(not_followed.status_code, 302)
+        self.assertIn("people/demo", not_followed.headers.get("Location"))
+        self.assertEqual(seen["cookie"], "dbcl2=token")
+        self.assertIn("gzip", seen["encoding"])
+        self.assertEqual(session.cookies.get_dict(), {"dbcl2": "token"})
+
+
+if __name__ == "__main__":
+    unittest.main()
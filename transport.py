@@ -0,0 +1,197 @@
+"""
+HTTP 传输层
+登录、登录备份爬虫、verify 和公开备份共用这里创建的会话：
+按主机的连接池大小与并发数匹配并保持长连接，协商 gzip / brotli 压缩，
+连接失败时在传输层重试；可选 HTTP/2（需安装 httpx[http2]）。
+"""
+import importlib.util
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 为可选功能
+    httpx = None
+
+from config import HEADERS, REQUEST_TIMEOUT
+
+# 备份会访问的豆瓣主机；连接池按主机分别保留，数量需覆盖全部主机，否则会互相挤掉已建立的连接
+DOUBAN_HOSTS = (
+    'www.douban.com',
+    'movie.douban.com',
+    'book.douban.com',
+    'music.douban.com',
+    'accounts.douban.com',
+    'img1.doubanio.com',
+    'img2.doubanio.com',
+    'img3.doubanio.com',
+    'img9.doubanio.com',
+)
+# 只重试建立连接阶段的失败；收到响应后的重试由 classify_response 决定
+CONNECT_RETRIES = 2
+CONNECT_BACKOFF = 0.5
+KEEPALIVE_SECONDS = 60
+
+
+def accept_encoding():
+    """返回本机能够解压的编码；brotli / zstd 只在安装了对应解码库时声明。"""
+    encodings = ['gzip', 'deflate']
+    if (
+        importlib.util.find_spec('brotli') is not None
+        or importlib.util.find_spec('brotlicffi') is not None
+    ):
+        encodings.append('br')
+    if importlib.util.find_spec('zstandard') is not None:
+        encodings.append('zstd')
+    return ', '.join(encodings)
+
+
+def is_http2_available():
+    return httpx is not None and importlib.util.find_spec('h2') is not None
+
+
+def default_headers():
+    headers = dict(HEADERS)
+    headers['Accept-Encoding'] = accept_encoding()
+    headers['Connection'] = 'keep-alive'
+    return headers
+
+
+def mount_connection_pools(session, concurrency=1):
+    """为 requests 会话挂载按主机的连接池，每个主机保留 concurrency 个长连接。"""
+    adapter = HTTPAdapter(
+        pool_connections=len(DOUBAN_HOSTS),
+        pool_maxsize=max(1, concurrency),
+        max_retries=Retry(
+            total=CONNECT_RETRIES,
+            connect=CONNECT_RETRIES,
+            read=0,
+            status=0,
+            redirect=None,
+            backoff_factor=CONNECT_BACKOFF,
+        ),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def create_session(concurrency=1, http2=False):
+    """创建共用的 HTTP 会话。
+
+    concurrency 为同一主机上可能同时进行的请求数（并发分页、详情补全线程等），
+    连接池按它设定大小，避免并发时反复建立 TLS 连接。
+    """
+    if http2:
+        if not is_http2_available():
+            raise RuntimeError("HTTP/2 需要安装 h2: pip install 'httpx[http2]'")
+        return Http2Session(concurrency)
+
+    session = requests.Session()
+    session.headers.update(default_headers())
+    return mount_connection_pools(session, concurrency)
+
+
+class Http2Response:
+    """把 httpx.Response 转成爬虫用到的 requests.Response 接口。"""
+
+    def __init__(self, response):
+        self._response = response
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def text(self):
+        return self._response.text
+
+    @property
+    def content(self):
+        return self._response.content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return self._response.json()
+
+
+class Http2Cookies:
+    """requests 风格的 Cookie 访问接口（update / get_dict / get）。"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def update(self, cookies):
+        for name, value in dict(cookies).items():
+            self._client.cookies.set(name, value)
+
+    def get_dict(self):
+        return {cookie.name: cookie.value for cookie in self._client.cookies.jar}
+
+    def get(self, name, default=None):
+        return self._client.cookies.get(name, default)
+
+
+class Http2Session:
+    """基于 httpx.Client（HTTP/2）实现 requests.Session 中本项目用到的部分。
+
+    HTTP/2 在一个连接上复用多个请求，每个豆瓣子域名只需一次 TLS 握手。
+    """
+
+    http2 = True
+
+    def __init__(self, concurrency=1, transport=None):
+        limits = httpx.Limits(
+            max_connections=max(1, concurrency) * len(DOUBAN_HOSTS),
+            max_keepalive_connections=max(1, concurrency) * len(DOUBAN_HOSTS),
+            keepalive_expiry=KEEPALIVE_SECONDS,
+        )
+        if transport is None:
+            transport = httpx.HTTPTransport(http2=True, limits=limits, retries=CONNECT_RETRIES)
+        self.client = httpx.Client(
+            transport=transport,
+            headers=default_headers(),
+            timeout=REQUEST_TIMEOUT,
+        )
+        self.cookies = Http2Cookies(self.client)
+
+    @property
+    def headers(self):
+        return self.client.headers
+
+    def get(self, url, params=None, headers=None, timeout=None, allow_redirects=True, **kwargs):
+        return self.request(
+            'GET',
+            url,
+            params=params,
+            headers=headers,
+            timeout=timeout,
+            allow_redirects=allow_redirects,
+        )
+
+    def post(self, url, data=None, headers=None, timeout=None, allow_redirects=True, **kwargs):
+        return self.request(
+            'POST',
+            url,
+            data=data,
+            headers=headers,
+            timeout=timeout,
+            allow_redirects=allow_redirects,
+        )
+
+    def request(self, method, url, timeout=None, allow_redirects=True, **kwargs):
+        response = self.client.request(
+            method,
+            url,
+            timeout=REQUEST_TIMEOUT if timeout is None else timeout,
+            follow_redirects=allow_redirects,
+            **kwargs,
+        )
+        return Http2Response(response)
+
+    def close(self):
+        self.client.close()